@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+LLM 호출 적응형 타임아웃 / 헤지 요청 기준
+- 용도·모델별("label · model") 최근 응답 시간을 기록하고 백분위로 제한 시간을 계산
+  · 타임아웃 = p95 × p95_multiplier (min_seconds~max_seconds), 표본이 min_samples보다 적으면 default_seconds
+  · 시간 초과로 재시도할 때마다 제한 시간 2배 (max_seconds까지)
+- 헤지 요청: 응답이 p95를 넘기도록 오지 않으면 다른 키로 같은 요청을 하나 더 보내고 먼저 온 응답 사용
+  (스트리밍이 아닌 호출만, 기본 꺼짐)
+- 표본은 llm_latency_state.json에 저장되어 실행 간 유지 (실행마다 1편만 쓰는 워크플로에서도 적응)
+  · 호출마다 쓰지 않고 메모리에만 기록, 실행(작업)이 끝날 때 save()로 1회 저장
+  · fake 백엔드(PIPELINE_BACKEND=fake)는 실제 지연이 아니므로 파일을 읽거나 쓰지 않음
+- 설정: config_ai.json의 "llm_timeouts"
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_STATE_PATH = Path(__file__).parent / "llm_latency_state.json"
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "default_seconds": 300,
+    "min_seconds": 15,
+    "max_seconds": 600,
+    "p95_multiplier": 2.0,
+    "min_samples": 5,
+    "hedge": False,
+    "hedge_min_seconds": 5,
+}
+
+# 용도·모델별로 보관하는 최근 응답 시간 수
+SAMPLE_WINDOW = 50
+
+
+def percentile(values, pct: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class AdaptiveTimeouts:
+    """용도·모델별 응답 시간 표본 → 타임아웃/헤지 지연 (스레드 안전)"""
+
+    def __init__(self, settings: Dict = None, state_path: str = None):
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings or {})
+        self.state_path = Path(state_path) if state_path else None
+        self._lock = threading.Lock()
+        self._samples = defaultdict(list, self._load_state())
+        self._dirty = False
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> Optional["AdaptiveTimeouts"]:
+        """config_ai.json의 "llm_timeouts" 설정으로 생성 (꺼져 있으면 None)"""
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update((config or {}).get("llm_timeouts", {}))
+        if not settings.get("enabled", True):
+            return None
+        state_path = settings.pop("state_path", None) or DEFAULT_STATE_PATH
+        import backends
+        if backends.is_fake():
+            state_path = None
+        return cls(settings, state_path)
+
+    def _load_state(self) -> Dict[str, list]:
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("samples", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """표본 저장 (임시 파일 → rename, 호출자가 _lock 보유)"""
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"samples": self._samples}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _name(label: str, model: str) -> str:
+        return f"{label or 'unlabeled'} · {model}"
+
+    def observe(self, label: str, model: str, latency: float):
+        """성공한 호출의 응답 시간 기록"""
+        with self._lock:
+            samples = self._samples[self._name(label, model)]
+            samples.append(round(latency, 3))
+            del samples[:-SAMPLE_WINDOW]
+            self._dirty = True
+
+    def save(self):
+        """새 표본이 있으면 파일에 저장 (실행/작업이 끝날 때 호출)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._save_state()
+            self._dirty = False
+
+    def p95(self, label: str, model: str) -> Optional[float]:
+        """최근 응답 시간 p95 (표본이 부족하면 None)"""
+        with self._lock:
+            samples = list(self._samples.get(self._name(label, model), []))
+        if len(samples) < self.settings["min_samples"]:
+            return None
+        return percentile(samples, 95)
+
+    def timeout_for(self, label: str, model: str, retry: int = 0) -> float:
+        """이번 시도의 제한 시간 (초, 시간 초과 재시도마다 2배)"""
+        p95 = self.p95(label, model)
+        if p95 is None:
+            timeout = self.settings["default_seconds"]
+        else:
+            timeout = max(self.settings["min_seconds"], p95 * self.settings["p95_multiplier"])
+        return min(self.settings["max_seconds"], timeout * (2 ** retry))
+
+    def hedge_delay(self, label: str, model: str) -> Optional[float]:
+        """헤지 요청을 보낼 시점 (초, 헤지를 쓰지 않거나 표본이 부족하면 None)"""
+        if not self.settings.get("hedge"):
+            return None
+        p95 = self.p95(label, model)
+        if p95 is None:
+            return None
+        return max(self.settings["hedge_min_seconds"], p95)
+
+    def summary(self) -> Dict[str, Dict]:
+        """용도·모델별 현재 p50/p95와 타임아웃 (리포트용)"""
+        with self._lock:
+            names = {name: list(samples) for name, samples in self._samples.items() if samples}
+        result = {}
+        for name, samples in sorted(names.items()):
+            label, _, model = name.partition(" · ")
+            result[name] = {
+                "samples": len(samples),
+                "p50_seconds": percentile(samples, 50),
+                "p95_seconds": percentile(samples, 95),
+                "timeout_seconds": round(self.timeout_for(label, model), 1)
+            }
+        return result
@@ -6,13 +6,78 @@ AI 콘텐츠 자동 생성기
 - GitHub 블로그 자동 업로드
 """
 
-import google.generativeai as genai
 import json
-import os
 from datetime import datetime
 import re
 from typing import Dict, List
 
+import pipeline_metrics
+from llm_client import create_client
+
+
+# 블로그 글 작성 고정 지시문 (HTML 스타일 규칙, 호출마다 같으므로 컨텍스트 캐시 대상)
+BLOG_POST_INSTRUCTIONS = """# Role Definition
+당신은 대한민국 상위 1% IT/Tech 전문 블로거이자 SEO 전문가입니다.
+독자가 글을 읽고 즉시 실행할 수 있는 실용적인 가이드를 제공하여 체류 시간을 극대화하는 것이 목표입니다.
+
+# Task
+맨 끝의 'User Input (Topic)'에 주어진 주제에 대해 아래 [작성 규칙]을 엄격히 준수하여 블로그 포스팅을 작성하고, 마지막에 이미지 생성용 프롬프트를 제공하십시오.
+
+# [작성 규칙] (엄격 준수)
+1. 형식: 오직 HTML 태그만 사용 (<h2>, <h3>, <p>, <ul>, <li>, <strong>, <mark>, <pre>, <br> 허용). <html>, <head>, <body> 태그는 제외.
+2. 분량: 공백 포함 1,500자 ~ 2,000자 이상.
+3. 구성:
+   - 제목 (<h2>)
+   - 서문 (인사말 생략)
+   - 본문 (4~6개 섹션, <h3> 제목 + 설명)
+   - 실무 활용 예시
+   - 주의사항 또는 한계점
+   - 정리 요약 (Call to Action 포함)
+4. 이미지 플레이스홀더:
+   - 전체 글 내에 [IMAGE_PLACEHOLDER_1] ~ [IMAGE_PLACEHOLDER_5]를 최대 5개 배치.
+   - [IMAGE_PLACEHOLDER_1]은 반드시 서론 직후(썸네일용)에 배치.
+   - 나머지는 핵심 섹션 직후 배치.
+   - 중요: 본문 안에는 플레이스홀더만 삽입하고, 영어 설명은 절대 넣지 마십시오.
+5. 강조: 핵심 문장은 <strong> 또는 <mark>로 강조.
+6. 실무 팁 박스 스타일 (반드시 아래 코드 복사):
+   <p style=\"border-left:4px solid #3b82f6; background:#f0f9ff; padding:15px; border-radius:4px; margin:15px 0;\"><strong>💡 TIP:</strong> 내용</p>
+
+7. 주의사항 박스 스타일 (내용 필수 작성 - 누락 엄금):
+   - 아래 HTML 코드를 사용하되, 내용 부분에 반드시 주제와 관련된 치명적인 단점, 비용 문제, 보안 이슈, 기술적 한계 등을 구체적으로 작성하십시오.
+   - 절대 금지: 내용을 비워두거나, 주의사항을 입력하세요라는 문구를 그대로 출력하는 행위.
+   - 코드:
+   <p style=\"border-left:4px solid #ef4444; background:#fef2f2; padding:15px; border-radius:4px; margin:15px 0;\"><strong>⚠️ 주의:</strong> (이곳에 반드시 구체적인 경고 내용을 작성할 것)</p>
+
+8. 코드/명령어 박스 스타일 (반드시 아래 코드 복사):
+   **코드·명령어 박스 스타일 (가독성 개선 버전)**
+   - 기존 <pre> 태그 대신 호환성이 좋은 <div> 태그를 사용합니다.
+   <div style="background:#f4f4f5; color:#171717; padding:20px; border-radius:8px; white-space:pre-wrap; word-wrap:break-word; line-height:1.6; border:1px solid #d4d4d8; margin:15px 0; font-family:monospace; font-size:0.95em;">
+   코드나 명령어 내용
+   (자동 줄바꿈 및 띄어쓰기 유지됨)
+   </div>
+---
+
+# [Step-by-Step 실행 지침]
+
+Step 1: 구조 설계 (Internal Monologue)
+- 출력하지 말고 혼자 생각하십시오. 주제를 분석하여 가장 논리적인 목차를 구성합니다.
+- 중요: 주의사항 박스에 들어갈 현실적인 위험 요소(Risk Factor)를 미리 생각하십시오.
+
+Step 2: 콘텐츠 작성 (HTML Output)
+- 위 [작성 규칙]에 맞춰 고품질의 HTML 글을 작성하십시오.
+- 스타일(CSS)을 정확하게 적용하십시오.
+- 팁 박스와 주의 박스는 반드시 1회 이상 사용하고, 내용은 절대 비워두지 마십시오.
+
+Step 3: 이미지 프롬프트 생성 (List Output)
+- 글 작성이 끝난 후, 맨 마지막에 <hr> 태그로 구분선을 넣고 그 아래에 작성하십시오.
+- 각 플레이스홀더 번호에 맞춰, 고품질 AI 이미지 생성용 영어 프롬프트를 작성하십시오.
+- 이 부분은 블로그 발행 시 관리자가 참고하여 삭제할 부분입니다.
+- 형식:
+| ID | Context | English Prompt for AI Image Generation |
+|:--|:--|:--|
+| [IMAGE_PLACEHOLDER_1] | (메인 주제) | (Cinematic, Detailed, 8k, Description...) |
+| [IMAGE_PLACEHOLDER_2] | (섹션 1 요약) | (Futuristic, UI Design, Description...) |
+"""
 
 class AIContentGenerator:
     def __init__(self, config_path="config_ai.json"):
@@ -20,74 +85,21 @@ class AIContentGenerator:
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
         
-        # API 키 로드 (복수 키 지원)
-        self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
+        # API 키 로드 (복수 키 지원) 및 키별 모델 풀 준비
+        self.client = create_client(self.config)
         
-        if not self.api_keys:
+        if not self.client.api_keys:
             raise ValueError("❌ GEMINI_API_KEY가 설정되지 않았습니다.")
         
-        # 첫 번째 키로 초기화
-        genai.configure(api_key=self.api_keys[0])
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
-        
-        print(f"✅ Gemini API 초기화 완료 ({len(self.api_keys)}개 키, 모델: gemini-2.5-flash)")
-    
-    def _load_api_keys(self):
-        """API 키 로드 (단일/복수 지원)"""
-        # 방법 1: 복수 키 (JSON 배열)
-        keys_json = os.getenv('GEMINI_API_KEYS', '')
-        print(f"🔍 DEBUG: GEMINI_API_KEYS 환경변수 = {keys_json[:50] if keys_json else '(없음)'}...")
-        if keys_json:
-            try:
-                keys = json.loads(keys_json)
-                if isinstance(keys, list) and keys:
-                    print(f"✅ DEBUG: {len(keys)}개 키 로드 성공")
-                    return keys
-            except Exception as e:
-                print(f"❌ DEBUG: JSON 파싱 실패 - {e}")
-        
-        # 방법 2: 단일 키
-        single_key = os.getenv('GEMINI_API_KEY', self.config.get('gemini_api_key', ''))
-        if single_key:
-            return [single_key]
-        
-        return []
-    
-    def _rotate_key(self):
-        """다음 API 키로 전환"""
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        new_key = self.api_keys[self.current_key_index]
-        genai.configure(api_key=new_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
-        print(f"🔄 API 키 #{self.current_key_index + 1}로 전환")
+        print(f"✅ Gemini API 초기화 완료 ({len(self.client.api_keys)}개 키, 모델: {self.client.default_model})")
     
-    def _generate_with_retry(self, prompt, max_retries=None):
-        """할당량 초과 시 자동으로 다음 키로 재시도"""
-        if max_retries is None:
-            max_retries = len(self.api_keys)
-        
-        for attempt in range(max_retries):
-            try:
-                response = self.model.generate_content(prompt)
-                return response.text
-            except Exception as e:
-                error_msg = str(e).lower()
-                
-                # 할당량 초과 감지
-                if 'quota' in error_msg or 'limit' in error_msg or '429' in error_msg:
-                    print(f"⚠️ API 키 #{self.current_key_index + 1} 할당량 초과")
-                    
-                    if attempt < max_retries - 1:
-                        self._rotate_key()
-                        continue
-                    else:
-                        print("❌ 모든 API 키 할당량 초과")
-                        raise Exception("모든 API 키의 할당량이 초과되었습니다. 24시간 후 재시도하세요.")
-                else:
-                    raise
-        
-        raise Exception("최대 재시도 횟수 초과")
+    def _generate_with_retry(self, prompt, max_retries=None, cache=True, label=None, cached_prefix=None):
+        """
+        할당량 초과/응답 시간 초과 시 자동으로 다음 키로 재시도 (제한 시간은 용도별 p95 기준, 헤지 설정 시 지연 요청 복제)
+        (cache=False면 응답 캐시 사용 안 함, label은 사용량 기록용, cached_prefix는 컨텍스트 캐시할 고정 지시문)
+        """
+        return self.client.generate(prompt, max_attempts=max_retries, cache=cache, label=label,
+                                    cached_prefix=cached_prefix)
     
     def get_existing_titles(self) -> list:
         """기존 블로그 글 제목 목록 가져오기"""
@@ -186,7 +198,7 @@ class AIContentGenerator:
 """
         
         try:
-            topic = self._generate_with_retry(topic_prompt)
+            topic = self._generate_with_retry(topic_prompt, cache=False, label="topic")
             topic = topic.strip()
             print(f"  ✅ 주제 생성 완료: {topic}")
             return topic
@@ -198,75 +210,14 @@ class AIContentGenerator:
         """블로그 글 자동 생성"""
         print(f"\n[2단계] 블로그 글 생성 중...")
         
-        # 프롬프트를 일반 문자열로 구성 (f-string 내부에 복잡한 특수문자 회피)
-        post_prompt = f"""# Role Definition
-당신은 대한민국 상위 1% IT/Tech 전문 블로거이자 SEO 전문가입니다.
-독자가 글을 읽고 즉시 실행할 수 있는 실용적인 가이드를 제공하여 체류 시간을 극대화하는 것이 목표입니다.
-
-# Task
-주어진 주제에 대해 아래 [작성 규칙]을 엄격히 준수하여 블로그 포스팅을 작성하고, 마지막에 이미지 생성용 프롬프트를 제공하십시오.
-
-# User Input (Topic)
+        # 고정 지시문은 컨텍스트 캐시(BLOG_POST_INSTRUCTIONS), 주제만 전송
+        post_prompt = f"""# User Input (Topic)
 주제: {topic}
-
-# [작성 규칙] (엄격 준수)
-1. 형식: 오직 HTML 태그만 사용 (<h2>, <h3>, <p>, <ul>, <li>, <strong>, <mark>, <pre>, <br> 허용). <html>, <head>, <body> 태그는 제외.
-2. 분량: 공백 포함 1,500자 ~ 2,000자 이상.
-3. 구성:
-   - 제목 (<h2>)
-   - 서문 (인사말 생략)
-   - 본문 (4~6개 섹션, <h3> 제목 + 설명)
-   - 실무 활용 예시
-   - 주의사항 또는 한계점
-   - 정리 요약 (Call to Action 포함)
-4. 이미지 플레이스홀더:
-   - 전체 글 내에 [IMAGE_PLACEHOLDER_1] ~ [IMAGE_PLACEHOLDER_5]를 최대 5개 배치.
-   - [IMAGE_PLACEHOLDER_1]은 반드시 서론 직후(썸네일용)에 배치.
-   - 나머지는 핵심 섹션 직후 배치.
-   - 중요: 본문 안에는 플레이스홀더만 삽입하고, 영어 설명은 절대 넣지 마십시오.
-5. 강조: 핵심 문장은 <strong> 또는 <mark>로 강조.
-6. 실무 팁 박스 스타일 (반드시 아래 코드 복사):
-   <p style=\"border-left:4px solid #3b82f6; background:#f0f9ff; padding:15px; border-radius:4px; margin:15px 0;\"><strong>💡 TIP:</strong> 내용</p>
-
-7. 주의사항 박스 스타일 (내용 필수 작성 - 누락 엄금):
-   - 아래 HTML 코드를 사용하되, 내용 부분에 반드시 주제와 관련된 치명적인 단점, 비용 문제, 보안 이슈, 기술적 한계 등을 구체적으로 작성하십시오.
-   - 절대 금지: 내용을 비워두거나, 주의사항을 입력하세요라는 문구를 그대로 출력하는 행위.
-   - 코드:
-   <p style=\"border-left:4px solid #ef4444; background:#fef2f2; padding:15px; border-radius:4px; margin:15px 0;\"><strong>⚠️ 주의:</strong> (이곳에 반드시 구체적인 경고 내용을 작성할 것)</p>
-
-8. 코드/명령어 박스 스타일 (반드시 아래 코드 복사):
-   **코드·명령어 박스 스타일 (가독성 개선 버전)**
-   - 기존 <pre> 태그 대신 호환성이 좋은 <div> 태그를 사용합니다.
-   <div style="background:#f4f4f5; color:#171717; padding:20px; border-radius:8px; white-space:pre-wrap; word-wrap:break-word; line-height:1.6; border:1px solid #d4d4d8; margin:15px 0; font-family:monospace; font-size:0.95em;">
-   코드나 명령어 내용
-   (자동 줄바꿈 및 띄어쓰기 유지됨)
-   </div>
----
-
-# [Step-by-Step 실행 지침]
-
-Step 1: 구조 설계 (Internal Monologue)
-- 출력하지 말고 혼자 생각하십시오. 주제를 분석하여 가장 논리적인 목차를 구성합니다.
-- 중요: 주의사항 박스에 들어갈 현실적인 위험 요소(Risk Factor)를 미리 생각하십시오.
-
-Step 2: 콘텐츠 작성 (HTML Output)
-- 위 [작성 규칙]에 맞춰 고품질의 HTML 글을 작성하십시오.
-- 스타일(CSS)을 정확하게 적용하십시오.
-- 팁 박스와 주의 박스는 반드시 1회 이상 사용하고, 내용은 절대 비워두지 마십시오.
-
-Step 3: 이미지 프롬프트 생성 (List Output)
-- 글 작성이 끝난 후, 맨 마지막에 <hr> 태그로 구분선을 넣고 그 아래에 작성하십시오.
-- 각 플레이스홀더 번호에 맞춰, 고품질 AI 이미지 생성용 영어 프롬프트를 작성하십시오.
-- 이 부분은 블로그 발행 시 관리자가 참고하여 삭제할 부분입니다.
-- 형식:
-| ID | Context | English Prompt for AI Image Generation |
-|:--|:--|:--|
-| [IMAGE_PLACEHOLDER_1] | (메인 주제) | (Cinematic, Detailed, 8k, Description...) |
-| [IMAGE_PLACEHOLDER_2] | (섹션 1 요약) | (Futuristic, UI Design, Description...) |
 """
         
         try:
-            content = self._generate_with_retry(post_prompt)
+            content = self._generate_with_retry(post_prompt, label="post",
+                                                cached_prefix=BLOG_POST_INSTRUCTIONS)
             html_content = content.strip()
             
             # HTML 태그 정리
@@ -337,7 +288,7 @@ Step 3: 이미지 프롬프트 생성 (List Output)
         # AI로 요약
         try:
             summary_prompt = f"다음 글을 2-3문장으로 요약해줘:\n\n{text[:1000]}"
-            text = self._generate_with_retry(summary_prompt)
+            text = self._generate_with_retry(summary_prompt, label="summary")
             return text.strip()
         except:
             return text[:max_length] + "..."
@@ -359,7 +310,7 @@ Output only the prompt in English (no explanations).
 """
         
         try:
-            text = self._generate_with_retry(prompt_request)
+            text = self._generate_with_retry(prompt_request, label="thumbnail_prompt")
             return text.strip()
         except:
             return "modern AI technology workspace, clean design, blue gradient, tech illustration"
@@ -476,6 +427,7 @@ def main():
     if len(sys.argv) > 1:
         config_path = sys.argv[1]
     
+    generator = None
     try:
         generator = AIContentGenerator(config_path)
         article = generator.create_article_for_blog()
@@ -493,6 +445,11 @@ def main():
         print(f"\n❌ 오류 발생: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        pipeline_metrics.print_usage(pipeline_metrics.usage_summary())
+        pipeline_metrics.save_daily_usage()
+        if generator is not None:
+            generator.client.save_state()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+LLM / 이미지 백엔드 선택
+- PIPELINE_BACKEND=live (기본): google.generativeai, Pollinations 실제 호출
+- PIPELINE_BACKEND=fake: 네트워크 없이 결정적인 가짜 응답 (벤치마크·회귀 테스트용)
+  · Gemini: Step 1은 제목 1줄(배열 스키마면 제목 후보 JSON 배열), JSON 요청(Step 2)은 스키마에 맞는 본문 JSON
+    (스트리밍 지원, outline 모드의 아웃라인/섹션 본문 스키마도 구분)
+    request_options의 timeout보다 지연이 길면 그 시점에 504 Deadline Exceeded
+    컨텍스트 캐시는 고정 프롬프트를 기억해 usage_metadata의 캐시 토큰 수로 적중을 흉내
+  · Pollinations: URL의 width/height 크기 PNG 생성
+
+가짜 백엔드 조정 (환경변수):
+    FAKE_LLM_LATENCY     LLM 응답 지연 초 (예: "0.5" 또는 범위 "0.2-1.0")
+    FAKE_IMAGE_LATENCY   이미지 응답 지연 초 (형식 동일)
+    FAKE_ERROR_RATE      호출당 오류 주입 확률 (0~1, 기본 0)
+    FAKE_ERROR_KIND      주입 오류 종류: quota | timeout | server | invalid_json (기본 quota)
+    FAKE_SEED            지연/오류 난수 시드 (기본 0)
+
+사용 예:
+    PIPELINE_BACKEND=fake FAKE_LLM_LATENCY=0.5 python automation/run_pipeline.py --count 3
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import List
+
+
+ERROR_KINDS = ("quota", "timeout", "server", "invalid_json")
+
+_random = None
+_random_lock = threading.Lock()
+
+# 키 전용 클라이언트를 연결할 수 없을 때 genai.configure 전역 설정으로 대체 (경고는 1회)
+_configure_lock = threading.Lock()
+_configure_warned = False
+
+# 이미지 요청용 공유 HTTP 세션 (상주 워커에서 연결 재사용)
+_session = None
+_session_lock = threading.Lock()
+
+
+def backend_name() -> str:
+    """현재 백엔드 이름 (live | fake)"""
+    return os.getenv('PIPELINE_BACKEND', 'live').strip().lower() or 'live'
+
+
+def is_fake() -> bool:
+    return backend_name() == 'fake'
+
+
+def default_api_keys() -> List[str]:
+    """키가 없을 때 쓸 기본 키 (가짜 백엔드는 키 없이도 실행)"""
+    return ["fake-key"] if is_fake() else []
+
+
+def create_model(model_name: str, api_key: str = None):
+    """
+    GenerativeModel 생성
+    - api_key 지정 시 그 키 전용 클라이언트를 모델에 연결 (genai.configure 전역 설정과 무관,
+      키가 다른 모델을 여러 스레드에서 동시에 사용 가능)
+    """
+    if is_fake():
+        return FakeGenerativeModel(model_name)
+
+    import google.generativeai as genai
+    model = genai.GenerativeModel(model_name)
+    if api_key:
+        _bind_api_key(model, api_key)
+    return model
+
+
+def _bind_api_key(model, api_key: str):
+    """
+    모델에 키 전용 클라이언트 연결
+    - google-generativeai 0.8.x의 GenerativeModel._client (생성 시 None, 첫 요청 때 전역 설정 클라이언트로 채움)를
+      키 전용 GenerativeServiceClient로 미리 지정 (requirements.txt의 최소 버전에서 확인)
+    - SDK 내부 구조가 바뀌어 _client가 없으면 genai.configure 전역 설정으로 대체
+      (키별 병렬 요청은 불가능해지므로 경고)
+    """
+    global _configure_warned
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+    if "_client" in vars(model):
+        model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+        return
+    with _configure_lock:
+        if not _configure_warned:
+            print("⚠️ google-generativeai 내부 구조가 달라 키 전용 클라이언트를 연결할 수 없습니다: "
+                  "genai.configure 전역 설정으로 대체 (여러 키 동시 사용 불가)")
+            _configure_warned = True
+        genai.configure(api_key=api_key)
+
+
+def create_cached_model(model_name: str, api_key: str, system_instruction: str, ttl_seconds: float):
+    """
+    고정 프롬프트(system_instruction)를 Gemini 컨텍스트 캐시에 올리고, 그 캐시를 사용하는 모델 반환
+    - 캐시는 키(프로젝트)별로 만들어지므로 키 전용 클라이언트로 생성
+    - 최소 토큰 수 미달 등으로 만들 수 없으면 예외 (호출 측에서 프롬프트에 직접 붙여 전송)
+    """
+    if is_fake():
+        return FakeGenerativeModel(model_name, cached_prefix=system_instruction)
+
+    import datetime
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+    cache_client = glm.CacheServiceClient(client_options={"api_key": api_key})
+    cached = cache_client.create_cached_content(cached_content=glm.CachedContent(
+        model=f"models/{model_name}",
+        system_instruction=glm.Content(parts=[glm.Part(text=system_instruction)]),
+        ttl=datetime.timedelta(seconds=ttl_seconds)
+    ))
+    # 생성 응답(name, model)을 그대로 넘겨 전역 설정 키로 캐시를 다시 조회하지 않음
+    model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+    _bind_api_key(model, api_key)
+    return model
+
+
+def fetch_image(url: str, timeout: float = 60):
+    """이미지 URL 요청 (requests.get과 같은 status_code/content 응답)"""
+    if is_fake():
+        return FakeImageResponse(url)
+
+    return _http_session().get(url, timeout=timeout)
+
+
+def _http_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            _session = requests.Session()
+        return _session
+
+
+# ------------------------------------------------------------------
+# 가짜 백엔드 공통: 지연, 오류 주입
+# ------------------------------------------------------------------
+
+def _rng() -> random.Random:
+    global _random
+    if _random is None:
+        _random = random.Random(int(os.getenv('FAKE_SEED', '0') or 0))
+    return _random
+
+
+def _latency(env_name: str) -> float:
+    """"0.5" 또는 "0.2-1.0" 형식의 지연 시간"""
+    value = os.getenv(env_name, '').strip()
+    if not value:
+        return 0.0
+    low, _, high = value.partition('-')
+    low = float(low)
+    if not high:
+        return low
+    with _random_lock:
+        return _rng().uniform(low, float(high))
+
+
+def _injected_error() -> str:
+    """이번 호출에 주입할 오류 종류 (없으면 None)"""
+    rate = float(os.getenv('FAKE_ERROR_RATE', '0') or 0)
+    if rate <= 0:
+        return None
+    with _random_lock:
+        hit = _rng().random() < rate
+    if not hit:
+        return None
+    kind = os.getenv('FAKE_ERROR_KIND', 'quota').strip().lower()
+    if kind not in ERROR_KINDS:
+        raise ValueError(f"FAKE_ERROR_KIND는 {', '.join(ERROR_KINDS)} 중 하나여야 합니다: {kind}")
+    return kind
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# ------------------------------------------------------------------
+# 가짜 Gemini
+# ------------------------------------------------------------------
+
+FAKE_TOOLS = ["NotebookLM", "Napkin AI", "Gamma", "GenSpark", "Perplexity",
+              "DeepSeek", "Nano Banana", "Recraft", "Gemini", "Claude"]
+FAKE_TASKS = ["회의록 정리", "주간 보고서 작성", "시장 조사", "PPT 초안 만들기",
+              "엑셀 수식 해결", "상세페이지 이미지 제작", "논문 요약", "기획안 도표화"]
+
+
+class FakeUsage:
+    def __init__(self, prompt: str, text: str, cached_prefix: str = ""):
+        self.prompt_token_count = max(1, len(prompt) // 4)
+        self.candidates_token_count = max(1, len(text) // 4)
+        self.cached_content_token_count = len(cached_prefix) // 4
+
+
+class FakeResponse:
+    """generate_content 응답 (stream=True면 조각 단위 순회 가능)"""
+
+    def __init__(self, prompt: str, text: str, latency: float, stream: bool, cached_prefix: str = "",
+                 timeout: float = None):
+        self._text = text
+        self._latency = latency
+        self._timeout = timeout
+        self.usage_metadata = FakeUsage(prompt, text, cached_prefix)
+        if not stream:
+            if timeout is not None and latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("504 Deadline Exceeded")
+            time.sleep(latency)
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def __iter__(self):
+        chunk_size = max(1, len(self._text) // 8)
+        chunks = [self._text[i:i + chunk_size] for i in range(0, len(self._text), chunk_size)]
+        elapsed = 0.0
+        for chunk in chunks:
+            delay = self._latency / len(chunks)
+            if self._timeout is not None and elapsed + delay > self._timeout:
+                time.sleep(max(0.0, self._timeout - elapsed))
+                raise TimeoutError("504 Deadline Exceeded")
+            time.sleep(delay)
+            elapsed += delay
+            yield FakeChunk(chunk)
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """genai.GenerativeModel 대체: 프롬프트 해시 기반의 결정적 응답"""
+
+    def __init__(self, model_name: str, cached_prefix: str = None, **kwargs):
+        self.model_name = model_name
+        # 컨텍스트 캐시에 올린 고정 프롬프트 (실제 API처럼 요청마다 프롬프트 앞에 붙여 처리)
+        self.cached_prefix = cached_prefix or ""
+
+    def generate_content(self, prompt, generation_config=None, stream: bool = False, request_options=None,
+                         **kwargs):
+        prompt_text = prompt if isinstance(prompt, str) else str(prompt)
+        if self.cached_prefix:
+            prompt_text = f"{self.cached_prefix}\n\n{prompt_text}"
+        error = _injected_error()
+        latency = _latency('FAKE_LLM_LATENCY')
+
+        if error == "quota":
+            time.sleep(latency)
+            raise Exception("429 Resource has been exhausted (e.g. check quota).")
+        if error == "timeout":
+            time.sleep(latency)
+            raise TimeoutError("Read timed out. (read timeout=600)")
+        if error == "server":
+            time.sleep(latency)
+            raise Exception("500 An internal error has occurred.")
+
+        generation_config = generation_config or {}
+        wants_json = generation_config.get("response_mime_type") == "application/json"
+        schema = generation_config.get("response_schema") or {}
+        properties = schema.get("properties") or {}
+        if wants_json and schema.get("type") == "array":
+            text = self._title_candidates(prompt_text)
+        elif wants_json and "outline" in properties:
+            text = self._outline_json(prompt_text)
+        elif wants_json and list(properties) == ["sections"]:
+            text = self._section_body_json(prompt_text)
+        elif wants_json:
+            text = self._article_json(prompt_text)
+        else:
+            text = self._title(prompt_text)
+        if error == "invalid_json":
+            text = text[:len(text) // 2]
+        timeout = (request_options or {}).get("timeout")
+        return FakeResponse(prompt_text, text, latency, stream, self.cached_prefix, timeout)
+
+    def _title(self, prompt: str) -> str:
+        digest = int(_digest(prompt), 16)
+        tool = FAKE_TOOLS[digest % len(FAKE_TOOLS)]
+        task = FAKE_TASKS[(digest // len(FAKE_TOOLS)) % len(FAKE_TASKS)]
+        return f"{tool}로 {task}, 퇴근 전 끝내는 실무 가이드 #{digest % 10000:04d}"
+
+    def _title_candidates(self, prompt: str) -> str:
+        match = re.search(r'후보\s*(\d+)\s*개', prompt)
+        count = int(match.group(1)) if match else 5
+        return json.dumps([self._title(f"{prompt}#{i}") for i in range(count)], ensure_ascii=False)
+
+    def _article_json(self, prompt: str) -> str:
+        match = re.search(r'\*\*Topic:\*\*\s*(.+)', prompt)
+        topic = match.group(1).strip() if match else "테스트 주제"
+        digest = _digest(prompt)[:8]
+        paragraph = (f"{topic}에 대한 테스트 본문입니다. " * 12).strip()
+
+        def image(index: int, position: str) -> dict:
+            return {
+                "type": "image_placeholder",
+                "id": f"img_{index}",
+                "description": f"Office worker using an AI tool on a laptop, wide angle, scene {index}, {digest}",
+                "description_ko": f"AI 도구로 업무를 처리하는 장면 {index}",
+                "position": position
+            }
+
+        sections = [
+            {"type": "heading", "level": 2, "content": "업무 시간이 늘 부족하신가요?"},
+            {"type": "paragraph", "content": paragraph},
+            image(1, "after_intro"),
+            {"type": "heading", "level": 3, "content": "핵심 기능 살펴보기"},
+            {"type": "paragraph", "content": paragraph},
+            image(2, "middle"),
+            {"type": "tip_box", "content": "프롬프트 예시: 이번 주 회의 내용을 표로 정리해줘"},
+            {"type": "paragraph", "content": paragraph},
+            image(3, "end"),
+        ]
+        return json.dumps({
+            "title": topic,
+            "sections": sections,
+            "summary": f"{topic} 요약",
+            "tags": ["AI", "업무자동화", "테스트"]
+        }, ensure_ascii=False)
+
+    def _outline_json(self, prompt: str) -> str:
+        match = re.search(r'\*\*Topic:\*\*\s*(.+)', prompt)
+        topic = match.group(1).strip() if match else "테스트 주제"
+        digest = _digest(prompt)[:8]
+        headings = ["업무 시간이 늘 부족하신가요?", "핵심 기능 살펴보기", "실전 활용 예시", "도입 전 체크리스트"]
+        outline = []
+        for index, heading in enumerate(headings):
+            item = {"heading": heading, "level": 2 if index == 0 else 3,
+                    "points": f"{topic}의 '{heading}' 부분을 구체적인 예시와 함께 설명"}
+            if index != 2:
+                item["image_description"] = (f"Office worker using an AI tool on a laptop, wide angle, "
+                                             f"scene {index + 1}, {digest}")
+                item["image_description_ko"] = f"AI 도구로 업무를 처리하는 장면 {index + 1}"
+            outline.append(item)
+        return json.dumps({
+            "outline": outline,
+            "summary": f"{topic} 요약",
+            "tags": ["AI", "업무자동화", "테스트"]
+        }, ensure_ascii=False)
+
+    def _section_body_json(self, prompt: str) -> str:
+        match = re.search(r'\*\*This Section:\*\*\s*(.+)', prompt)
+        heading = match.group(1).strip() if match else "테스트 섹션"
+        paragraph = (f"{heading}에 대한 테스트 본문입니다. " * 12).strip()
+        return json.dumps({
+            "sections": [
+                {"type": "paragraph", "content": paragraph},
+                {"type": "tip_box", "content": f"{heading} 팁: 이번 주 회의 내용을 표로 정리해줘"}
+            ]
+        }, ensure_ascii=False)
+
+
+# ------------------------------------------------------------------
+# 가짜 Pollinations
+# ------------------------------------------------------------------
+
+class FakeImageResponse:
+    """requests.Response 대체: URL 크기의 단색 PNG (색은 프롬프트 해시로 결정)"""
+
+    def __init__(self, url: str):
+        error = _injected_error()
+        time.sleep(_latency('FAKE_IMAGE_LATENCY'))
+        if error == "timeout":
+            raise TimeoutError("Read timed out. (read timeout=60)")
+
+        parsed = urllib.parse.urlparse(url)
+        query = urllib.parse.parse_qs(parsed.query)
+        width = int(query.get('width', ['1280'])[0])
+        height = int(query.get('height', ['720'])[0])
+
+        self.url = url
+        self.headers = {"Content-Type": "image/png"}
+        if error in ("quota", "server", "invalid_json"):
+            self.status_code = 429 if error == "quota" else 500
+            self.content = b""
+        else:
+            self.status_code = 200
+            self.content = make_png(width, height, bytes.fromhex(_digest(parsed.path)[:6]))
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+
+def make_png(width: int, height: int, rgb: bytes) -> bytes:
+    """단색 RGB PNG 바이트"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + rgb * width
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(row * height, 9))
+            + chunk(b"IEND", b""))
@@ -19,12 +19,18 @@ Features:
 import os
 import json
 import re
+import shutil
 import base64
+import html
 import hashlib
+import mimetypes
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import sys
+import tempfile
 
 # Required libraries: python-frontmatter, requests, markdown
 try:
@@ -37,6 +43,326 @@ except ImportError as e:
     sys.exit(1)
 
 
+# "---\n<front matter>\n---" at the very top of a Markdown file
+# (group 2 keeps its trailing newline and is empty for a bare "---\n---" block)
+FRONT_MATTER_PATTERN = re.compile(r'\A(---[ \t]*\r?\n)((?:.*?\r?\n)??)(---[ \t]*(?:\r?\n|\Z))', re.DOTALL)
+CANONICAL_LINE_PATTERN = re.compile(r'^canonical_url:[ \t]*([^\r\n]*?)[ \t]*(?=\r?$)', re.MULTILINE)
+
+
+def normalize_tags(value: Any) -> List[str]:
+    """Front-matter tags as a list (a single string such as `tags: ai` becomes one tag)"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+class WordPressTermResolver:
+    """
+    Resolves WordPress tag/category names to term IDs
+
+    Existing terms are bulk-fetched at most once per run, missing terms are
+    created through the REST batch endpoint (falling back to single requests),
+    and the name → id map is persisted on disk so later runs only hit the
+    network for names they have never seen.
+    """
+
+    TAXONOMIES = ("tags", "categories")
+    PER_PAGE = 100
+    BATCH_SIZE = 25  # WordPress batch/v1 limit
+
+    def __init__(self, wp_url: str, headers: Dict[str, str], cache_path: Path):
+        """
+        Args:
+            wp_url: WordPress site URL (without /wp-json)
+            headers: Authentication headers for the REST API
+            cache_path: JSON file used to persist the name → id cache
+        """
+        self.wp_url = wp_url.rstrip("/")
+        self.cache_path = cache_path
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.cache = self._load_cache()
+        self._fetched = set()
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        # WordPress returns HTML-escaped names (e.g. "AI &amp; ML")
+        return html.unescape(str(name)).strip().lower()
+
+    def _load_cache(self) -> Dict[str, Dict[str, int]]:
+        """Load the on-disk cache (discarded if it belongs to another site)"""
+        empty = {taxonomy: {} for taxonomy in self.TAXONOMIES}
+        if not self.cache_path.exists():
+            return empty
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable term cache: {e}")
+            return empty
+        if data.get("wp_url") != self.wp_url:
+            return empty
+        for taxonomy in self.TAXONOMIES:
+            # Entries without an id (older caches) are looked up again
+            empty[taxonomy].update({name: term_id for name, term_id in data.get(taxonomy, {}).items() if term_id})
+        return empty
+
+    def save_cache(self) -> None:
+        """Persist the name → id cache"""
+        data = {"wp_url": self.wp_url, **self.cache}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def _fetch_all(self, taxonomy: str) -> None:
+        """Bulk-fetch every existing term of a taxonomy (once per run)"""
+        if taxonomy in self._fetched:
+            return
+        url = f"{self.wp_url}/wp-json/wp/v2/{taxonomy}"
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            response = self.session.get(
+                url,
+                params={"per_page": self.PER_PAGE, "page": page, "_fields": "id,name"},
+                timeout=30
+            )
+            response.raise_for_status()
+            for term in response.json():
+                self.cache[taxonomy][self._normalize(term["name"])] = term["id"]
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+            page += 1
+        self._fetched.add(taxonomy)
+        print(f"   🏷️ Fetched {len(self.cache[taxonomy])} existing {taxonomy}")
+
+    def _create_batch(self, taxonomy: str, names: List[str]) -> None:
+        """Create missing terms, BATCH_SIZE per request"""
+        batch_url = f"{self.wp_url}/wp-json/batch/v1"
+        for start in range(0, len(names), self.BATCH_SIZE):
+            chunk = names[start:start + self.BATCH_SIZE]
+            payload = {
+                "validation": "normal",
+                "requests": [
+                    {"method": "POST", "path": f"/wp/v2/{taxonomy}", "body": {"name": name}}
+                    for name in chunk
+                ]
+            }
+            response = self.session.post(batch_url, json=payload, timeout=30)
+            if response.status_code not in (200, 207):
+                # Batch API unavailable (WordPress < 5.6) - create one by one
+                for name in chunk:
+                    self._create_single(taxonomy, name)
+                continue
+            for name, item in zip(chunk, response.json().get("responses", [])):
+                self._remember(taxonomy, name, item.get("status", 0), item.get("body", {}))
+
+    def _create_single(self, taxonomy: str, name: str) -> None:
+        response = self.session.post(
+            f"{self.wp_url}/wp-json/wp/v2/{taxonomy}",
+            json={"name": name},
+            timeout=30
+        )
+        self._remember(taxonomy, name, response.status_code, response.json())
+
+    def _remember(self, taxonomy: str, name: str, status: int, body: Dict) -> None:
+        """Record a created term, or an existing one reported via term_exists"""
+        key = self._normalize(name)
+        if status in (200, 201) and "id" in body:
+            self.cache[taxonomy][key] = body["id"]
+        elif body.get("code") == "term_exists" and (body.get("data") or {}).get("term_id"):
+            self.cache[taxonomy][key] = body["data"]["term_id"]
+        else:
+            print(f"   ⚠️ Could not create {taxonomy[:-1]} '{name}': {body.get('message', status)}")
+
+    def prepare(self, taxonomy: str, names: List[str]) -> None:
+        """
+        Make sure every name is resolvable without further round trips
+
+        Args:
+            taxonomy: "tags" or "categories"
+            names: All names that will be looked up during this run
+        """
+        wanted = {}
+        for name in names:
+            if name and self._normalize(name) not in self.cache[taxonomy]:
+                wanted.setdefault(self._normalize(name), str(name).strip())
+        if not wanted:
+            return
+
+        self._fetch_all(taxonomy)
+        missing = [original for key, original in wanted.items() if key not in self.cache[taxonomy]]
+        if missing:
+            print(f"   🏷️ Creating {len(missing)} new {taxonomy}")
+            self._create_batch(taxonomy, missing)
+        self.save_cache()
+
+    def forget(self, taxonomy: str, names: List[str]) -> None:
+        """
+        Drop cached IDs (e.g. terms deleted in WordPress) so the next
+        prepare() re-fetches the taxonomy and recreates what is missing
+        """
+        for name in names:
+            self.cache[taxonomy].pop(self._normalize(name), None)
+        self._fetched.discard(taxonomy)
+
+    def resolve(self, taxonomy: str, names: List[str]) -> List[int]:
+        """Map names to IDs using the cache only (unknown names are dropped)"""
+        ids = []
+        for name in names:
+            term_id = self.cache[taxonomy].get(self._normalize(name))
+            if term_id and term_id not in ids:
+                ids.append(term_id)
+        return ids
+
+
+class WordPressMediaUploader:
+    """
+    Uploads locally referenced images to the WordPress media library
+
+    Every image is uploaded at most once: files are keyed by the SHA-256 of
+    their content and the hash → media map is persisted on disk, so renamed
+    or re-referenced files never produce duplicate attachments.
+    """
+
+    IMG_SRC_PATTERN = re.compile(r'(<img\b[^>]*?\bsrc=["\'])([^"\']+)(["\'])', re.IGNORECASE)
+
+    def __init__(self, wp_url: str, auth_header: Dict[str, str], base_dir: Path,
+                 cache_path: Path, max_workers: int = 4):
+        """
+        Args:
+            wp_url: WordPress site URL (without /wp-json)
+            auth_header: Authorization header (Content-Type is set per upload)
+            base_dir: Repository root used to resolve local image paths
+            cache_path: JSON file used to persist the hash → media map
+            max_workers: Number of parallel uploads
+        """
+        self.media_url = f"{wp_url.rstrip('/')}/wp-json/wp/v2/media"
+        self.auth_header = auth_header
+        self.base_dir = base_dir.resolve()
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.media = self._load_cache()
+        self._hash_by_path: Dict[Path, str] = {}
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable media cache: {e}")
+            return {}
+        if data.get("media_url") != self.media_url:
+            return {}
+        return data.get("media", {})
+
+    def save_cache(self) -> None:
+        """Persist the hash → media map"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump({"media_url": self.media_url, "media": self.media},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def local_path(self, src: str) -> Optional[Path]:
+        """
+        Map an image reference to a file inside the repository
+
+        Relative/root-relative paths and GitHub Pages URLs are considered
+        local; any other remote URL is left alone.
+        """
+        if not src:
+            return None
+        parsed = urllib.parse.urlparse(src)
+        if parsed.scheme in ("http", "https") and not parsed.netloc.endswith(".github.io"):
+            return None
+        if parsed.scheme not in ("", "http", "https"):
+            return None
+        candidate = (self.base_dir / urllib.parse.unquote(parsed.path).lstrip("/")).resolve()
+        if self.base_dir not in candidate.parents or not candidate.is_file():
+            return None
+        return candidate
+
+    def _content_hash(self, path: Path) -> str:
+        if path not in self._hash_by_path:
+            self._hash_by_path[path] = hashlib.sha256(path.read_bytes()).hexdigest()
+        return self._hash_by_path[path]
+
+    def collect(self, posts: List[Dict[str, Any]]) -> Dict[str, Path]:
+        """Find all local images referenced by posts (content + featured image), keyed by hash"""
+        files = {}
+        for post in posts:
+            refs = [m.group(2) for m in self.IMG_SRC_PATTERN.finditer(post.get("content", ""))]
+            refs.append(post.get("image", ""))
+            for ref in refs:
+                path = self.local_path(ref)
+                if path:
+                    files.setdefault(self._content_hash(path), path)
+        return files
+
+    def _upload(self, file_hash: str, path: Path) -> Optional[Dict[str, Any]]:
+        mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        headers = {
+            **self.auth_header,
+            "Content-Type": mime_type,
+            "Content-Disposition": f'attachment; filename="{path.name}"'
+        }
+        response = requests.post(self.media_url, headers=headers, data=path.read_bytes(), timeout=120)
+        if response.status_code not in (200, 201):
+            print(f"   ⚠️ Media upload failed for {path.name}: {response.status_code}")
+            return None
+        body = response.json()
+        return {"id": body["id"], "url": body.get("source_url", "")}
+
+    def upload_all(self, posts: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upload every referenced image that is not in the media cache yet
+
+        Returns:
+            Counts of uploaded, cached and failed images
+        """
+        files = self.collect(posts)
+        pending = {h: p for h, p in files.items() if h not in self.media}
+        stats = {"uploaded": 0, "cached": len(files) - len(pending), "failed": 0}
+        if not pending:
+            return stats
+
+        print(f"   🖼️ Uploading {len(pending)} images ({stats['cached']} already in media library)")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._upload, h, p): h for h, p in pending.items()}
+            for future in as_completed(futures):
+                file_hash = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"   ⚠️ Media upload error for {pending[file_hash].name}: {e}")
+                    result = None
+                if result:
+                    self.media[file_hash] = result
+                    stats["uploaded"] += 1
+                else:
+                    stats["failed"] += 1
+        self.save_cache()
+        return stats
+
+    def media_for(self, src: str) -> Optional[Dict[str, Any]]:
+        """Look up the uploaded media entry for an image reference"""
+        path = self.local_path(src)
+        if not path:
+            return None
+        return self.media.get(self._content_hash(path))
+
+    def rewrite_content(self, content: str) -> str:
+        """Point local <img> sources at their WordPress media URLs"""
+        def replace(match):
+            media = self.media_for(match.group(2))
+            if not media or not media.get("url"):
+                return match.group(0)
+            return f"{match.group(1)}{media['url']}{match.group(3)}"
+        return self.IMG_SRC_PATTERN.sub(replace, content)
+
+
 class OSMUBuilder:
     """One Source Multi Use Content Builder"""
     
@@ -56,6 +382,16 @@ class OSMUBuilder:
         self.wp_url = self.config.get("wordpress", {}).get("url", "")
         self.wp_user = self.config.get("wordpress", {}).get("username", "")
         self.wp_password = self.config.get("wordpress", {}).get("app_password", "")
+        self.term_cache_path = self.base_dir / self.config.get("wordpress", {}).get(
+            "term_cache", "automation/wp_term_cache.json"
+        )
+        self.term_resolver: Optional[WordPressTermResolver] = None
+        self.media_cache_path = self.base_dir / self.config.get("wordpress", {}).get(
+            "media_cache", "automation/wp_media_cache.json"
+        )
+        self.media_upload_workers = self.config.get("wordpress", {}).get("media_upload_workers", 4)
+        self.media_uploader: Optional[WordPressMediaUploader] = None
+        self.pending_canonical_urls: Dict[str, str] = {}
         
         # Pagination settings
         self.items_per_page = self.config.get("pagination", {}).get("items_per_page", 20)
@@ -146,7 +482,7 @@ class OSMUBuilder:
                         "date": date_str,
                         "summary": metadata.get("summary", ""),
                         "image": metadata.get("image", ""),
-                        "tags": metadata.get("tags", []),
+                        "tags": normalize_tags(metadata.get("tags")),
                         "content": html_content,
                         "markdown_content": content,
                         "file_path": str(md_file),
@@ -289,6 +625,28 @@ class OSMUBuilder:
         headers = self._get_wordpress_headers()
         wp_api_url = f"{self.wp_url}/wp-json/wp/v2/posts"
         
+        # Resolve all tag/category names up front (cached, no per-post lookups)
+        self.term_resolver = WordPressTermResolver(self.wp_url, headers, self.term_cache_path)
+        try:
+            self.term_resolver.prepare("categories", [post["category"] for post in posts])
+            self.term_resolver.prepare("tags", [tag for post in posts for tag in post.get("tags", [])])
+        except Exception as e:
+            print(f"⚠️ Term resolution failed, continuing with cached IDs only: {e}")
+        
+        # Upload referenced local images once (deduplicated by content hash)
+        self.media_uploader = WordPressMediaUploader(
+            self.wp_url,
+            {"Authorization": headers["Authorization"]},
+            self.base_dir,
+            self.media_cache_path,
+            max_workers=self.media_upload_workers
+        )
+        try:
+            media_stats = self.media_uploader.upload_all(posts)
+            results["media"] = media_stats
+        except Exception as e:
+            print(f"⚠️ Media upload failed, images will keep their original URLs: {e}")
+        
         for post in posts:
             try:
                 # Check if post already exists (by canonical URL or slug)
@@ -305,24 +663,27 @@ class OSMUBuilder:
                 # Prepare WordPress post data
                 wp_post_data = {
                     "title": post["title"],
-                    "content": post["content"],
+                    "content": self.media_uploader.rewrite_content(post["content"]),
                     "excerpt": post["summary"],
                     "status": "publish",
                     "slug": post["slug"],
                     "categories": self._get_wp_category_id(post["category"]),
                     "tags": self._get_wp_tag_ids(post.get("tags", []))
                 }
+                featured = self.media_uploader.media_for(post.get("image", ""))
+                if featured:
+                    wp_post_data["featured_media"] = featured["id"]
                 
                 if existing_post:
                     # Update existing post
                     post_id = existing_post["id"]
                     update_url = f"{wp_api_url}/{post_id}"
-                    response = requests.post(update_url, headers=headers, json=wp_post_data, timeout=30)
+                    response = self._send_post(update_url, headers, wp_post_data, post)
                     
                     if response.status_code in [200, 201]:
                         # Update canonical URL in post metadata
                         canonical_url = response.json().get("link", "")
-                        self._update_post_canonical_url(post["file_path"], canonical_url)
+                        self._queue_canonical_url(post, canonical_url)
                         
                         results["success"] += 1
                         print(f"✅ Updated in WordPress: {post['title']}")
@@ -333,12 +694,12 @@ class OSMUBuilder:
                         print(f"❌ {error_msg}")
                 else:
                     # Create new post
-                    response = requests.post(wp_api_url, headers=headers, json=wp_post_data, timeout=30)
+                    response = self._send_post(wp_api_url, headers, wp_post_data, post)
                     
                     if response.status_code in [200, 201]:
                         # Save canonical URL to Markdown Front Matter
                         canonical_url = response.json().get("link", "")
-                        self._update_post_canonical_url(post["file_path"], canonical_url)
+                        self._queue_canonical_url(post, canonical_url)
                         
                         results["success"] += 1
                         print(f"✅ Created in WordPress: {post['title']}")
@@ -360,41 +721,137 @@ class OSMUBuilder:
                 results["errors"].append(error_msg)
                 print(f"❌ {error_msg}")
         
+        # Write canonical URLs back in one batch, after all network I/O
+        results["canonical_updates"] = self._apply_canonical_urls()
+        
         print(f"\n📊 WordPress Sync Results:")
         print(f"   ✅ Success: {results['success']}")
         print(f"   ❌ Failed: {results['failed']}")
         print(f"   ⏭️ Skipped: {results['skipped']}")
+        if "media" in results:
+            media = results["media"]
+            print(f"   🖼️ Media: {media['uploaded']} uploaded, {media['cached']} cached, {media['failed']} failed")
         
         return results
     
-    def _update_post_canonical_url(self, file_path: str, canonical_url: str) -> None:
-        """Update canonical URL in Markdown Front Matter"""
+    def _send_post(self, url: str, headers: Dict[str, str], wp_post_data: Dict[str, Any],
+                   post: Dict[str, Any]) -> requests.Response:
+        """
+        Create/update a post; if WordPress rejects cached tag/category IDs
+        (terms deleted since they were cached), re-resolve them once and retry
+        """
+        response = requests.post(url, headers=headers, json=wp_post_data, timeout=30)
+        stale = self._stale_taxonomies(response)
+        if not stale or not self.term_resolver:
+            return response
+        names = {"categories": [post["category"]], "tags": post.get("tags", [])}
+        for taxonomy in stale:
+            print(f"   🏷️ Stale {taxonomy} IDs for '{post['title']}', re-fetching")
+            self.term_resolver.forget(taxonomy, names[taxonomy])
+            self.term_resolver.prepare(taxonomy, names[taxonomy])
+        retry_data = dict(wp_post_data,
+                          categories=self._get_wp_category_id(post["category"]),
+                          tags=self._get_wp_tag_ids(post.get("tags", [])))
+        return requests.post(url, headers=headers, json=retry_data, timeout=30)
+    
+    @staticmethod
+    def _stale_taxonomies(response: requests.Response) -> List[str]:
+        """Taxonomies named in a rest_invalid_param rejection"""
+        if response.status_code != 400:
+            return []
         try:
-            post = frontmatter.load(file_path)
-            post.metadata["canonical_url"] = canonical_url
-            
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(frontmatter.dumps(post))
-            
-            print(f"   📝 Updated canonical URL: {canonical_url}")
-        except Exception as e:
-            print(f"   ⚠️ Failed to update canonical URL: {e}")
+            body = response.json()
+        except ValueError:
+            return []
+        if body.get("code") != "rest_invalid_param":
+            return []
+        params = (body.get("data") or {}).get("params") or {}
+        return [taxonomy for taxonomy in WordPressTermResolver.TAXONOMIES if taxonomy in params]
+    
+    def _queue_canonical_url(self, post: Dict[str, Any], canonical_url: str) -> None:
+        """Remember a canonical URL update (skipped if already correct)"""
+        if canonical_url and canonical_url != post.get("canonical_url", ""):
+            self.pending_canonical_urls[post["file_path"]] = canonical_url
+    
+    def _apply_canonical_urls(self) -> int:
+        """
+        Apply all queued canonical URL updates
+        
+        Returns:
+            Number of files rewritten
+        """
+        updated = 0
+        for file_path, canonical_url in self.pending_canonical_urls.items():
+            try:
+                if self._update_post_canonical_url(file_path, canonical_url):
+                    updated += 1
+                    print(f"   📝 Updated canonical URL: {canonical_url}")
+            except Exception as e:
+                print(f"   ⚠️ Failed to update canonical URL in {file_path}: {e}")
+        self.pending_canonical_urls.clear()
+        return updated
+    
+    def _update_post_canonical_url(self, file_path: str, canonical_url: str) -> bool:
+        """
+        Update canonical URL in Markdown Front Matter
+        
+        Only the front-matter block is edited (the body is kept byte for byte)
+        and the file is replaced atomically via temp file + rename, keeping
+        the original file mode.
+        
+        Returns:
+            True if the file was changed
+        """
+        path = Path(file_path)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        
+        match = FRONT_MATTER_PATTERN.match(text)
+        if not match:
+            raise ValueError("no front matter block")
+        
+        front_matter = match.group(2)
+        new_line = f"canonical_url: {json.dumps(canonical_url, ensure_ascii=False)}"
+        line_match = CANONICAL_LINE_PATTERN.search(front_matter)
+        if line_match:
+            current = line_match.group(1).strip().strip('"\'')
+            if current == canonical_url:
+                return False
+            front_matter = (front_matter[:line_match.start()] + new_line
+                            + front_matter[line_match.end():])
+        else:
+            newline = "\r\n" if "\r\n" in match.group(0) else "\n"
+            existing = front_matter.rstrip("\r\n")
+            front_matter = (existing + newline if existing else "") + new_line + newline
+        
+        new_text = match.group(1) + front_matter + match.group(3) + text[match.end():]
+        
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(new_text)
+            # mkstemp creates 0600; keep the post's original permissions
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return True
     
     def _get_wp_category_id(self, category: str) -> List[int]:
-        """Get WordPress category ID (stub - implement based on your WordPress setup)"""
-        # This is a stub - you should implement actual category lookup
-        category_map = {
-            "AI/테크": 1,
-            "경제": 2,
-            "라이프": 3,
-            "글로벌": 4
-        }
-        return [category_map.get(category, 1)]
+        """Get WordPress category ID (falls back to Uncategorized)"""
+        if self.term_resolver:
+            ids = self.term_resolver.resolve("categories", [category])
+            if ids:
+                return ids
+        return [1]
     
     def _get_wp_tag_ids(self, tags: List[str]) -> List[int]:
-        """Get WordPress tag IDs (stub - implement based on your WordPress setup)"""
-        # This is a stub - you should implement actual tag lookup/creation
-        return []
+        """Get WordPress tag IDs from the resolver cache"""
+        if not self.term_resolver:
+            return []
+        return self.term_resolver.resolve("tags", tags)
     
     def _format_time_ago(self, date_str: str) -> str:
         """Format date as relative time (e.g., '2시간 전')"""
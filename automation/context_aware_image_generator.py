@@ -6,33 +6,13 @@
 - Pollinations.ai로 고품질 이미지 생성
 """
 
-import os
-import json
 import re
 import requests
-import google.generativeai as genai
 from pathlib import Path
 from typing import Dict, List, Tuple
 import time
 
-
-def load_api_keys() -> List[str]:
-    """GEMINI_API_KEYS 환경변수에서 API 키 로드"""
-    keys_json = os.getenv('GEMINI_API_KEYS', '')
-    
-    if keys_json:
-        try:
-            keys = json.loads(keys_json)
-            if isinstance(keys, list):
-                return keys
-        except:
-            pass
-    
-    single_key = os.getenv('GEMINI_API_KEY', '')
-    if single_key:
-        return [single_key]
-    
-    return []
+from llm_client import LLMClient, create_client
 
 
 def extract_sections_with_markers(content: str) -> List[Tuple[str, str]]:
@@ -76,21 +56,18 @@ def extract_sections_with_markers(content: str) -> List[Tuple[str, str]]:
     return sections
 
 
-def generate_image_prompt_from_context(context: str, api_key: str) -> str:
+def generate_image_prompt_from_context(context: str, client: LLMClient) -> str:
     """
     섹션 내용을 분석하여 최적화된 이미지 프롬프트 생성
     
     Args:
         context: 섹션 내용 (한글)
-        api_key: Gemini API 키
+        client: 공유 LLM 클라이언트 (요청마다 키를 순환)
     
     Returns:
         최적화된 영어 이미지 프롬프트
     """
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash-exp")
-        
         prompt = f"""
 다음 블로그 섹션 내용을 분석하여 최적의 이미지 생성 프롬프트를 만들어주세요.
 
@@ -109,8 +86,8 @@ def generate_image_prompt_from_context(context: str, api_key: str) -> str:
 예시: "person analyzing personal data on AI dashboard, modern workspace with multiple screens, professional photography, detailed"
 """
         
-        response = model.generate_content(prompt)
-        enhanced_prompt = response.text.strip().strip('"').strip("'")
+        response_text = client.generate(prompt, label="image_prompt")
+        enhanced_prompt = response_text.strip().strip('"').strip("'")
         
         # 품질 향상 suffix 추가
         enhanced_prompt += ", professional photography, high quality, detailed, vibrant colors, 16:9 aspect ratio"
@@ -171,8 +148,8 @@ def process_content_with_context_aware_images(content: str) -> str:
     print("   🔍 컨텍스트 기반 이미지 생성 시작...")
     
     # API 키 로드
-    api_keys = load_api_keys()
-    if not api_keys:
+    client = create_client()
+    if not client.api_keys:
         print("   ⚠️ GEMINI_API_KEY 없음 - 기본 프롬프트 사용")
     
     # 섹션과 마커 추출
@@ -189,17 +166,13 @@ def process_content_with_context_aware_images(content: str) -> str:
     output_dir.mkdir(exist_ok=True)
     
     # 각 섹션 처리
-    current_key_index = 0
-    
     for i, (section_text, marker) in enumerate(sections, 1):
         print(f"\n   [{i}/{len(sections)}] {marker}")
         print(f"      📝 섹션: {section_text[:50]}...")
         
         # 1. Gemini로 프롬프트 생성
-        if api_keys:
-            api_key = api_keys[current_key_index % len(api_keys)]
-            image_prompt = generate_image_prompt_from_context(section_text, api_key)
-            current_key_index = (current_key_index + 1) % len(api_keys)
+        if client.api_keys:
+            image_prompt = generate_image_prompt_from_context(section_text, client)
         else:
             image_prompt = f"{section_text[:100]}, professional illustration, high quality"
         
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+생성 이미지 캐시 (내용 주소 방식)
+- 키: 백엔드 + 제공자 + 모델 + 전체 프롬프트 + 크기 + 시드 해시 (같은 요청이면 재실행/재시도 시 다운로드 생략)
+  · fake 백엔드 이미지는 키가 달라 실제 실행에서 재사용되지 않음
+- 이미지 파일은 image_cache/<키>.png, 키 → 파일/요청 정보/적중 수는 image_cache/manifest.json
+- 전체 크기가 max_mb를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 시드가 매번 무작위면 같은 키가 나오지 않으므로 image_generation.deterministic_seed로 프롬프트에서 시드 생성
+- 설정: config_ai.json의 "image_cache" (enabled, max_mb), 환경변수 IMAGE_CACHE=off로 끄기
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "image_cache"
+DEFAULT_MAX_MB = 200
+MANIFEST_NAME = "manifest.json"
+
+
+def prompt_seed(prompt: str) -> int:
+    """프롬프트에서 정한 고정 시드 (1~99999999, 같은 프롬프트면 항상 같은 이미지)"""
+    return int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16) % 99999999 + 1
+
+
+class ImageCache:
+    """요청 정보 → 이미지 파일 캐시 (스레드 안전)"""
+
+    def __init__(self, path: str = None, max_mb: float = DEFAULT_MAX_MB):
+        self.path = Path(path) if path else DEFAULT_CACHE_DIR
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.manifest_path = self.path / MANIFEST_NAME
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> Optional["ImageCache"]:
+        """config_ai.json의 "image_cache" 설정으로 생성 (꺼져 있으면 None)"""
+        settings = (config or {}).get("image_cache", {})
+        if os.getenv('IMAGE_CACHE', '').strip().lower() in ('0', 'off', 'false', 'no'):
+            return None
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("path"), max_mb=settings.get("max_mb", DEFAULT_MAX_MB))
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str, width: int, height: int, seed: int,
+                 backend: str = "live") -> str:
+        """캐시 키 (백엔드, 제공자, 모델, 전체 프롬프트, 크기, 시드 해시)"""
+        payload = json.dumps({
+            "backend": backend,
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "width": width,
+            "height": height,
+            "seed": seed
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        """manifest 저장 (임시 파일 → rename, 호출자가 _lock 보유)"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"entries": self._manifest}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: str) -> Optional[Path]:
+        """캐시된 이미지 파일 경로 (없거나 파일이 사라졌으면 None)"""
+        with self._lock:
+            entry = self._manifest.get(key)
+            if entry is None:
+                return None
+            file_path = self.path / entry["file"]
+            if not file_path.exists() or file_path.stat().st_size == 0:
+                del self._manifest[key]
+                self._save_manifest()
+                return None
+            entry["last_used"] = time.time()
+            entry["hits"] = entry.get("hits", 0) + 1
+            self._save_manifest()
+            return file_path
+
+    def put(self, key: str, content: bytes, metadata: Dict) -> Path:
+        """이미지 저장 후 manifest 기록, 크기 제한 초과분 정리"""
+        file_path = self.path / f"{key}.png"
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+        now = time.time()
+        with self._lock:
+            self._manifest[key] = dict(metadata, file=file_path.name, size=len(content),
+                                       created_at=now, last_used=now, hits=0)
+            self._evict()
+            self._save_manifest()
+        return file_path
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._manifest.values())
+        for key, entry in sorted(self._manifest.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            (self.path / entry["file"]).unlink(missing_ok=True)
+            del self._manifest[key]
+            total -= entry["size"]
+
+    def stats(self) -> Dict[str, float]:
+        """저장 항목 수, 크기, 누적 적중 수"""
+        with self._lock:
+            return {
+                "entries": len(self._manifest),
+                "bytes": sum(entry["size"] for entry in self._manifest.values()),
+                "hits": sum(entry.get("hits", 0) for entry in self._manifest.values())
+            }
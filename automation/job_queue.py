@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+파이프라인 작업 큐 (SQLite)
+- run_pipeline.py --enqueue로 작업 추가, --worker가 꺼내서 처리
+- 작업 = 자동 주제 또는 수동 주제/본문 (워크플로의 MANUAL_TOPIC / MANUAL_CONTENT와 동일)
+- 실패 시 max_attempts까지 지연 후 재시도
+- 실행 중인 작업은 워커가 주기적으로 heartbeat_at 갱신 (임대)
+  · 임대가 만료된 running 작업만 비정상 종료로 보고 복구 (살아 있는 다른 워커의 작업은 건드리지 않음)
+  · 중단된 실행도 시도 1회로 집계, max_attempts에 도달했으면 최종 실패 처리
+- 여러 스레드/프로세스에서 동시에 사용 가능 (호출마다 별도 연결, 작업 획득은 BEGIN IMMEDIATE)
+"""
+
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_QUEUE_PATH = Path(__file__).parent / "pipeline_queue.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    manual_topic TEXT NOT NULL DEFAULT '',
+    manual_content TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    file_path TEXT,
+    error TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, available_at);
+"""
+
+STATUSES = ("queued", "running", "done", "failed")
+
+# heartbeat가 이 시간(초) 넘게 없으면 워커가 비정상 종료된 것으로 판단
+DEFAULT_LEASE_SECONDS = 300
+
+
+class JobQueue:
+    """SQLite 기반 작업 큐"""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path) if path else DEFAULT_QUEUE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # heartbeat_at 도입 전에 만든 큐 파일
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+
+    @contextmanager
+    def _connect(self):
+        """트랜잭션 단위 연결 (정상 종료 시 commit, 예외 시 rollback 후 닫기)"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, manual_topic: str = "", manual_content: str = "", max_attempts: int = 3) -> int:
+        """작업 추가 후 ID 반환"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (manual_topic, manual_content, max_attempts, enqueued_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (manual_topic.strip(), manual_content.strip(), max(1, max_attempts), now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self) -> Optional[Dict]:
+        """실행 가능한 가장 오래된 작업을 running으로 바꾸고 반환 (없으면 None)"""
+        now = time.time()
+        with self._connect() as conn:
+            # 다른 워커와 같은 작업을 가져가지 않도록 쓰기 잠금부터 확보
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                "ORDER BY available_at, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?), heartbeat_at = ? WHERE id = ?",
+                (now, now, row["id"])
+            )
+        job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def heartbeat(self, job_ids: List[int]):
+        """실행 중인 작업의 임대 연장 (워커가 lease_seconds보다 짧은 간격으로 호출)"""
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                [(time.time(), job_id) for job_id in job_ids]
+            )
+
+    def complete(self, job_id: int, file_path: str):
+        """작업 성공 기록"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, file_path = ?, error = NULL WHERE id = ?",
+                (time.time(), file_path, job_id)
+            )
+
+    def fail(self, job_id: int, error: str, retry_delay: float = 0) -> bool:
+        """
+        작업 실패 기록
+
+        Returns:
+            True면 재시도 대기열로 돌아감, False면 최종 실패
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            retry = row is not None and row["attempts"] < row["max_attempts"]
+            if retry:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', available_at = ?, error = ? WHERE id = ?",
+                    (now + retry_delay, error, job_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                    (now, error, job_id)
+                )
+            return retry
+
+    def requeue_running(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Dict[str, int]:
+        """
+        임대가 만료된 running 작업 복구 (비정상 종료된 워커가 남긴 작업)
+        중단된 실행은 claim()에서 이미 시도로 집계됨 → 남은 시도가 있으면 대기열로, 없으면 최종 실패
+
+        Returns:
+            {"requeued": 대기열로 돌린 수, "failed": 최종 실패 처리한 수}
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = "status = 'running' AND COALESCE(heartbeat_at, started_at, 0) < ?"
+            failed = conn.execute(
+                f"UPDATE jobs SET status = 'failed', finished_at = ?, error = ? "
+                f"WHERE {expired} AND attempts >= max_attempts",
+                (now, "워커 비정상 종료 (임대 만료)", now - lease_seconds)
+            ).rowcount
+            requeued = conn.execute(
+                f"UPDATE jobs SET status = 'queued', available_at = ? WHERE {expired}",
+                (now, now - lease_seconds)
+            ).rowcount
+        return {"requeued": requeued, "failed": failed}
+
+    def counts(self) -> Dict[str, int]:
+        """상태별 작업 수"""
+        counts = {status: 0 for status in STATUSES}
+        with self._connect() as conn:
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+                counts[row["status"]] = row["n"]
+        return counts
+
+    def latencies(self, limit: int = 100) -> List[Dict[str, float]]:
+        """최근 완료 작업의 대기 시간(추가→시작)과 전체 소요 시간(추가→완료)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT enqueued_at, started_at, finished_at FROM jobs "
+                "WHERE status = 'done' ORDER BY finished_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {
+                "wait": row["started_at"] - row["enqueued_at"],
+                "total": row["finished_at"] - row["enqueued_at"]
+            }
+            for row in rows
+        ]
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+할당량 기반 API 키 스케줄러
+- 키별 RPM(분당 요청), TPM(분당 토큰) 토큰 버킷과 일일 요청 수(RPD)를 로컬에서 추적
+- 요청 전에 여유가 가장 큰 키를 선택 (429를 받고 나서 전환하는 대신 미리 회피)
+- 모든 키가 한도에 걸리면 가장 빨리 풀리는 시점까지 대기, 일일 한도 소진 시 복구 예상 시각과 함께 실패
+- 429를 받은 키는 분 단위 창이 끝날 때까지(일일 한도 오류면 다음 날까지) 쉬게 함
+- 상태는 key_quota_state.json에 저장되어 실행 간 유지 (키 원문 대신 해시로 구분)
+- 설정: config_ai.json의 "key_quota" (rpm, tpm, rpd, 0이면 제한 없음)
+  · 모델마다 한도가 따로 집계되므로 기본 모델 외의 모델은 별도 상태로 추적
+    ("models"에 모델별 한도 지정, 없으면 같은 수치 사용)
+- fake 백엔드(PIPELINE_BACKEND=fake)는 한도/상태 파일 없이 실행 (대기 없음, 실제 상태 오염 방지)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+
+DEFAULT_STATE_PATH = Path(__file__).parent / "key_quota_state.json"
+
+# Gemini 2.5 Flash 무료 등급 기준
+DEFAULT_QUOTA = {"rpm": 10, "tpm": 250000, "rpd": 250}
+
+# 한도 정보 없이 429를 받은 키를 쉬게 하는 시간 (초)
+PARK_SECONDS = 60.0
+
+# 응답 토큰 추정치 (실제 사용량은 응답 후 반영)
+ESTIMATED_OUTPUT_TOKENS = 1000
+
+try:
+    from zoneinfo import ZoneInfo
+    # Gemini 일일 한도는 태평양 시간 자정에 초기화
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = timezone.utc
+
+# 같은 상태 파일을 여러 스케줄러(모델별)가 갱신하므로 읽기-병합-쓰기를 직렬화
+_state_file_lock = threading.Lock()
+
+
+class QuotaExhausted(Exception):
+    """모든 키가 한도에 걸려 max_wait 안에 요청할 수 없음"""
+
+    def __init__(self, resume_at: float):
+        self.resume_at = resume_at
+        resume_text = datetime.fromtimestamp(resume_at).strftime('%Y-%m-%d %H:%M')
+        super().__init__(f"모든 API 키의 할당량이 소진되었습니다 (quota, 예상 복구: {resume_text})")
+
+
+def key_fingerprint(api_key: str) -> str:
+    """상태 파일에 저장할 키 식별자 (키 원문은 저장하지 않음)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+def estimate_tokens(prompt) -> int:
+    """요청 토큰 추정 (문자 4개 ≈ 1토큰 + 응답 추정치)"""
+    return len(str(prompt)) // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+def _quota_day(now: float) -> str:
+    return datetime.fromtimestamp(now, QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+
+def _next_day_start(now: float) -> float:
+    local = datetime.fromtimestamp(now, QUOTA_TIMEZONE)
+    tomorrow = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return tomorrow.timestamp()
+
+
+class KeyScheduler:
+    """키별 토큰 버킷 스케줄러 (스레드 안전)"""
+
+    def __init__(self, api_keys: List[str], quota: Dict = None, state_path: str = None,
+                 max_wait: float = 300.0, scope: str = None):
+        """
+        Args:
+            scope: 한도 집계 단위 (모델 이름, None이면 기본 모델 — 상태 파일에서 키 식별자에 붙여 구분)
+        """
+        self.quota = dict(DEFAULT_QUOTA if quota is None else quota)
+        self.rpm = self.quota.get("rpm", 0) or 0
+        self.tpm = self.quota.get("tpm", 0) or 0
+        self.rpd = self.quota.get("rpd", 0) or 0
+        self.max_wait = max_wait
+        self.state_path = Path(state_path) if state_path else None
+        self.scope = scope
+        self._fingerprints = [key_fingerprint(f"{scope}:{key}" if scope else key) for key in api_keys]
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+
+    @classmethod
+    def from_config(cls, api_keys: List[str], config: Dict = None, model_name: str = None) -> "KeyScheduler":
+        """
+        config_ai.json의 "key_quota" 설정으로 생성 (상태 파일에 실행 간 유지)
+        model_name 지정 시 그 모델 전용 한도 ("models"에 있으면 덮어씀)
+        fake 백엔드는 실제 API를 쓰지 않으므로 한도 없이 메모리에서만 추적
+        """
+        import backends
+        if backends.is_fake():
+            return cls(api_keys, quota={}, state_path=None, scope=model_name)
+        settings = dict(DEFAULT_QUOTA)
+        settings.update((config or {}).get("key_quota", {}))
+        model_quotas = settings.pop("models", {})
+        if model_name:
+            settings.update(model_quotas.get(model_name, {}))
+        state_path = settings.pop("state_path", None) or DEFAULT_STATE_PATH
+        return cls(api_keys, settings, state_path, scope=model_name)
+
+    # ------------------------------------------------------------------
+    # 상태 저장/복원
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Dict]:
+        saved = {}
+        if self.state_path and self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f).get("keys", {})
+            except (OSError, ValueError):
+                saved = {}
+        now = time.time()
+        state = {}
+        for fingerprint in self._fingerprints:
+            entry = saved.get(fingerprint, {})
+            state[fingerprint] = {
+                "rpm_level": entry.get("rpm_level", self.rpm),
+                "tpm_level": entry.get("tpm_level", self.tpm),
+                "updated": entry.get("updated", now),
+                "day": entry.get("day", _quota_day(now)),
+                "day_requests": entry.get("day_requests", 0),
+                "parked_until": entry.get("parked_until", 0.0),
+                "last_used": entry.get("last_used", 0.0)
+            }
+        return state
+
+    def _save_state(self):
+        """상태 파일 갱신 (다른 키 목록으로 실행된 기록도 보존, 임시 파일 → rename)"""
+        if not self.state_path:
+            return
+        with _state_file_lock:
+            saved = {}
+            if self.state_path.exists():
+                try:
+                    with open(self.state_path, 'r', encoding='utf-8') as f:
+                        saved = json.load(f).get("keys", {})
+                except (OSError, ValueError):
+                    saved = {}
+            saved.update(self._state)
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({"quota": self.quota, "keys": saved}, f, indent=2)
+                os.replace(tmp_path, self.state_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    # ------------------------------------------------------------------
+    # 버킷 계산
+    # ------------------------------------------------------------------
+
+    def _refill(self, entry: Dict, now: float):
+        elapsed = max(0.0, now - entry["updated"])
+        if self.rpm:
+            entry["rpm_level"] = min(self.rpm, entry["rpm_level"] + elapsed * self.rpm / 60)
+        if self.tpm:
+            entry["tpm_level"] = min(self.tpm, entry["tpm_level"] + elapsed * self.tpm / 60)
+        entry["updated"] = now
+        day = _quota_day(now)
+        if entry["day"] != day:
+            entry["day"] = day
+            entry["day_requests"] = 0
+
+    def _wait_seconds(self, entry: Dict, tokens: int, now: float) -> float:
+        """이 키로 요청 가능해질 때까지 남은 시간 (일일 한도 소진이면 다음 날까지)"""
+        if self.rpd and entry["day_requests"] >= self.rpd:
+            return max(_next_day_start(now), entry["parked_until"]) - now
+        wait = max(0.0, entry["parked_until"] - now)
+        if self.rpm and entry["rpm_level"] < 1:
+            wait = max(wait, (1 - entry["rpm_level"]) * 60 / self.rpm)
+        if self.tpm:
+            needed = min(tokens, self.tpm)
+            if entry["tpm_level"] < needed:
+                wait = max(wait, (needed - entry["tpm_level"]) * 60 / self.tpm)
+        return wait
+
+    def _headroom(self, entry: Dict) -> float:
+        """남은 여유 비율 (가장 빠듯한 한도 기준)"""
+        ratios = [1.0]
+        if self.rpm:
+            ratios.append(entry["rpm_level"] / self.rpm)
+        if self.tpm:
+            ratios.append(entry["tpm_level"] / self.tpm)
+        if self.rpd:
+            ratios.append(1 - entry["day_requests"] / self.rpd)
+        return min(ratios)
+
+    def _reserve(self, tokens: int, indexes: List[int]):
+        """
+        indexes 중 여유가 가장 큰 키에 요청 1건/토큰 예약
+
+        Returns:
+            (키 인덱스, 0) 또는 모두 한도에 걸렸으면 (None, 가장 빨리 풀리기까지 남은 초)
+        """
+        with self._lock:
+            now = time.time()
+            waits = {}
+            for index in indexes:
+                entry = self._state[self._fingerprints[index]]
+                self._refill(entry, now)
+                waits[index] = self._wait_seconds(entry, tokens, now)
+
+            ready = [index for index, wait in waits.items() if wait <= 0]
+            if not ready:
+                return None, min(waits.values())
+            # 여유가 가장 큰 키, 같으면 가장 오래 쉰 키 (부하 분산)
+            index = max(ready, key=lambda i: (self._headroom(self._state[self._fingerprints[i]]),
+                                              -self._state[self._fingerprints[i]]["last_used"]))
+            entry = self._state[self._fingerprints[index]]
+            entry["last_used"] = now
+            if self.rpm:
+                entry["rpm_level"] -= 1
+            if self.tpm:
+                entry["tpm_level"] -= min(tokens, self.tpm)
+            entry["day_requests"] += 1
+            self._save_state()
+            return index, 0.0
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    def acquire(self, tokens: int, exclude: set = None) -> int:
+        """
+        여유가 가장 큰 키를 선택하고 요청 1건/토큰을 예약 (여유가 없으면 대기)
+
+        Args:
+            tokens: 예상 토큰 수 (estimate_tokens)
+            exclude: 이번 요청에서 이미 실패한 키 (다른 키가 없으면 무시)
+
+        Returns:
+            키 인덱스
+        """
+        deadline = time.time() + self.max_wait
+        announced = False
+        while True:
+            indexes = [i for i in range(len(self._fingerprints)) if i not in (exclude or set())]
+            index, wait = self._reserve(tokens, indexes or list(range(len(self._fingerprints))))
+            if index is not None:
+                return index
+            resume_at = time.time() + wait
+            if resume_at > deadline:
+                raise QuotaExhausted(resume_at)
+            if not announced:
+                print(f"   ⏳ API 키 여유 없음: 약 {wait:.1f}초 후 재개 예상")
+                announced = True
+            time.sleep(min(wait, 5.0))
+
+    def try_acquire(self, tokens: int, exclude: set = None):
+        """
+        exclude 밖에서 지금 바로 요청 가능한 키가 있으면 예약 후 인덱스, 없으면 기다리지 않고 None
+        (헤지 요청처럼 여유가 있을 때만 보내는 추가 요청용)
+        """
+        indexes = [i for i in range(len(self._fingerprints)) if i not in (exclude or set())]
+        if not indexes:
+            return None
+        return self._reserve(tokens, indexes)[0]
+
+    def record(self, key_index: int, reserved_tokens: int, actual_tokens: int):
+        """실제 사용 토큰 반영 (예약과의 차이만큼 버킷 보정)"""
+        if not self.tpm or not actual_tokens:
+            return
+        with self._lock:
+            entry = self._state[self._fingerprints[key_index]]
+            entry["tpm_level"] = min(self.tpm, entry["tpm_level"] + min(reserved_tokens, self.tpm) - actual_tokens)
+            self._save_state()
+
+    def park(self, key_index: int, error: BaseException = None):
+        """429를 받은 키를 쉬게 함 (일일 한도 오류면 다음 날까지, 아니면 분 단위 창 종료까지)"""
+        message = str(error or "").lower()
+        now = time.time()
+        with self._lock:
+            entry = self._state[self._fingerprints[key_index]]
+            if 'per day' in message or 'perday' in message or 'daily' in message:
+                entry["parked_until"] = _next_day_start(now)
+                if self.rpd:
+                    entry["day_requests"] = max(entry["day_requests"], self.rpd)
+            else:
+                entry["parked_until"] = now + PARK_SECONDS
+                if self.rpm:
+                    entry["rpm_level"] = min(entry["rpm_level"], 0.0)
+            self._save_state()
+
+    def next_available(self, tokens: int = ESTIMATED_OUTPUT_TOKENS) -> float:
+        """요청 가능해질 때까지 예상 대기 시간 (초, 0이면 즉시)"""
+        with self._lock:
+            now = time.time()
+            waits = []
+            for fingerprint in self._fingerprints:
+                entry = self._state[fingerprint]
+                self._refill(entry, now)
+                waits.append(self._wait_seconds(entry, tokens, now))
+        return min(waits) if waits else 0.0
+
+    def status(self) -> List[Dict]:
+        """키별 현재 상태 (리포트용)"""
+        with self._lock:
+            now = time.time()
+            rows = []
+            for index, fingerprint in enumerate(self._fingerprints):
+                entry = self._state[fingerprint]
+                self._refill(entry, now)
+                rows.append({
+                    "key": index + 1,
+                    "fingerprint": fingerprint,
+                    "day_requests": entry["day_requests"],
+                    "rpm_available": int(entry["rpm_level"]) if self.rpm else None,
+                    "tpm_available": int(entry["tpm_level"]) if self.tpm else None,
+                    "wait_seconds": self._wait_seconds(entry, ESTIMATED_OUTPUT_TOKENS, now)
+                })
+            return rows
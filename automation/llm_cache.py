@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Gemini 응답 디스크 캐시 (SQLite)
+- 키: 백엔드 + 모델 + 프롬프트 + generation_config 해시 (같은 요청이면 재실행 시 API 호출 생략)
+  (가짜 백엔드 응답이 실제 실행에 쓰이지 않도록 백엔드 이름 포함)
+- TTL이 지난 항목은 사용하지 않고 삭제
+- 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- 설정: config_ai.json의 "llm_cache" (enabled, ttl_hours, max_mb), 환경변수 LLM_CACHE=off로 끄기
+- 주제 발굴처럼 매번 새 결과가 필요한 호출은 LLMClient.generate(..., cache=False)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / "llm_cache.db"
+DEFAULT_TTL_HOURS = 168
+DEFAULT_MAX_MB = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+
+class LLMCache:
+    """프롬프트 → 응답 텍스트 캐시"""
+
+    def __init__(self, path: str = None, ttl_hours: float = DEFAULT_TTL_HOURS, max_mb: float = DEFAULT_MAX_MB):
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> Optional["LLMCache"]:
+        """config_ai.json의 "llm_cache" 설정으로 생성 (꺼져 있으면 None)"""
+        settings = (config or {}).get("llm_cache", {})
+        if os.getenv('LLM_CACHE', '').strip().lower() in ('0', 'off', 'false', 'no'):
+            return None
+        if not settings.get("enabled", True):
+            return None
+        return cls(settings.get("path"),
+                   ttl_hours=settings.get("ttl_hours", DEFAULT_TTL_HOURS),
+                   max_mb=settings.get("max_mb", DEFAULT_MAX_MB))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config: Dict = None, backend: str = "live") -> str:
+        """캐시 키 (백엔드, 모델, 프롬프트, generation_config 해시)"""
+        payload = json.dumps({
+            "backend": backend,
+            "model": model_name,
+            "prompt": prompt,
+            "generation_config": generation_config or {}
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """유효한 캐시 응답 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row["created_at"] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            return row["response"]
+
+    def put(self, key: str, model_name: str, response: str):
+        """응답 저장 후 크기 제한 초과분 정리"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model_name, response, size, now, now)
+            )
+            self._evict(conn, now)
+
+    def delete(self, key: str):
+        """항목 삭제 (응답이 잘못된 것으로 확인된 경우)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for row in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((row["key"],))
+            total -= row["size"]
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def stats(self) -> Dict[str, float]:
+        """저장 항목 수, 크기, 누적 적중 수"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes, COALESCE(SUM(hits), 0) AS hits "
+                "FROM responses"
+            ).fetchone()
+        return dict(row)
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+공유 LLM 클라이언트 (Gemini)
+- API 키마다 미리 만든 모델 인스턴스를 보관 (키 전환 시 genai.configure 전역 상태를 바꾸지 않음)
+- 스레드 안전: 여러 Agent/스레드가 키를 나눠 동시에 요청
+- 요청 전에 키 스케줄러(key_scheduler.py)가 RPM/TPM/일일 한도 여유가 큰 키를 선택
+- 그래도 할당량 초과(429)를 받으면 해당 키를 쉬게 하고 다른 키로 재시도
+- generate(): 동기 호출, generate_async(): asyncio용 코루틴
+- cache 지정 시 같은 모델/프롬프트/설정의 응답은 디스크 캐시에서 반환 (llm_cache.py)
+- cached_prefix: 매번 같은 긴 지시문은 Gemini 컨텍스트 캐시에 한 번 올리고 짧은 가변 부분만 전송
+  (설정: config_ai.json의 "context_cache", 캐시를 만들 수 없으면 접두어를 프롬프트 앞에 붙여 전송 —
+   고정 부분이 앞에 오므로 Gemini 2.5의 암시적 캐시 적중 대상)
+  · 같은 접두어를 이 프로세스에서 min_uses번째 요청할 때부터 생성 (배치/워커처럼 여러 번 재사용할 때만)
+    예약 실행처럼 1편만 쓰는 프로세스는 생성 왕복과 저장 비용만 늘어나므로 암시적 캐시에 맡김
+- 요청마다 용도·모델별 응답 시간 p95로 정한 제한 시간 적용 (adaptive_timeout.py), 초과 시 다른 키로 재시도
+  헤지 설정 시 p95가 지나도록 응답이 없으면 다른 키로 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+- model_name 없이 label만 주면 모델 라우터(model_router.py)가 작업별 모델을 고르고,
+  할당량 소진 시 대체 모델로 재요청 (키 한도는 모델별로 따로 추적)
+
+사용 예:
+    client = LLMClient()
+    text = client.generate(prompt)
+    texts = await asyncio.gather(*(client.generate_async(p) for p in prompts))
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import backends
+import pipeline_metrics
+from adaptive_timeout import AdaptiveTimeouts
+from key_scheduler import KeyScheduler, QuotaExhausted, estimate_tokens
+from llm_cache import LLMCache
+from model_router import ModelRouter
+from service_limits import service_slot
+
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+DEFAULT_CONTEXT_TTL_MINUTES = 60
+DEFAULT_CONTEXT_MIN_USES = 3
+
+
+def load_api_keys(config: Dict = None) -> List[str]:
+    """
+    API 키 로드: GEMINI_API_KEYS(JSON 배열) → GEMINI_API_KEY → config의 gemini_api_key
+    (가짜 백엔드는 키가 없어도 기본 키 사용)
+    """
+    keys_json = os.getenv('GEMINI_API_KEYS', '')
+    if keys_json:
+        try:
+            keys = json.loads(keys_json)
+            if isinstance(keys, list) and keys:
+                return keys
+        except ValueError:
+            pass
+
+    single_key = os.getenv('GEMINI_API_KEY', (config or {}).get('gemini_api_key', ''))
+    if single_key:
+        return [single_key]
+
+    return backends.default_api_keys()
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """할당량 초과(429) 오류 여부"""
+    message = str(error).lower()
+    return 'quota' in message or '429' in message or 'exhausted' in message
+
+
+def is_exhausted(error: BaseException) -> bool:
+    """모델의 모든 키가 할당량에 걸려 요청 실패 (대체 모델로 넘어갈 대상)"""
+    if isinstance(error, QuotaExhausted):
+        return True
+    return is_quota_error(error) or (error.__cause__ is not None and is_quota_error(error.__cause__))
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    """응답 시간 초과 오류 여부 (request_options timeout, 504 Deadline Exceeded 등)"""
+    if isinstance(error, TimeoutError):
+        return True
+    message = str(error).lower()
+    return 'timed out' in message or 'deadline' in message or '504' in message
+
+
+class LLMClient:
+    """키별 모델 풀을 가진 스레드 안전 Gemini 클라이언트"""
+
+    def __init__(self, api_keys: List[str] = None, default_model: str = DEFAULT_MODEL,
+                 cache: LLMCache = None, scheduler: KeyScheduler = None, context_ttl: float = None,
+                 router: ModelRouter = None, scheduler_factory: Callable[[str], KeyScheduler] = None,
+                 timeouts: AdaptiveTimeouts = None, context_min_uses: int = DEFAULT_CONTEXT_MIN_USES):
+        """
+        Args:
+            cache: 응답 캐시 (없으면 캐시 사용 안 함)
+            scheduler: 기본 모델의 키 스케줄러 (없으면 한도 없이 429 시에만 키를 쉬게 하는 메모리 스케줄러)
+            context_ttl: 컨텍스트 캐시 유지 시간 (초, None이면 cached_prefix를 프롬프트에 붙여 전송)
+            router: 용도(label)별 모델 라우터 (없으면 항상 default_model)
+            scheduler_factory: 기본 모델 외의 모델용 키 스케줄러 생성 (없으면 한도 없는 메모리 스케줄러)
+            timeouts: 적응형 타임아웃/헤지 기준 (없으면 제한 시간 없이 SDK 기본값)
+            context_min_uses: 같은 접두어가 이 횟수만큼 요청된 뒤부터 컨텍스트 캐시 생성
+        """
+        self.api_keys = list(api_keys) if api_keys else load_api_keys()
+        self.default_model = default_model
+        self.cache = cache
+        self.scheduler = scheduler or KeyScheduler(self.api_keys, quota={})
+        self.context_ttl = context_ttl
+        self.context_min_uses = context_min_uses
+        self.router = router
+        self.scheduler_factory = scheduler_factory
+        self._schedulers = {}
+        self.timeouts = timeouts
+        self._hedge_executor = None
+
+        self._models = {}
+        self._lock = threading.Lock()
+        # (키, 모델, 접두어 해시) → (캐시 연결 모델 또는 None, 만료 시각)
+        self._contexts = {}
+        # (모델, 접두어 해시) → 이 프로세스에서 요청된 횟수
+        self._prefix_uses = {}
+        self._context_lock = threading.Lock()
+
+    def model(self, key_index: int, model_name: str = None):
+        """키/모델별 인스턴스 (처음 요청 시 생성 후 재사용)"""
+        model_name = model_name or self.default_model
+        with self._lock:
+            model = self._models.get((key_index, model_name))
+            if model is None:
+                model = backends.create_model(model_name, self.api_keys[key_index])
+                self._models[(key_index, model_name)] = model
+            return model
+
+    def scheduler_for(self, model_name: str = None) -> KeyScheduler:
+        """모델별 키 스케줄러 (Gemini 한도는 모델마다 따로 집계)"""
+        model_name = model_name or self.default_model
+        if model_name == self.default_model:
+            return self.scheduler
+        with self._lock:
+            scheduler = self._schedulers.get(model_name)
+            if scheduler is None:
+                if self.scheduler_factory is not None:
+                    scheduler = self.scheduler_factory(model_name)
+                else:
+                    scheduler = KeyScheduler(self.api_keys, quota={}, scope=model_name)
+                self._schedulers[model_name] = scheduler
+            return scheduler
+
+    def models_for(self, label: str = None, model_name: str = None) -> List[str]:
+        """요청할 모델 순서 (직접 지정 > 라우터 > default_model)"""
+        if model_name:
+            return [model_name]
+        if self.router is not None and label:
+            models = self.router.candidates(label)
+            if models:
+                return models
+        return [self.default_model]
+
+    def context_model(self, key_index: int, model_name: str, prefix: str):
+        """
+        prefix를 컨텍스트 캐시에 올린 키/모델별 인스턴스 (만료 전까지 재사용)
+        캐시를 만들 수 없으면 None (유지 시간 동안 다시 시도하지 않음)
+        - 요청 횟수가 context_min_uses에 못 미치면 None (전체 프롬프트로 전송)
+        - 생성(API 호출)은 잠금 밖에서, 같은 캐시를 동시에 요청한 스레드는 생성 결과를 기다림
+        """
+        context_id = self._context_id(key_index, model_name, prefix)
+        with self._context_lock:
+            uses = self._prefix_uses.get(context_id[1:], 0) + 1
+            self._prefix_uses[context_id[1:]] = uses
+            entry = self._contexts.get(context_id)
+            creating = entry is None or entry[1] <= time.time()
+            if creating and uses < self.context_min_uses:
+                return None
+            if creating:
+                # 생성 중에는 만료되지 않는 자리표시 (다른 스레드는 이 Future를 기다림)
+                pending = Future()
+                self._contexts[context_id] = (pending, float('inf'))
+            else:
+                pending = entry[0]
+        if not creating:
+            return pending.result()
+
+        try:
+            model = backends.create_cached_model(model_name, self.api_keys[key_index], prefix, self.context_ttl)
+            pipeline_metrics.increment("context_cache_creates")
+            # 서버 쪽 만료 직전 요청을 피하도록 1분 일찍 갱신
+            expires_at = time.time() + max(0.0, self.context_ttl - 60)
+        except Exception as e:
+            print(f"   ℹ️ 컨텍스트 캐시 사용 불가, 전체 프롬프트로 요청: {str(e)[:80]}")
+            model, expires_at = None, time.time() + self.context_ttl
+        with self._context_lock:
+            # 생성 중에 forget_context로 지워졌으면 다시 등록하지 않음
+            if self._contexts.get(context_id, (None,))[0] is pending:
+                self._contexts[context_id] = (pending, expires_at)
+        pending.set_result(model)
+        return model
+
+    def forget_context(self, key_index: int, model_name: str, prefix: str):
+        """컨텍스트 캐시 연결 해제 (서버에서 만료/삭제된 경우 다음 요청 때 다시 생성)"""
+        with self._context_lock:
+            self._contexts.pop(self._context_id(key_index, model_name, prefix), None)
+
+    def _context_id(self, key_index: int, model_name: str, prefix: str) -> tuple:
+        return (key_index, model_name or self.default_model, hashlib.sha256(prefix.encode('utf-8')).hexdigest())
+
+    def _cache_key(self, prompt, generation_config: Dict, label: str = None,
+                   model_name: str = None) -> Optional[str]:
+        """
+        응답 캐시 키 (조회·저장·삭제 모두 같은 키)
+        - 라우팅되는 호출은 실제 응답한 모델이 아니라 작업의 주 모델 기준
+          (할당량/SLO 대체로 후보 순서가 바뀌어도 같은 요청은 같은 키)
+        """
+        if self.cache is None or not isinstance(prompt, str):
+            return None
+        key_model = model_name
+        if not key_model and self.router is not None and label:
+            key_model = self.router.primary(label)
+        return LLMCache.make_key(key_model or self.default_model, prompt, generation_config,
+                                 backends.backend_name())
+
+    def invalidate(self, prompt, model_name: str = None, generation_config: Dict = None, label: str = None):
+        """캐시된 응답 삭제 (파싱 실패 등 응답이 잘못된 경우 다음 호출이 새로 생성하도록)"""
+        key = self._cache_key(prompt, generation_config, label, model_name)
+        if key is not None:
+            self.cache.delete(key)
+
+    def generate(self, prompt, model_name: str = None, generation_config: Dict = None,
+                 on_chunk: Callable[[str], None] = None, on_attempt: Callable[[], None] = None,
+                 max_attempts: int = None, error_retry_delay: float = None, cache: bool = True,
+                 label: str = None, cached_prefix: str = None) -> str:
+        """
+        텍스트 생성 (캐시 적중 시 API 호출 생략, 할당량 초과 시 다른 키 → 대체 모델로 재시도)
+
+        Args:
+            model_name: 사용할 모델 (없으면 label로 라우팅, 라우터가 없으면 default_model)
+            generation_config: generate_content의 generation_config
+            on_chunk: 지정 시 스트리밍으로 받으며 조각마다 호출
+            on_attempt: 시도 시작마다 호출 (스트리밍 파서 초기화 등)
+            max_attempts: 최대 시도 횟수 (기본: 키 개수)
+            error_retry_delay: 지정 시 할당량 외 오류도 이 시간만큼 쉬고 재시도
+            cache: False면 캐시를 읽지도 쓰지도 않음 (주제 발굴처럼 매번 새 결과가 필요한 호출)
+            label: 사용량 기록/모델 라우팅용 프롬프트 용도 (topic, writer 등)
+            cached_prefix: 호출마다 같은 고정 지시문 (prompt는 그 뒤에 붙는 가변 부분)
+        """
+        full_prompt = f"{cached_prefix}\n\n{prompt}" if cached_prefix else prompt
+        models = self.models_for(label, model_name)
+        cache_key = self._cache_key(full_prompt, generation_config, label, model_name) if cache else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                pipeline_metrics.increment("llm_cache_hits")
+                if on_attempt:
+                    on_attempt()
+                if on_chunk:
+                    on_chunk(cached)
+                return cached
+            pipeline_metrics.increment("llm_cache_misses")
+
+        for position, routed_model in enumerate(models):
+            try:
+                text, latency = self._generate_uncached(prompt, routed_model, generation_config, on_chunk, on_attempt,
+                                               max_attempts, error_retry_delay, label, cached_prefix)
+            except Exception as e:
+                if position == len(models) - 1 or not is_exhausted(e):
+                    raise
+                self.router.quota_exhausted(label, routed_model)
+                pipeline_metrics.increment("model_fallbacks")
+                print(f"   ↘️ {routed_model} 할당량 소진: {models[position + 1]}(으)로 전환")
+                continue
+            if self.router is not None and model_name is None:
+                # 키 대기/재시도 시간을 빼고 성공한 요청 자체의 응답 시간으로 SLO 판단
+                self.router.observe(label, routed_model, latency)
+            if cache_key is not None:
+                self.cache.put(cache_key, routed_model, text)
+            return text
+
+    def _generate_uncached(self, prompt, model_name, generation_config, on_chunk, on_attempt,
+                           max_attempts, error_retry_delay, label=None, cached_prefix=None) -> tuple:
+        """키를 바꿔 가며 모델 하나로 생성 → (텍스트, 성공한 요청의 응답 시간)"""
+        if not self.api_keys:
+            raise ValueError("❌ GEMINI_API_KEY가 설정되지 않았습니다.")
+        if max_attempts is None:
+            max_attempts = len(self.api_keys)
+
+        scheduler = self.scheduler_for(model_name)
+        model_name = model_name or self.default_model
+        tried = set()
+        previous_key = None
+        last_error = None
+        timeouts = 0
+        full_prompt = f"{cached_prefix}\n\n{prompt}" if cached_prefix else prompt
+        tokens = estimate_tokens(full_prompt)
+        for attempt in range(max_attempts):
+            key_index = scheduler.acquire(tokens, exclude=tried)
+            tried.add(key_index)
+            if attempt > 0:
+                pipeline_metrics.increment("llm_retries")
+                if key_index != previous_key:
+                    pipeline_metrics.increment("key_rotations")
+                    print(f"🔄 API 키 #{key_index + 1}로 전환")
+            previous_key = key_index
+
+            timeout = self.timeouts.timeout_for(label, model_name, timeouts) if self.timeouts else None
+            hedge_delay = None
+            if self.timeouts and on_chunk is None and len(self.api_keys) > 1:
+                hedge_delay = self.timeouts.hedge_delay(label, model_name)
+            if on_attempt:
+                on_attempt()
+            try:
+                call = (scheduler, key_index, attempt, prompt, full_prompt, tokens, model_name,
+                        generation_config, on_chunk, label, cached_prefix, timeout)
+                if hedge_delay is not None and hedge_delay < (timeout or float('inf')):
+                    return self._call_hedged(call, hedge_delay, tried)
+                return self._call(*call)
+            except Exception as e:
+                last_error = e
+                if is_quota_error(e):
+                    print(f"⚠️ API 키 #{key_index + 1} 할당량 초과")
+                    pipeline_metrics.increment("quota_errors")
+                    scheduler.park(key_index, e)
+                    continue
+                if timeout is not None and is_timeout_error(e) and attempt < max_attempts - 1:
+                    timeouts += 1
+                    pipeline_metrics.increment("llm_timeouts")
+                    print(f"   ⏱️ 키 #{key_index + 1} 응답 시간 초과 ({timeout:.1f}초): 다른 키로 재시도")
+                    continue
+                if error_retry_delay is None or attempt == max_attempts - 1:
+                    raise
+                print(f"   ⚠️ 오류: {str(e)[:80]}... ({error_retry_delay:.0f}초 후 재시도)")
+                time.sleep(error_retry_delay)
+
+        if last_error is not None and is_quota_error(last_error):
+            raise Exception("모든 API 키의 할당량이 초과되었습니다.") from last_error
+        raise Exception("최대 재시도 횟수 초과") from last_error
+
+    def _call(self, scheduler: KeyScheduler, key_index: int, attempt: int, prompt, full_prompt, tokens: int,
+              model_name: str, generation_config: Dict, on_chunk, label: str, cached_prefix: str,
+              timeout: float = None) -> tuple:
+        """키 하나로 요청 1회 → (텍스트, 응답 시간) (사용량·응답 시간 기록, 실패 시 예외 그대로 전달)"""
+        # 컨텍스트 캐시가 있으면 가변 부분만, 없으면 접두어를 붙인 전체 프롬프트 전송
+        context = None
+        if cached_prefix and self.context_ttl:
+            context = self.context_model(key_index, model_name, cached_prefix)
+        model = context if context is not None else self.model(key_index, model_name)
+        request = prompt if context is not None else full_prompt
+        kwargs = {"generation_config": generation_config} if generation_config else {}
+        if timeout is not None:
+            kwargs["request_options"] = {"timeout": timeout}
+        try:
+            pipeline_metrics.increment("llm_calls")
+            attempt_started = time.perf_counter()
+            with service_slot("gemini"):
+                if on_chunk is None:
+                    response = model.generate_content(request, **kwargs)
+                    text = response.text
+                else:
+                    response = model.generate_content(request, stream=True, **kwargs)
+                    parts = []
+                    for chunk in response:
+                        parts.append(chunk.text)
+                        on_chunk(chunk.text)
+                    text = "".join(parts)
+            latency = time.perf_counter() - attempt_started
+        except Exception:
+            if context is not None:
+                self.forget_context(key_index, model_name, cached_prefix)
+            raise
+        prompt_tokens, output_tokens, cached_tokens = pipeline_metrics.usage_tokens(response)
+        pipeline_metrics.record_call("gemini", model_name, label, prompt_tokens, output_tokens,
+                                     latency, key_index, attempt, cached_tokens)
+        scheduler.record(key_index, tokens, prompt_tokens + output_tokens)
+        if self.timeouts is not None:
+            self.timeouts.observe(label, model_name, latency)
+        return text, latency
+
+    def _call_hedged(self, call: tuple, hedge_delay: float, tried: set) -> tuple:
+        """
+        헤지 요청: hedge_delay 안에 응답이 없으면 다른 키로 같은 요청을 하나 더 보내고 먼저 성공한 응답 사용
+        (늦게 끝난 요청은 취소할 수 없으므로 백그라운드에서 끝나고 사용량만 기록)
+        """
+        scheduler, key_index = call[0], call[1]
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=2 * len(self.api_keys),
+                                                          thread_name_prefix="llm-hedge")
+        primary = self._hedge_executor.submit(self._call, *call)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        hedge_key = scheduler.try_acquire(call[5], exclude=tried | {key_index})
+        if hedge_key is None:
+            return primary.result()
+        tried.add(hedge_key)
+        pipeline_metrics.increment("llm_hedges")
+        print(f"   🪃 키 #{key_index + 1} 응답 지연 ({hedge_delay:.1f}초 경과): 키 #{hedge_key + 1}로 헤지 요청")
+        hedge = self._hedge_executor.submit(self._call, scheduler, hedge_key, *call[2:])
+        futures = {primary: key_index, hedge: hedge_key}
+        pending = set(futures)
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    if future is hedge:
+                        pipeline_metrics.increment("llm_hedge_wins")
+                    return future.result()
+                if future is hedge and is_quota_error(error):
+                    scheduler.park(hedge_key, error)
+                if future is primary or first_error is None:
+                    first_error = error
+        raise first_error
+
+    async def generate_async(self, prompt, **kwargs) -> str:
+        """generate()의 asyncio 버전 (스레드 풀에서 실행하므로 여러 요청이 키를 나눠 병렬 처리)"""
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+    def save_state(self):
+        """실행 중 쌓인 응답 시간 표본 저장 (실행/작업이 끝날 때 1회)"""
+        if self.timeouts is not None:
+            self.timeouts.save()
+
+
+_shared_client: Optional[LLMClient] = None
+_shared_lock = threading.Lock()
+
+
+def create_client(config: Dict = None) -> LLMClient:
+    """config_ai.json 설정(키, llm_cache, key_quota, context_cache, model_routing, llm_timeouts)으로 클라이언트 생성"""
+    api_keys = load_api_keys(config)
+    context_settings = (config or {}).get("context_cache", {})
+    context_ttl = None
+    if context_settings.get("enabled", True):
+        context_ttl = context_settings.get("ttl_minutes", DEFAULT_CONTEXT_TTL_MINUTES) * 60
+    context_min_uses = context_settings.get("min_uses", DEFAULT_CONTEXT_MIN_USES)
+    router = None
+    if (config or {}).get("model_routing", {}).get("enabled", True):
+        router = ModelRouter.from_config(config)
+    return LLMClient(api_keys, cache=LLMCache.from_config(config),
+                     scheduler=KeyScheduler.from_config(api_keys, config), context_ttl=context_ttl,
+                     router=router, timeouts=AdaptiveTimeouts.from_config(config), context_min_uses=context_min_uses,
+                     scheduler_factory=lambda model_name: KeyScheduler.from_config(api_keys, config, model_name))
+
+
+def get_client(api_keys: List[str] = None) -> LLMClient:
+    """프로세스 공유 클라이언트 (처음 호출 시 생성)"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient(api_keys)
+        return _shared_client
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+작업별 모델 라우팅
+- 호출 용도(label)를 작업(route)에 묶고, 작업마다 모델 등급(tier)과 대체 등급을 지정
+  · 예: 주제 발굴/본문 작성은 quality, 이미지 프롬프트/요약은 fast
+  · fallback: 할당량 소진 시 대체 등급 (느리더라도 요청을 처리할 수 있는 모델)
+  · slo_fallback: 지연 SLO 초과 시 대체 등급 (더 빠른 모델만, 비어 있으면 SLO 초과로 대체하지 않음)
+- 자동 대체
+  · 할당량 소진: 이 모델의 모든 키가 한도에 걸리면 fallback 모델로 즉시 재요청
+  · 지연 SLO 초과: 응답이 slo_seconds보다 느리면 cooldown_minutes 동안 slo_fallback 모델을 먼저 사용
+    (이미 fast 등급인 작업이 느리다고 quality로 바꾸면 더 느려지므로 기록만 함)
+  · 대체 중에도 주 모델은 마지막 후보로 남김 (대체 모델이 실패해도 요청은 처리)
+- 작업·모델별 지연 통계 (p50/p95, SLO 초과·대체 횟수) → run_pipeline.py 실행 기록에 저장
+- 설정: config_ai.json의 "model_routing" (tiers, cooldown_minutes, routes)
+  · routes에는 DEFAULT_ROUTES와 다른 항목만 적음 (작업별로 기본값에 덮어씀)
+- model_name을 직접 지정한 호출은 라우팅하지 않음
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+DEFAULT_TIERS = {
+    "quality": "gemini-2.5-flash",
+    "fast": "gemini-2.0-flash",
+}
+
+DEFAULT_ROUTES = {
+    "topic_ideation": {"tier": "quality", "fallback": ["fast"], "slo_fallback": ["fast"],
+                       "slo_seconds": 60, "labels": ["topic"]},
+    "article_writing": {"tier": "quality", "fallback": ["fast"], "slo_fallback": ["fast"],
+                        "slo_seconds": 180, "labels": ["writer", "writer_outline", "writer_section", "post"]},
+    "image_prompt": {"tier": "fast", "fallback": ["quality"], "slo_fallback": [],
+                     "slo_seconds": 20, "labels": ["image_prompt", "thumbnail_prompt"]},
+    "summarization": {"tier": "fast", "fallback": ["quality"], "slo_fallback": [],
+                      "slo_seconds": 30, "labels": ["summary"]},
+}
+
+DEFAULT_COOLDOWN_MINUTES = 10
+
+# 작업·모델별로 보관하는 최근 지연 표본 수
+LATENCY_WINDOW = 200
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수 (표본이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ModelRouter:
+    """용도(label) → 후보 모델 목록 (스레드 안전)"""
+
+    def __init__(self, tiers: Dict[str, str] = None, routes: Dict[str, Dict] = None,
+                 cooldown_minutes: float = DEFAULT_COOLDOWN_MINUTES):
+        self.tiers = dict(DEFAULT_TIERS if tiers is None else tiers)
+        self.routes = dict(DEFAULT_ROUTES if routes is None else routes)
+        self.cooldown_seconds = cooldown_minutes * 60
+        self._label_routes = {}
+        for route_name, route in self.routes.items():
+            for tier in [route.get("tier")] + list(route.get("fallback", [])) + list(route.get("slo_fallback", [])):
+                if tier not in self.tiers:
+                    raise ValueError(f"❌ model_routing.routes.{route_name}: 알 수 없는 등급 '{tier}'")
+            for label in route.get("labels", [route_name]):
+                self._label_routes[label] = route_name
+
+        self._lock = threading.Lock()
+        # (작업, 모델) → 대체 해제 시각 (할당량 소진 / SLO 초과)
+        self._exhausted_until = {}
+        self._slow_until = {}
+        # (작업, 모델) → 최근 지연 / 호출·SLO 초과 수
+        self._latencies = defaultdict(list)
+        self._counts = defaultdict(lambda: {"calls": 0, "slo_breaches": 0, "quota_fallbacks": 0})
+
+    @classmethod
+    def from_config(cls, config: Dict = None) -> "ModelRouter":
+        """config_ai.json의 "model_routing" 설정으로 생성 (routes는 기본값에 덮어씀)"""
+        settings = (config or {}).get("model_routing", {})
+        tiers = dict(DEFAULT_TIERS)
+        tiers.update(settings.get("tiers", {}))
+        routes = {name: dict(route) for name, route in DEFAULT_ROUTES.items()}
+        for name, route in settings.get("routes", {}).items():
+            routes.setdefault(name, {}).update(route)
+        return cls(tiers, routes, settings.get("cooldown_minutes", DEFAULT_COOLDOWN_MINUTES))
+
+    def route_name(self, label: str) -> str:
+        """용도가 속한 작업 (라우팅 대상이 아니면 None)"""
+        return self._label_routes.get(label)
+
+    def primary(self, label: str) -> str:
+        """작업의 주 모델 (대체 여부와 무관, 라우팅 대상이 아니면 None)"""
+        route_name = self.route_name(label)
+        if route_name is None:
+            return None
+        return self.tiers[self.routes[route_name]["tier"]]
+
+    def candidates(self, label: str) -> List[str]:
+        """
+        요청할 모델 순서 (주 모델 → 대체 모델)
+        - 할당량 소진으로 대체 중인 모델은 맨 뒤로
+        - SLO 초과로 대체 중이면 slo_fallback 모델을 앞으로
+        """
+        route_name = self.route_name(label)
+        if route_name is None:
+            return []
+        route = self.routes[route_name]
+        primary = self.tiers[route["tier"]]
+        slo_models = self._models(route.get("slo_fallback", []), exclude=[primary])
+        models = [primary] + self._models(route.get("fallback", []), exclude=[primary])
+        models += [model for model in slo_models if model not in models]
+        now = time.time()
+        with self._lock:
+            if self._slow_until.get((route_name, primary), 0) > now and slo_models:
+                models = slo_models + [model for model in models if model not in slo_models]
+            available = [model for model in models if self._exhausted_until.get((route_name, model), 0) <= now]
+        return available + [model for model in models if model not in available]
+
+    def _models(self, tiers: List[str], exclude: List[str]) -> List[str]:
+        models = []
+        for tier in tiers:
+            model = self.tiers[tier]
+            if model not in models and model not in exclude:
+                models.append(model)
+        return models
+
+    def observe(self, label: str, model: str, latency: float):
+        """
+        성공한 요청의 응답 시간 기록 (키 대기/재시도 제외)
+        주 모델이 SLO를 넘으면 cooldown 동안 slo_fallback 모델을 먼저 사용 (더 빠른 대체가 없으면 기록만)
+        """
+        route_name = self.route_name(label)
+        if route_name is None:
+            return
+        route = self.routes[route_name]
+        slo = route.get("slo_seconds")
+        demote = model == self.tiers[route["tier"]] and bool(route.get("slo_fallback"))
+        with self._lock:
+            samples = self._latencies[(route_name, model)]
+            samples.append(latency)
+            del samples[:-LATENCY_WINDOW]
+            counts = self._counts[(route_name, model)]
+            counts["calls"] += 1
+            if slo and latency > slo:
+                counts["slo_breaches"] += 1
+                if demote:
+                    self._slow_until[(route_name, model)] = time.time() + self.cooldown_seconds
+                    print(f"   🐢 {route_name} 지연 {latency:.1f}초 > SLO {slo}초: "
+                          f"{self.cooldown_seconds / 60:.0f}분간 {model} 대신 더 빠른 모델 우선")
+
+    def quota_exhausted(self, label: str, model: str):
+        """모델의 모든 키가 한도에 걸림 (대체 모델로 넘어가고 cooldown 동안 우선순위 낮춤)"""
+        route_name = self.route_name(label)
+        if route_name is None:
+            return
+        with self._lock:
+            self._counts[(route_name, model)]["quota_fallbacks"] += 1
+            self._exhausted_until[(route_name, model)] = time.time() + self.cooldown_seconds
+
+    def stats(self) -> Dict[str, Dict]:
+        """작업·모델별 지연 통계 ("작업 · 모델" → 호출 수, p50, p95, SLO 초과, 할당량 대체)"""
+        with self._lock:
+            keys = set(self._latencies) | set(self._counts)
+            return {
+                f"{route_name} · {model}": {
+                    "calls": self._counts[(route_name, model)]["calls"],
+                    "p50_seconds": round(percentile(self._latencies[(route_name, model)], 50), 3),
+                    "p95_seconds": round(percentile(self._latencies[(route_name, model)], 95), 3),
+                    "slo_breaches": self._counts[(route_name, model)]["slo_breaches"],
+                    "quota_fallbacks": self._counts[(route_name, model)]["quota_fallbacks"]
+                }
+                for route_name, model in sorted(keys)
+            }
+
+
+def print_route_stats(stats: Dict[str, Dict], title: str = "모델 라우팅 지연"):
+    """작업·모델별 지연 표"""
+    if not stats:
+        return
+    print(f"\n🧭 {title}")
+    for name, entry in stats.items():
+        extra = []
+        if entry.get("slo_breaches"):
+            extra.append(f"SLO 초과 {entry['slo_breaches']}회")
+        if entry.get("quota_fallbacks"):
+            extra.append(f"할당량 대체 {entry['quota_fallbacks']}회")
+        extra_text = f", {', '.join(extra)}" if extra else ""
+        print(f"   • {name}: {entry['calls']}회, p50 {entry['p50_seconds']:.1f}초 / "
+              f"p95 {entry['p95_seconds']:.1f}초{extra_text}")
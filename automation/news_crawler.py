@@ -2,7 +2,9 @@
 """
 블로그 자동화 스크립트
 - RSS 피드에서 뉴스 수집
-- AI로 자동 요약
+- AI로 자동 요약 (기사 여러 개를 요청 1회로 묶어 요약, 빠진 기사만 개별 요청)
+  · 요청은 스레드 풀에서 동시에 보내고, 분당 요청 한도(summary_rpm)는 토큰 버킷으로 지킴
+  · HTTP 연결은 세션으로 재사용, 요청마다 제한 시간(summary_timeout) 적용
 - data.json 자동 업데이트
 """
 
@@ -14,6 +16,62 @@ from typing import List, Dict
 import requests
 from bs4 import BeautifulSoup
 import time
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pipeline_metrics
+from key_scheduler import KeyScheduler, estimate_tokens
+
+
+OPENAI_CHAT_URL = 'https://api.openai.com/v1/chat/completions'
+SUMMARY_MODEL = 'gpt-3.5-turbo'
+SUMMARY_SYSTEM_PROMPT = '당신은 뉴스 기사를 간결하고 명확하게 요약하는 전문가입니다. 2-3문장으로 핵심만 요약해주세요.'
+
+# 일괄 요약 요청 1회에 넣는 기사 수 (config.json의 summary_batch_size)
+DEFAULT_SUMMARY_BATCH_SIZE = 10
+# 동시 요약 요청 수 / OpenAI 분당 요청 한도 / 요청 1건 제한 시간(초) (config.json의 summary_workers, summary_rpm, summary_timeout)
+DEFAULT_SUMMARY_WORKERS = 4
+DEFAULT_SUMMARY_RPM = 60
+DEFAULT_SUMMARY_TIMEOUT = 30
+
+# 일괄 요약에서 기사당 본문 길이 / 응답 토큰 (개별 요약은 본문 1000자, 150토큰)
+BATCH_CONTENT_CHARS = 600
+BATCH_TOKENS_PER_ITEM = 150
+
+BATCH_SYSTEM_PROMPT = (SUMMARY_SYSTEM_PROMPT + ' 여러 기사가 [번호]와 함께 주어지면 기사마다 따로 요약하고, '
+                       '반드시 {"summaries": [{"id": 번호, "summary": "요약"}]} 형식의 JSON으로만 답하세요.')
+
+
+def parse_batch_summaries(text: str, ids: List[int]) -> Dict[int, str]:
+    """
+    일괄 요약 응답 → {번호: 요약}
+    - JSON ({"summaries": [...]} 또는 배열)이면 id로 매칭
+    - JSON이 깨졌으면 "[번호]" / "번호." / "번호:" 로 시작하는 줄 기준으로 분리
+    - 요청하지 않은 번호나 빈 요약은 버림 (빠진 기사는 호출한 쪽이 개별 요약)
+    """
+    summaries = {}
+    clean = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+    try:
+        data = json.loads(clean)
+        items = data.get('summaries', []) if isinstance(data, dict) else data
+        for item in items:
+            if isinstance(item, dict):
+                try:
+                    summaries[int(item.get('id'))] = str(item.get('summary', '')).strip()
+                except (TypeError, ValueError):
+                    continue
+    except ValueError:
+        marker = re.compile(r'^\s*(?:\[(\d+)\]|(\d+)[.:)])\s*(.*)$')
+        current = None
+        for line in clean.splitlines():
+            match = marker.match(line)
+            if match:
+                current = int(match.group(1) or match.group(2))
+                summaries[current] = match.group(3).strip()
+            elif current is not None and line.strip():
+                summaries[current] = f"{summaries[current]} {line.strip()}".strip()
+    return {item_id: summary for item_id, summary in summaries.items() if item_id in ids and summary}
 
 
 class NewsAutomation:
@@ -24,6 +82,16 @@ class NewsAutomation:
         
         self.openai_api_key = os.getenv('OPENAI_API_KEY', self.config.get('openai_api_key', ''))
         
+        self.summary_workers = max(1, self.config.get('summary_workers', DEFAULT_SUMMARY_WORKERS))
+        self.summary_timeout = self.config.get('summary_timeout', DEFAULT_SUMMARY_TIMEOUT)
+        # OpenAI 분당 요청/토큰 한도 (Gemini 키와 같은 토큰 버킷, 0이면 제한 없음)
+        self.rate_limiter = KeyScheduler([self.openai_api_key or 'openai'], quota={
+            'rpm': self.config.get('summary_rpm', DEFAULT_SUMMARY_RPM),
+            'tpm': self.config.get('summary_tpm', 0)
+        })
+        self._session = None
+        self._session_lock = threading.Lock()
+        
     def fetch_rss_feeds(self) -> List[Dict]:
         """RSS 피드에서 뉴스 수집"""
         articles = []
@@ -83,47 +151,117 @@ class NewsAutomation:
             article['summary'] = self._clean_html(article['summary'])[:200] + "..."
             return article
         
+        clean_summary = self._clean_html(article['summary'])
         try:
-            # HTML 태그 제거
-            clean_summary = self._clean_html(article['summary'])
-            
-            # API 요청
-            headers = {
-                'Authorization': f'Bearer {self.openai_api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                'model': 'gpt-3.5-turbo',
-                'messages': [
-                    {'role': 'system', 'content': '당신은 뉴스 기사를 간결하고 명확하게 요약하는 전문가입니다. 2-3문장으로 핵심만 요약해주세요.'},
-                    {'role': 'user', 'content': f"다음 기사를 요약해주세요:\n\n제목: {article['title']}\n\n내용: {clean_summary[:1000]}"}
-                ],
-                'max_tokens': 150,
-                'temperature': 0.7
-            }
-            
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                article['summary'] = result['choices'][0]['message']['content'].strip()
-                print(f"  🤖 AI 요약 완료: {article['title'][:30]}...")
-            else:
-                print(f"  ⚠️ API 오류 (상태 코드: {response.status_code}), 원본 사용")
-                article['summary'] = clean_summary[:200] + "..."
-                
+            messages = [
+                {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+                {'role': 'user', 'content': f"다음 기사를 요약해주세요:\n\n제목: {article['title']}\n\n내용: {clean_summary[:1000]}"}
+            ]
+            article['summary'] = self._chat(messages, max_tokens=150)
+            print(f"  🤖 AI 요약 완료: {article['title'][:30]}...")
         except Exception as e:
             print(f"  ❌ AI 요약 실패: {e}, 원본 사용")
-            article['summary'] = self._clean_html(article['summary'])[:200] + "..."
+            article['summary'] = clean_summary[:200] + "..."
         
         return article
     
+    def _http(self) -> requests.Session:
+        """동시 요청 수만큼 연결을 유지하는 공유 세션 (요청마다 TLS 연결을 새로 맺지 않음)"""
+        with self._session_lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.summary_workers)
+                self._session.mount('https://', adapter)
+            return self._session
+    
+    def _chat(self, messages: List[Dict], max_tokens: int, label: str = 'news_summary',
+              json_mode: bool = False, timeout: float = None) -> str:
+        """OpenAI Chat Completions 요청 1회 (분당 한도 대기, 사용량 기록, 실패 시 예외)"""
+        headers = {
+            'Authorization': f'Bearer {self.openai_api_key}',
+            'Content-Type': 'application/json'
+        }
+        data = {
+            'model': SUMMARY_MODEL,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': 0.7
+        }
+        if json_mode:
+            data['response_format'] = {'type': 'json_object'}
+        
+        reserved = estimate_tokens(messages)
+        self.rate_limiter.acquire(reserved)
+        started = time.perf_counter()
+        response = self._http().post(OPENAI_CHAT_URL, headers=headers, json=data,
+                                     timeout=timeout or self.summary_timeout)
+        if response.status_code != 200:
+            raise Exception(f"API 오류 (상태 코드: {response.status_code})")
+        
+        result = response.json()
+        usage = result.get('usage', {})
+        self.rate_limiter.record(0, reserved, usage.get('total_tokens', 0))
+        pipeline_metrics.record_call('openai', data['model'], label,
+                                     usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0),
+                                     time.perf_counter() - started)
+        return result['choices'][0]['message']['content'].strip()
+    
+    def summarize_batch(self, articles: List[Dict]) -> Dict[int, str]:
+        """
+        기사 여러 개를 요청 1회로 요약
+        
+        Returns:
+            {articles 인덱스: 요약} (응답에서 빠지거나 요청이 실패한 기사는 없음)
+        """
+        blocks = []
+        for index, article in enumerate(articles, start=1):
+            content = self._clean_html(article['summary'])[:BATCH_CONTENT_CHARS]
+            blocks.append(f"[{index}] 제목: {article['title']}\n내용: {content}")
+        messages = [
+            {'role': 'system', 'content': BATCH_SYSTEM_PROMPT},
+            {'role': 'user', 'content': f"다음 기사 {len(articles)}개를 각각 요약해주세요:\n\n" + "\n\n".join(blocks)}
+        ]
+        try:
+            pipeline_metrics.increment("news_summary_batches")
+            text = self._chat(messages, max_tokens=BATCH_TOKENS_PER_ITEM * len(articles) + 50,
+                              label='news_summary_batch', json_mode=True,
+                              timeout=self.summary_timeout + 5 * len(articles))
+        except Exception as e:
+            print(f"  ⚠️ 일괄 요약 실패: {e}")
+            return {}
+        summaries = parse_batch_summaries(text, list(range(1, len(articles) + 1)))
+        return {item_id - 1: summary for item_id, summary in summaries.items()}
+    
+    def summarize_articles(self, articles: List[Dict]) -> List[Dict]:
+        """
+        일괄 요약 (summary_batch_size개씩 묶어 요청, 1이면 일괄 요약 안 함) → 빠진 기사만 개별 요약
+        일괄/개별 요청 모두 summary_workers개까지 동시에 보내고 summary_rpm 한도는 토큰 버킷으로 대기
+        """
+        batch_size = max(1, self.config.get('summary_batch_size', DEFAULT_SUMMARY_BATCH_SIZE))
+        started = time.perf_counter()
+        missing = articles
+        with ThreadPoolExecutor(max_workers=self.summary_workers) as executor:
+            if batch_size > 1:
+                batches = [articles[start:start + batch_size] for start in range(0, len(articles), batch_size)]
+                missing = []
+                for batch, summaries in zip(batches, executor.map(self.summarize_batch, batches)):
+                    for offset, article in enumerate(batch):
+                        if offset in summaries:
+                            article['summary'] = summaries[offset]
+                        else:
+                            missing.append(article)
+                    print(f"  🤖 AI 일괄 요약 완료: {len(summaries)}/{len(batch)}개 (요청 1회)")
+                if missing:
+                    print(f"  🔁 일괄 요약에서 빠진 {len(missing)}개 기사 개별 요약")
+                    pipeline_metrics.increment("news_summary_fallbacks", len(missing))
+            
+            # 결과는 기사 dict에 직접 반영되므로 완료만 기다림
+            list(executor.map(self.summarize_with_ai, missing))
+        
+        print(f"  ⏱️ 요약 단계 {time.perf_counter() - started:.1f}초 (동시 {self.summary_workers}개, "
+              f"분당 {self.rate_limiter.rpm or '∞'}회 한도)")
+        return articles
+    
     def _clean_html(self, text: str) -> str:
         """HTML 태그 제거"""
         soup = BeautifulSoup(text, 'html.parser')
@@ -151,14 +289,17 @@ class NewsAutomation:
     def generate_data_json(self, articles: List[Dict]) -> Dict:
         """data.json 형식으로 변환"""
         processed_articles = []
+        articles = articles[:self.config.get('max_articles', 20)]
         
-        for article in articles[:self.config.get('max_articles', 20)]:
-            # AI 요약 적용
-            if self.config.get('use_ai_summary', False):
-                article = self.summarize_with_ai(article)
-                time.sleep(1)  # API 요청 간격
-            else:
+        # AI 요약 적용 (키가 없으면 summarize_with_ai가 원본 요약 사용)
+        if self.config.get('use_ai_summary', False) and self.openai_api_key:
+            self.summarize_articles(articles)
+        
+        for article in articles:
+            if not self.config.get('use_ai_summary', False):
                 article['summary'] = self._clean_html(article['summary'])[:200] + "..."
+            elif not self.openai_api_key:
+                article = self.summarize_with_ai(article)
             
             processed_articles.append({
                 'title': article['title'],
@@ -204,6 +345,9 @@ class NewsAutomation:
         print("\n[3단계] 파일 저장")
         self.save_data_json(data)
         
+        pipeline_metrics.print_usage(pipeline_metrics.usage_summary())
+        pipeline_metrics.save_daily_usage()
+        
         print("\n" + "=" * 50)
         print("🎉 자동화 완료!")
         print("=" * 50)
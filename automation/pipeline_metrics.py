@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+파이프라인 실행 카운터
+- Agent들이 LLM 호출 수, 토큰, 이미지 요청/바이트, 재시도, 키 전환 횟수를 기록
+- run_pipeline.py가 실행 단위로 reset() → snapshot()하여 실행 기록(ledger)에 저장
+  (상주 워커는 작업이 끝날 때마다 drain()으로 꺼내고 초기화)
+- LLM 호출별 기록(record_call): 용도(label), 모델, 토큰(컨텍스트 캐시 토큰 포함), 지연, 키, 재시도, 추정 비용
+  · usage_summary(): 실행 단위 집계 (용도·모델별)
+  · save_daily_usage(): 날짜별 누적 집계를 llm_usage.json에 병합 (실행이 끝날 때 1회, fake 백엔드는 기록만 비움)
+- 스레드 안전 (배치 모드에서 여러 체인이 동시에 기록)
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+DEFAULT_USAGE_PATH = Path(__file__).parent / "llm_usage.json"
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력), 목록에 없는 모델은 비용 0으로 집계
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.0, 0.0),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+# 컨텍스트 캐시에서 읽은 입력 토큰의 가격 비율 (일반 입력 대비)
+CACHED_INPUT_RATIO = 0.25
+
+_counters = defaultdict(int)
+_calls = []
+_lock = threading.Lock()
+# llm_usage.json 읽기-병합-쓰기를 스레드 간 직렬화
+_save_lock = threading.Lock()
+
+
+def increment(name: str, amount: int = 1):
+    """카운터 증가"""
+    if not amount:
+        return
+    with _lock:
+        _counters[name] += amount
+
+
+def usage_tokens(response) -> Tuple[int, int, int]:
+    """Gemini 응답의 usage_metadata에서 (입력 토큰, 출력 토큰, 그중 컨텍스트 캐시 토큰) (없으면 0)"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return 0, 0, 0
+    return (getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0,
+            getattr(usage, "cached_content_token_count", 0) or 0)
+
+
+def estimate_cost(model: str, prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """MODEL_PRICES 기준 추정 비용 (USD, 캐시 토큰은 CACHED_INPUT_RATIO 적용)"""
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    input_cost = (prompt_tokens - cached_tokens + cached_tokens * CACHED_INPUT_RATIO) * input_price
+    return (input_cost + output_tokens * output_price) / 1_000_000
+
+
+def record_call(provider: str, model: str, label: str, prompt_tokens: int, output_tokens: int,
+                latency: float, key_index: int = None, retries: int = 0, cached_tokens: int = 0):
+    """
+    LLM 호출 1건 기록 (성공한 호출 기준, 실패한 시도는 retries로 반영)
+
+    Args:
+        provider: gemini | openai
+        label: 프롬프트 용도 (topic, writer, image_prompt 등, 토큰 사용처 구분용)
+        latency: 성공한 시도의 응답 시간 (초)
+        key_index: 사용한 API 키 인덱스 (0부터)
+        cached_tokens: prompt_tokens 중 컨텍스트 캐시에서 읽은 토큰
+    """
+    call = {
+        "provider": provider,
+        "model": model,
+        "label": label or "other",
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": cached_tokens,
+        "latency": latency,
+        "key": key_index,
+        "retries": retries,
+        "cost_usd": estimate_cost(model, prompt_tokens, output_tokens, cached_tokens)
+    }
+    with _lock:
+        _calls.append(call)
+        _counters["llm_prompt_tokens"] += prompt_tokens
+        _counters["llm_output_tokens"] += output_tokens
+        if cached_tokens:
+            _counters["llm_cached_tokens"] += cached_tokens
+
+
+def calls() -> List[Dict]:
+    """기록된 LLM 호출 목록 복사본"""
+    with _lock:
+        return list(_calls)
+
+
+def usage_summary(call_list: List[Dict] = None) -> Dict[str, Dict]:
+    """용도·모델별 호출 수, 토큰, 지연 합계, 재시도, 추정 비용 ("label · model" 키, 기본: 지금까지의 호출)"""
+    summary = {}
+    for call in (calls() if call_list is None else call_list):
+        entry = summary.setdefault(f"{call['label']} · {call['model']}", {
+            "calls": 0, "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0,
+            "latency_seconds": 0.0, "retries": 0, "cost_usd": 0.0, "keys": {}
+        })
+        entry["calls"] += 1
+        entry["prompt_tokens"] += call["prompt_tokens"]
+        entry["output_tokens"] += call["output_tokens"]
+        entry["cached_tokens"] += call["cached_tokens"]
+        entry["latency_seconds"] = round(entry["latency_seconds"] + call["latency"], 3)
+        entry["retries"] += call["retries"]
+        entry["cost_usd"] = round(entry["cost_usd"] + call["cost_usd"], 6)
+        if call["key"] is not None:
+            key = str(call["key"] + 1)
+            entry["keys"][key] = entry["keys"].get(key, 0) + 1
+    return summary
+
+
+def merge_usage(target: Dict[str, Dict], summary: Dict[str, Dict]):
+    """usage_summary() 결과를 target에 누적"""
+    for name, entry in summary.items():
+        total = target.setdefault(name, {})
+        for field, value in entry.items():
+            if field == "keys":
+                keys = total.setdefault("keys", {})
+                for key, count in value.items():
+                    keys[key] = keys.get(key, 0) + count
+            else:
+                total[field] = round(total.get(field, 0) + value, 6)
+
+
+def save_daily_usage(path: str = None, call_list: List[Dict] = None):
+    """
+    지금까지 기록된 호출을 오늘 날짜 집계에 병합하고 호출 기록 비움 (임시 파일 → rename)
+    호출 기록은 한 번의 잠금 안에서 꺼내고 비우므로, 집계 중에 끝난 호출은 다음 저장에 포함
+    call_list 지정 시 그 호출만 병합 (drain()으로 이미 꺼낸 기록)
+    fake 백엔드 호출은 실제 사용량이 아니므로 병합하지 않음
+    """
+    global _calls
+    if call_list is None:
+        with _lock:
+            call_list, _calls = _calls, []
+    saved_calls = call_list
+    import backends
+    if backends.is_fake():
+        return
+    summary = usage_summary(saved_calls)
+    if not summary:
+        return
+    path = Path(path) if path else DEFAULT_USAGE_PATH
+    with _save_lock:
+        daily = load_daily_usage(path)
+        merge_usage(daily.setdefault(datetime.now().strftime('%Y-%m-%d'), {}), summary)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(daily, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def load_daily_usage(path: str = None) -> Dict[str, Dict]:
+    """날짜별 사용량 집계 ({"YYYY-MM-DD": usage_summary 형식})"""
+    path = Path(path) if path else DEFAULT_USAGE_PATH
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def print_usage(summary: Dict[str, Dict], title: str = "LLM 토큰 사용량"):
+    """용도·모델별 사용량 표 (토큰이 많은 순)"""
+    if not summary:
+        return
+    total_tokens = sum(entry["prompt_tokens"] + entry["output_tokens"] for entry in summary.values())
+    total_cost = sum(entry["cost_usd"] for entry in summary.values())
+    print(f"\n🪙 {title}: {total_tokens:,} 토큰, 약 ${total_cost:.4f}")
+    for name, entry in sorted(summary.items(),
+                              key=lambda item: -(item[1]["prompt_tokens"] + item[1]["output_tokens"])):
+        tokens = entry["prompt_tokens"] + entry["output_tokens"]
+        share = tokens / total_tokens * 100 if total_tokens else 0
+        average_latency = entry["latency_seconds"] / entry["calls"] if entry["calls"] else 0
+        cached = entry.get("cached_tokens", 0)
+        cached_text = f" (캐시 {cached:,})" if cached else ""
+        print(f"   • {name}: {entry['calls']}회, 입력 {entry['prompt_tokens']:,}{cached_text} / 출력 {entry['output_tokens']:,} "
+              f"({share:.0f}%), 평균 {average_latency:.1f}초, 재시도 {entry['retries']}회, ${entry['cost_usd']:.4f}")
+
+
+def snapshot() -> Dict[str, int]:
+    """현재 카운터 값 복사본"""
+    with _lock:
+        return dict(_counters)
+
+
+def drain() -> Tuple[Dict[str, int], List[Dict]]:
+    """카운터와 호출 기록을 한 번의 잠금 안에서 꺼내고 초기화 (작업 단위 집계)"""
+    global _calls
+    with _lock:
+        counters, saved_calls = dict(_counters), _calls
+        _counters.clear()
+        _calls = []
+    return counters, saved_calls
+
+
+def reset():
+    """모든 카운터 초기화"""
+    with _lock:
+        _counters.clear()
+        _calls.clear()
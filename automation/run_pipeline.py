@@ -1,36 +1,89 @@
 #!/usr/bin/env python3
 """
 통합 실행 스크립트: 전체 파이프라인을 순차적으로 실행
+- 기본: 한 프로세스 안에서 Step 클래스를 직접 호출 (인터프리터/라이브러리 로딩 1회)
+- Gemini 키와 모델은 한 번만 설정하여 모든 Agent가 공유
+- Step 간 데이터는 메모리로 전달 (디버깅용 중간 JSON 파일은 그대로 저장)
+- --count N: N개의 글을 동시에 생성 (글마다 별도 중간 결과 디렉토리, data.json은 마지막에 1회 저장)
+- Step 2를 스트리밍으로 받으며 이미지 플레이스홀더가 나오는 즉시 Step 3 이미지 생성 시작
+- 실행마다 automation/pipeline_runs.jsonl에 Step별 소요 시간/사용량/결과 기록 (--report로 요약)
+- 각 Step 출력에 입력 해시(input_hash)를 기록하여 --resume 시 유효한 Step은 건너뜀
+- --enqueue / --worker: SQLite 작업 큐에 작업을 쌓고 상주 워커가 클라이언트를 유지한 채 처리
+- --subprocess: 기존 방식 (Step마다 별도 프로세스 실행)
 """
 
+import argparse
+import hashlib
+import json
+import os
 import subprocess
 import sys
+import threading
+import time
+import shutil
+import signal
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime
 from pathlib import Path
 
 
+BASE_DIR = Path(__file__).parent.parent
+
+STEPS = [
+    ("Step 1: Trend & Topic Agent", "automation/step1_topic_agent.py"),
+    ("Step 2: Writer & Art Director Agent", "automation/step2_writer_agent.py"),
+    ("Step 3: Image Generation & Vision Audit Agent", "automation/step3_image_audit_agent.py"),
+    ("Step 4: Save to data.json", "automation/step4_save_to_data_json.py"),
+]
+
+CONFIG_PATH = BASE_DIR / "automation" / "config_ai.json"
+INTERMEDIATE_DIR = "automation/intermediate_outputs"
+
+STEP_OUTPUT_NAMES = [
+    "step1_topic.json",
+    "step2_structured_content.json",
+    "step3_validated_content.json",
+    "step4_saved.json",
+]
+
+# 실행 기록 (JSON Lines, 실행마다 1줄 추가)
+LEDGER_PATH = BASE_DIR / "automation" / "pipeline_runs.jsonl"
+STEP_KEYS = {step_name: f"step{i}" for i, (step_name, _) in enumerate(STEPS, 1)}
+
+# 입력 해시 계산 시 제외하는 키 (실행마다 달라지는 메타데이터)
+VOLATILE_KEYS = {"generated_at", "validated_at", "input_hash", "agent"}
+
+# 배치 모드에서 주제 중복 확인에 넘기는 최근 제목 수 (generate_topic이 프롬프트에 넣는 수와 같음)
+BATCH_TITLE_WINDOW = 20
+
+# 서브프로세스 방식에서 google.generativeai를 import하는 Step 수 (Step 1~3)
+GENAI_STEPS = 3
+
+
 def run_step(step_name: str, script_path: str) -> bool:
     """
-    개별 Step 실행
-    
+    개별 Step 실행 (서브프로세스 방식)
+
     Returns:
         성공 여부
     """
     print("\n" + "="*70)
     print(f"🚀 {step_name} 실행 시작")
     print("="*70)
-    
+
     try:
         result = subprocess.run(
             [sys.executable, script_path],
-            cwd=Path(__file__).parent.parent,
+            cwd=BASE_DIR,
             check=True,
             capture_output=False,
             text=True
         )
-        
+
         print(f"\n✅ {step_name} 성공")
         return True
-        
+
     except subprocess.CalledProcessError as e:
         print(f"\n❌ {step_name} 실패 (Exit Code: {e.returncode})")
         return False
@@ -39,22 +92,586 @@ def run_step(step_name: str, script_path: str) -> bool:
         return False
 
 
-def main():
-    """메인 실행 함수"""
+def save_json(data: dict, output_path: str):
+    """중간 결과 JSON 저장"""
+    output_file = Path(output_path)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 출력 저장: {output_path}")
+
+
+def load_config() -> dict:
+    """automation/config_ai.json 로드 (없으면 빈 설정)"""
+    if CONFIG_PATH.exists():
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def compute_input_hash(inputs) -> str:
+    """Step 입력의 해시 (VOLATILE_KEYS 제외, 키 순서 무관)"""
+    if isinstance(inputs, dict):
+        inputs = {k: v for k, v in inputs.items() if k not in VOLATILE_KEYS}
+    payload = json.dumps(inputs, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def load_checkpoint(output_path: str, input_hash: str):
+    """입력 해시가 일치하는 이전 출력이 있으면 반환"""
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if isinstance(data, dict) and data.get("input_hash") == input_hash:
+        return data
+    return None
+
+
+def classify_error(error: BaseException) -> str:
+    """실패 원인 분류 (리포트 집계용)"""
+    message = str(error).lower()
+    if 'quota' in message or '429' in message or '할당량' in message:
+        return "quota"
+    if 'timed out' in message or 'timeout' in message:
+        return "timeout"
+    if isinstance(error, json.JSONDecodeError) or 'json' in message:
+        return "invalid_json"
+    return type(error).__name__
+
+
+def append_ledger(record: dict):
+    """실행 기록 1줄 추가 (기록 실패는 파이프라인 결과에 영향 없음)"""
+    try:
+        with open(LEDGER_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ 실행 기록 저장 실패: {e}")
+
+
+def load_ledger(last: int, backend: str = "live") -> list:
+    """
+    최근 last회의 실행 기록 (last는 1 이상)
+    backend: live | fake | all (backend 필드가 없는 이전 기록은 live)
+    """
+    if last < 1:
+        raise ValueError("last는 1 이상이어야 합니다")
+    if not LEDGER_PATH.exists():
+        return []
+    records = []
+    with open(LEDGER_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if backend == "all" or record.get("backend", "live") == backend:
+                records.append(record)
+    return records[-last:]
+
+
+def percentile(values: list, pct: float) -> float:
+    """nearest-rank 백분위수"""
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def print_report(last: int, backend: str = "live"):
+    """최근 실행 기록 요약: Step별 p50/p95 소요 시간, 사용량, 실패 원인 (기본: live 백엔드 실행만)"""
+    records = load_ledger(last, backend)
+    if not records:
+        print(f"ℹ️  {backend} 실행 기록이 없습니다 ({LEDGER_PATH.relative_to(BASE_DIR)})")
+        return
+
+    outcomes = {}
+    for record in records:
+        outcomes[record.get("outcome", "unknown")] = outcomes.get(record.get("outcome", "unknown"), 0) + 1
+
     print("\n" + "="*70)
-    print("🎯 AI 블로그 자동화 파이프라인 시작")
+    print(f"📊 최근 {len(records)}회 실행 리포트 ({backend})")
     print("="*70)
-    
-    steps = [
-        ("Step 1: Trend & Topic Agent", "automation/step1_topic_agent.py"),
-        ("Step 2: Writer & Art Director Agent", "automation/step2_writer_agent.py"),
-        ("Step 3: Image Generation & Vision Audit Agent", "automation/step3_image_audit_agent.py"),
-        ("Step 4: Save to data.json", "automation/step4_save_to_data_json.py"),
-    ]
-    
-    for i, (step_name, script_path) in enumerate(steps, 1):
-        success = run_step(step_name, script_path)
+    print("   " + " / ".join(f"{outcome}: {count}" for outcome, count in sorted(outcomes.items())))
+
+    # Step별 소요 시간 (체크포인트로 건너뛴 Step 제외)
+    step_times = {key: [] for key in STEP_KEYS.values()}
+    for record in records:
+        for job in record.get("jobs", []):
+            for key, seconds in job.get("steps", {}).items():
+                step_times.setdefault(key, []).append(seconds)
+
+    print("\n⏱️ Step별 소요 시간 (p50 / p95 / 최대, 표본 수)")
+    slowest = None
+    for step_name, key in STEP_KEYS.items():
+        values = step_times.get(key, [])
+        if not values:
+            print(f"   • {step_name}: 기록 없음")
+            continue
+        p50 = percentile(values, 50)
+        print(f"   • {step_name}: {p50:.1f}초 / {percentile(values, 95):.1f}초 / "
+              f"{max(values):.1f}초 ({len(values)}회)")
+        if slowest is None or p50 > slowest[1]:
+            slowest = (step_name, p50)
+    if slowest:
+        print(f"\n   🐢 가장 오래 걸리는 단계: {slowest[0]} (p50 {slowest[1]:.1f}초)")
+
+    first_sections = [job["first_section"] for record in records for job in record.get("jobs", [])
+                      if job.get("first_section") is not None]
+    if first_sections:
+        print(f"   ⚡ Step 2 첫 섹션까지: p50 {percentile(first_sections, 50):.1f}초 / "
+              f"p95 {percentile(first_sections, 95):.1f}초 ({len(first_sections)}회)")
+
+    # 실행당 평균 사용량
+    totals = {}
+    counted = [record for record in records if "counters" in record]
+    for record in counted:
+        for name, value in record["counters"].items():
+            totals[name] = totals.get(name, 0) + value
+    if totals:
+        print("\n🧮 실행당 평균 사용량")
+        for name in sorted(totals):
+            average = totals[name] / len(counted)
+            if name == "image_bytes":
+                print(f"   • {name}: {average / 1024 / 1024:.2f} MB")
+            else:
+                print(f"   • {name}: {average:.1f}")
+
+    # 용도·모델별 토큰 사용량 (실행 기록 기준) + 날짜별 누적 (llm_usage.json)
+    import pipeline_metrics
+    usage = {}
+    for record in records:
+        pipeline_metrics.merge_usage(usage, record.get("llm_usage", {}))
+    pipeline_metrics.print_usage(usage, f"최근 {len(records)}회 실행 LLM 토큰 사용량")
+
+    # 작업·모델별 지연 (실행별 p50의 중앙값, 실행별 p95의 최대)
+    routes = {}
+    for record in records:
+        for name, entry in record.get("model_routes", {}).items():
+            merged = routes.setdefault(name, {"calls": 0, "p50s": [], "p95s": [], "slo_breaches": 0,
+                                              "quota_fallbacks": 0})
+            merged["calls"] += entry["calls"]
+            merged["slo_breaches"] += entry.get("slo_breaches", 0)
+            merged["quota_fallbacks"] += entry.get("quota_fallbacks", 0)
+            if entry["calls"]:
+                merged["p50s"].append(entry["p50_seconds"])
+                merged["p95s"].append(entry["p95_seconds"])
+    if routes:
+        from model_router import print_route_stats
+        print_route_stats({
+            name: {
+                "calls": entry["calls"],
+                "p50_seconds": percentile(entry["p50s"], 50) if entry["p50s"] else 0.0,
+                "p95_seconds": max(entry["p95s"], default=0.0),
+                "slo_breaches": entry["slo_breaches"],
+                "quota_fallbacks": entry["quota_fallbacks"]
+            }
+            for name, entry in sorted(routes.items())
+        }, f"최근 {len(records)}회 실행 모델 라우팅 지연 (실행별 p50 중앙값 / 최대 p95)")
+
+    # 용도·모델별 현재 적응형 타임아웃 (llm_latency_state.json 표본 기준)
+    from adaptive_timeout import AdaptiveTimeouts
+    timeouts = AdaptiveTimeouts.from_config(load_config())
+    timeout_summary = timeouts.summary() if timeouts is not None else {}
+    if timeout_summary:
+        print("\n⏱️ LLM 응답 시간과 적응형 타임아웃 (p50 / p95 → 제한 시간, 표본 수)")
+        for name, entry in timeout_summary.items():
+            print(f"   • {name}: {entry['p50_seconds']:.1f}초 / {entry['p95_seconds']:.1f}초 → "
+                  f"{entry['timeout_seconds']:.0f}초 ({entry['samples']}회)")
+    hedges = totals.get("llm_hedges", 0)
+    if hedges:
+        print(f"   🪃 헤지 요청 {hedges:.0f}회, 헤지 응답 채택 {totals.get('llm_hedge_wins', 0):.0f}회")
+
+    daily = pipeline_metrics.load_daily_usage()
+    if daily:
+        print("\n📅 날짜별 LLM 사용량 (최근 7일)")
+        for day in sorted(daily)[-7:]:
+            entries = daily[day]
+            tokens = sum(entry["prompt_tokens"] + entry["output_tokens"] for entry in entries.values())
+            cost = sum(entry["cost_usd"] for entry in entries.values())
+            calls = sum(entry["calls"] for entry in entries.values())
+            top = max(entries, key=lambda name: entries[name]["prompt_tokens"] + entries[name]["output_tokens"])
+            print(f"   • {day}: {calls:.0f}회, {tokens:,.0f} 토큰, 약 ${cost:.4f} (최다: {top})")
+
+    hits = totals.get("llm_cache_hits", 0)
+    lookups = hits + totals.get("llm_cache_misses", 0)
+    if lookups:
+        print(f"\n💾 LLM 응답 캐시 적중률: {hits / lookups * 100:.0f}% ({hits:.0f}/{lookups:.0f})")
+
+    image_hits = totals.get("image_cache_hits", 0)
+    image_lookups = image_hits + totals.get("image_cache_misses", 0)
+    if image_lookups:
+        from image_cache import ImageCache
+        cache = ImageCache.from_config(load_config())
+        stored = ""
+        if cache is not None:
+            cache_stats = cache.stats()
+            stored = f", 저장 {cache_stats['entries']}장 / {cache_stats['bytes'] / 1024 / 1024:.1f} MB"
+        print(f"🖼️ 이미지 캐시 적중률: {image_hits / image_lookups * 100:.0f}% "
+              f"({image_hits:.0f}/{image_lookups:.0f}{stored})")
+
+    # 재호출률 = 재호출 수 / 받은 JSON 응답 수 (outline 모드는 아웃라인·섹션 요청마다 응답 1개 이상)
+    writer_counters = [record["counters"] for record in counted if "writer_json_responses" in record["counters"]]
+    responses = sum(counters["writer_json_responses"] for counters in writer_counters)
+    if responses:
+        recalls = sum(counters.get("writer_recalls", 0) for counters in writer_counters)
+        repairs = sum(counters.get("writer_json_repairs", 0) for counters in writer_counters)
+        print(f"🩹 Writer JSON 로컬 복구 {repairs:.0f}회, "
+              f"재호출률 {recalls / responses * 100:.0f}% ({recalls:.0f}/{responses:.0f} 응답)")
+
+    # 실패 원인
+    causes = {}
+    for record in records:
+        for failure in record.get("failures", []):
+            key = f"{failure.get('step', '?')} · {failure.get('cause', '?')}"
+            causes[key] = causes.get(key, 0) + 1
+    if causes:
+        print("\n❌ 실패 원인")
+        for key, count in sorted(causes.items(), key=lambda item: -item[1]):
+            print(f"   • {key}: {count}회")
+
+    print("\n🗂️ 최근 실행")
+    for record in records[-10:]:
+        steps = {}
+        for job in record.get("jobs", []):
+            for key, seconds in job.get("steps", {}).items():
+                steps[key] = max(steps.get(key, 0), seconds)
+        step_text = ", ".join(f"{key} {seconds:.0f}s" for key, seconds in sorted(steps.items()))
+        print(f"   • {record.get('run_id')} [{record.get('outcome')}] "
+              f"{record.get('wall_seconds', 0):.0f}초 ({step_text or '-'})")
+
+
+def measure_interpreter_startup() -> float:
+    """빈 파이썬 인터프리터 1회 기동 시간 (초)"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=False)
+    return time.perf_counter() - start
+
+
+class PipelineStepError(Exception):
+    """특정 Step에서 파이프라인이 중단됨"""
+
+    def __init__(self, step_name: str, script_path: str, cause: Exception):
+        super().__init__(f"{step_name}: {cause}")
+        self.step_name = step_name
+        self.script_path = script_path
+
+
+class PipelineJob:
+    """파이프라인 1회분 (중간 결과 저장 위치 + Step별 실행 기록)"""
+
+    def __init__(self, job_id: str, output_dir: str, manual_topic: str = None, manual_content: str = None):
+        self.job_id = job_id
+        self.output_dir = output_dir
+        # 수동 주제/본문 (None이면 MANUAL_TOPIC / MANUAL_CONTENT 환경변수)
+        self.manual_topic = (os.getenv('MANUAL_TOPIC', '') if manual_topic is None else manual_topic).strip()
+        self.manual_content = (os.getenv('MANUAL_CONTENT', '') if manual_content is None else manual_content).strip()
+        self.timings = {}
+        self.skipped = []
+        # Step 2 스트리밍 중 이미지 생성을 미리 시작한 Step 3 Agent
+        self.image_agent = None
+        # Step 2 요청 후 첫 섹션을 받기까지 걸린 시간 (초)
+        self.first_section_seconds = None
+
+    def output_path(self, index: int) -> str:
+        return f"{self.output_dir}/{STEP_OUTPUT_NAMES[index]}"
+
+    @property
+    def label(self) -> str:
+        return "" if self.job_id == "main" else f"[{self.job_id}] "
+
+
+class PipelineRunner:
+    """Step 1~4를 한 프로세스에서 실행하는 러너"""
+
+    def __init__(self, resume: bool = False, overlap_images: bool = True):
+        """
+        Step 모듈 import 및 Gemini 클라이언트 1회 설정
         
+        Args:
+            resume: 입력 해시가 일치하는 중간 결과가 있으면 해당 Step 생략
+            overlap_images: Step 2를 스트리밍으로 받으며 이미지 생성을 미리 시작
+        """
+        self.resume = resume
+        self.overlap_images = overlap_images
+        start = time.perf_counter()
+
+        import backends
+        import pipeline_metrics
+        from llm_client import create_client
+        from service_limits import configure_limits
+        from step1_topic_agent import TopicAgent
+        from step2_writer_agent import WriterAgent
+        from step3_image_audit_agent import ImageAuditAgent
+        from step4_save_to_data_json import DataSaver
+
+        self.import_seconds = time.perf_counter() - start
+
+        self.pipeline_metrics = pipeline_metrics
+        pipeline_metrics.reset()
+        self.TopicAgent = TopicAgent
+        self.WriterAgent = WriterAgent
+        self.ImageAuditAgent = ImageAuditAgent
+        self.DataSaver = DataSaver
+
+        # 공유 클라이언트: 키 로드와 키별 모델 풀은 여기서 한 번만 (모든 Agent/배치 작업이 공유)
+        start = time.perf_counter()
+        self.config = load_config()
+        configure_limits(self.config.get("service_limits", {}))
+        self.backend = backends.backend_name()
+        self.client = create_client(self.config)
+        for key_index in range(len(self.client.api_keys)):
+            self.client.model(key_index)
+        self.setup_seconds = time.perf_counter() - start
+
+        self.jobs = []
+        # 배치 모드: 주제 선정은 직렬화하여 같은 배치 안의 제목 중복 방지
+        self._topic_lock = threading.Lock()
+        # 상주 워커에서 무한히 쌓이지 않도록 최근 제목만 유지 (저장된 글은 data.json에서 확인)
+        self.batch_titles = deque(maxlen=BATCH_TITLE_WINDOW)
+        self._save_lock = threading.Lock()
+
+        print(f"✅ 파이프라인 초기화 완료 (import {self.import_seconds:.2f}초, 키 {len(self.client.api_keys)}개, "
+              f"백엔드 {self.backend})")
+
+    def _timed(self, job: PipelineJob, step_name: str, func, *args):
+        print("\n" + "="*70)
+        print(f"🚀 {job.label}{step_name} 실행 시작")
+        print("="*70)
+
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            job.timings[step_name] = time.perf_counter() - start
+
+    def step1_topic(self, job: PipelineJob, _, input_hash: str) -> dict:
+        """Step 1: 주제 선정 (수동 주제가 있으면 그대로 사용)"""
+        manual_topic = job.manual_topic
+        if manual_topic:
+            print(f"📝 수동 주제 모드: {manual_topic}")
+            result = {
+                "title": manual_topic,
+                "search_keywords": [manual_topic],
+                "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "agent": "manual",
+                "input_hash": input_hash
+            }
+            save_json(result, job.output_path(0))
+            return result
+
+        agent = self.TopicAgent(client=self.client)
+        with self._topic_lock:
+            result = agent.generate_topic(extra_titles=list(self.batch_titles))
+
+            if not result.get('title') or result.get('fallback'):
+                raise Exception("유효한 주제가 생성되지 않았습니다")
+            self.batch_titles.append(result['title'])
+
+        result["input_hash"] = input_hash
+        agent.save_output(result, job.output_path(0))
+        return result
+
+    def _image_agent(self):
+        return self.ImageAuditAgent(client=self.client,
+                                    reuse_existing_images=self.resume)
+
+    def step2_write(self, job: PipelineJob, topic: dict, input_hash: str) -> dict:
+        """Step 2: 구조화된 본문 작성 (overlap_images면 이미지 플레이스홀더를 즉시 Step 3로 전달)"""
+        agent = self.WriterAgent(client=self.client)
+        if self.overlap_images:
+            job.image_agent = self._image_agent()
+        stream = agent.stream_sections(topic['title'], manual_content=job.manual_content)
+        try:
+            for index, section in enumerate(stream):
+                if job.image_agent:
+                    job.image_agent.prefetch(section, index)
+        except BaseException:
+            # 본문 작성 실패: 대기 중인 선행 이미지 작업 취소 (재시도하면 새 에이전트로 다시 시작)
+            if job.image_agent:
+                job.image_agent._shutdown_prefetch()
+                job.image_agent = None
+            raise
+        job.first_section_seconds = stream.time_to_first_section
+        result = stream.result
+        result["input_hash"] = input_hash
+        agent.save_output(result, job.output_path(1))
+        return result
+
+    def step3_images(self, job: PipelineJob, content: dict, input_hash: str) -> dict:
+        """Step 3: 이미지 생성 및 검수 (--resume 시 이미 생성된 이미지는 재사용)"""
+        agent = job.image_agent or self._image_agent()
+        job.image_agent = None
+        result = agent.process_content_with_images(content)
+        result["input_hash"] = input_hash
+        agent.save_output(result, job.output_path(2))
+        return result
+
+    def step4_save(self, job: PipelineJob, validated: dict, input_hash: str) -> dict:
+        """Step 4: data.json / Markdown 저장 (워커의 동시 작업끼리 data.json 갱신 직렬화)"""
+        with self._save_lock:
+            file_path = self.DataSaver().run(validated)
+        if not file_path:
+            raise Exception("Markdown 저장 실패")
+        return self._save_step4_checkpoint(job, file_path, input_hash)
+
+    def _save_step4_checkpoint(self, job: PipelineJob, file_path: Path, input_hash: str) -> dict:
+        result = {
+            "file_path": os.path.relpath(file_path, BASE_DIR),
+            "saved_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "input_hash": input_hash
+        }
+        save_json(result, job.output_path(3))
+        return result
+
+    def step_inputs(self, job: PipelineJob, index: int, data) -> dict:
+        """Step별 입력 해시 대상 (Step 1은 날짜/수동 주제, 이후는 이전 Step 출력)"""
+        if index == 0:
+            return {
+                "manual_topic": job.manual_topic,
+                "date": datetime.now().strftime('%Y-%m-%d')
+            }
+        if index == 1:
+            return {
+                "title": data["title"],
+                "manual_content": job.manual_content
+            }
+        return data
+
+    def _reuse_checkpoint(self, job: PipelineJob, index: int, input_hash: str):
+        """--resume 시 입력 해시가 일치하는 중간 결과 반환"""
+        if not self.resume:
+            return None
+        cached = load_checkpoint(job.output_path(index), input_hash)
+        if cached is not None:
+            step_name = STEPS[index][0]
+            print(f"\n⏩ {job.label}{step_name}: 체크포인트 재사용 ({job.output_path(index)})")
+            job.skipped.append(step_name)
+        return cached
+
+    def run_job(self, job: PipelineJob, last_step: int = len(STEPS)) -> dict:
+        """
+        한 파이프라인 체인 실행 (실패 시 PipelineStepError)
+
+        Args:
+            job: 실행 단위 (중간 결과 디렉토리)
+            last_step: 마지막으로 실행할 Step 번호 (배치 모드는 3까지만 실행 후 일괄 저장)
+        """
+        self.jobs.append(job)
+        step_funcs = [self.step1_topic, self.step2_write, self.step3_images, self.step4_save]
+
+        data = None
+        for i, ((step_name, script_path), func) in enumerate(zip(STEPS[:last_step], step_funcs)):
+            input_hash = compute_input_hash(self.step_inputs(job, i, data))
+
+            cached = self._reuse_checkpoint(job, i, input_hash)
+            if cached is not None:
+                data = cached
+                if i == 0:
+                    with self._topic_lock:
+                        self.batch_titles.append(data['title'])
+                continue
+
+            try:
+                data = self._timed(job, step_name, func, job, data, input_hash)
+            except Exception as e:
+                raise PipelineStepError(step_name, script_path, e) from e
+
+            print(f"\n✅ {job.label}{i + 1}/{len(STEPS)} 단계 완료 ({job.timings[step_name]:.1f}초)")
+
+        return data
+
+    def run(self) -> dict:
+        """전체 파이프라인 1회 실행 (기존 중간 결과 경로 사용)"""
+        return self.run_job(PipelineJob("main", INTERMEDIATE_DIR))
+
+    def run_batch(self, count: int) -> dict:
+        """
+        N개의 글을 동시에 생성 (Step 1~3은 병렬, Step 4는 마지막에 한 번에 저장)
+
+        Returns:
+            {"saved": [Markdown 경로...], "failed": {job_id: PipelineStepError}}
+        """
+        jobs = [PipelineJob(f"job_{k}", f"{INTERMEDIATE_DIR}/batch/job_{k}") for k in range(1, count + 1)]
+        validated = {}
+        failed = {}
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = {executor.submit(self.run_job, job, 3): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    validated[job.job_id] = future.result()
+                except PipelineStepError as e:
+                    failed[job.job_id] = e
+                    print(f"\n❌ [{job.job_id}] {e}")
+
+        # Step 4: 성공한 글을 한 번에 저장 (data.json 1회 갱신)
+        step_name = STEPS[3][0]
+        pending = []
+        saved = []
+        for job in jobs:
+            if job.job_id not in validated:
+                continue
+            input_hash = compute_input_hash(self.step_inputs(job, 3, validated[job.job_id]))
+            cached = self._reuse_checkpoint(job, 3, input_hash)
+            if cached is not None:
+                saved.append(cached["file_path"])
+            else:
+                pending.append((job, input_hash))
+
+        if pending:
+            batch_job = PipelineJob("batch", f"{INTERMEDIATE_DIR}/batch")
+            try:
+                file_paths = self._timed(batch_job, step_name, self.DataSaver().run_batch,
+                                         [validated[job.job_id] for job, _ in pending])
+            except Exception as e:
+                raise PipelineStepError(step_name, STEPS[3][1], e) from e
+            for (job, input_hash), file_path in zip(pending, file_paths):
+                job.timings[step_name] = batch_job.timings[step_name]
+                saved.append(self._save_step4_checkpoint(job, file_path, input_hash)["file_path"])
+
+        return {"saved": saved, "failed": failed}
+
+    def ledger_jobs(self, jobs: list = None) -> list:
+        """실행 기록용 Job별 Step 소요 시간"""
+        return [
+            {
+                "job_id": job.job_id,
+                "steps": {STEP_KEYS[name]: round(seconds, 3) for name, seconds in job.timings.items()},
+                "skipped": [STEP_KEYS[name] for name in job.skipped],
+                "first_section": (round(job.first_section_seconds, 3)
+                                  if job.first_section_seconds is not None else None)
+            }
+            for job in (self.jobs if jobs is None else jobs)
+        ]
+
+    def print_startup_report(self):
+        """서브프로세스 방식 대비 절약된 기동 시간 출력"""
+        interpreter = measure_interpreter_startup()
+        runs = max(1, len(self.jobs))
+        saved = (runs * len(STEPS) * interpreter
+                 + (runs * GENAI_STEPS - 1) * (self.import_seconds + self.setup_seconds))
+
+        print("\n⏱️ 실행 시간:")
+        for job in self.jobs:
+            for step_name, seconds in job.timings.items():
+                print(f"   • {job.label}{step_name}: {seconds:.1f}초")
+            for step_name in job.skipped:
+                print(f"   • {job.label}{step_name}: 체크포인트 재사용")
+        print(f"\n⚡ 기동 시간 절약 (서브프로세스 방식 대비): 약 {saved:.2f}초")
+        print(f"   • 인터프리터 기동 {interpreter:.2f}초 × {runs * len(STEPS)}회 생략")
+        print(f"   • import/클라이언트 설정 {self.import_seconds + self.setup_seconds:.2f}초 × {runs * GENAI_STEPS - 1}회 생략")
+
+
+def run_subprocess_pipeline():
+    """기존 방식: Step마다 별도 프로세스 실행"""
+    for i, (step_name, script_path) in enumerate(STEPS, 1):
+        success = run_step(step_name, script_path)
+
         if not success:
             print("\n" + "="*70)
             print(f"❌ 파이프라인 실패: {step_name}에서 중단됨")
@@ -62,9 +679,361 @@ def main():
             print(f"\n재실행 방법:")
             print(f"   python {script_path}")
             sys.exit(1)
-        
-        print(f"\n✅ {i}/{len(steps)} 단계 완료")
-    
+
+        print(f"\n✅ {i}/{len(STEPS)} 단계 완료")
+
+
+def failure_entry(error: BaseException, job_id: str = None) -> dict:
+    """실행 기록용 실패 정보"""
+    cause = error.__cause__ if isinstance(error, PipelineStepError) and error.__cause__ else error
+    entry = {
+        "step": STEP_KEYS.get(getattr(error, "step_name", None), "init"),
+        "cause": classify_error(cause),
+        "error": str(cause)[:300]
+    }
+    if job_id:
+        entry["job_id"] = job_id
+    return entry
+
+
+def run_inprocess_pipeline(resume: bool = False, count: int = 1, overlap_images: bool = True):
+    """한 프로세스에서 전체 파이프라인 실행 (count > 1이면 배치 모드)"""
+    import backends
+
+    # Step 스크립트와 동일하게 저장소 루트 기준 상대 경로 사용
+    os.chdir(BASE_DIR)
+
+    started = time.perf_counter()
+    record = {
+        "run_id": f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}",
+        "started_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "mode": "batch" if count > 1 else "single",
+        "count": count,
+        "resume": resume,
+        "overlap_images": overlap_images,
+        "backend": backends.backend_name(),
+        "outcome": "success",
+        "failures": []
+    }
+    runner = None
+
+    def finish_record():
+        record["finished_at"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        record["wall_seconds"] = round(time.perf_counter() - started, 3)
+        if runner is not None:
+            record["startup"] = {
+                "import_seconds": round(runner.import_seconds, 3),
+                "setup_seconds": round(runner.setup_seconds, 3)
+            }
+            record["jobs"] = runner.ledger_jobs()
+            record["counters"] = runner.pipeline_metrics.snapshot()
+            record["llm_usage"] = runner.pipeline_metrics.usage_summary()
+            runner.pipeline_metrics.print_usage(record["llm_usage"], "이번 실행 LLM 토큰 사용량")
+            runner.pipeline_metrics.save_daily_usage()
+            runner.client.save_state()
+            if runner.client.router is not None:
+                from model_router import print_route_stats
+                record["model_routes"] = runner.client.router.stats()
+                print_route_stats(record["model_routes"])
+        append_ledger(record)
+
+    try:
+        runner = PipelineRunner(resume=resume, overlap_images=overlap_images)
+        if count > 1:
+            batch = runner.run_batch(count)
+        else:
+            runner.run()
+    except PipelineStepError as e:
+        record["outcome"] = "failed"
+        record["failures"].append(failure_entry(e))
+        finish_record()
+        print(f"\n❌ {e.step_name} 실패: {e.__cause__}")
+        import traceback
+        traceback.print_exc()
+        print("\n" + "="*70)
+        print(f"❌ 파이프라인 실패: {e.step_name}에서 중단됨")
+        print("="*70)
+        print(f"\n재실행 방법 (완료된 Step 건너뛰기):")
+        print(f"   python automation/run_pipeline.py --resume" + (f" --count {count}" if count > 1 else ""))
+        sys.exit(1)
+    except Exception as e:
+        record["outcome"] = "failed"
+        record["failures"].append(failure_entry(e))
+        finish_record()
+        print(f"\n❌ 파이프라인 초기화 실패: {e}")
+        sys.exit(1)
+
+    if count > 1:
+        record["failures"] = [failure_entry(e, job_id) for job_id, e in batch['failed'].items()]
+        if not batch['saved']:
+            record["outcome"] = "failed"
+        elif batch['failed']:
+            record["outcome"] = "partial"
+    finish_record()
+
+    runner.print_startup_report()
+
+    if count > 1:
+        print(f"\n📦 배치 결과: {len(batch['saved'])}/{count}개 저장")
+        for file_path in batch['saved']:
+            print(f"   ✅ {file_path}")
+        for job_id, error in batch['failed'].items():
+            print(f"   ❌ {job_id}: {error}")
+        if not batch['saved']:
+            sys.exit(1)
+        if batch['failed']:
+            print(f"\n재실행 방법 (실패한 글만 다시 생성):")
+            print(f"   python automation/run_pipeline.py --resume --count {count}")
+
+
+def print_quota_status():
+    """API 키별 오늘 요청 수, 분당 여유, 다시 요청 가능해질 때까지 예상 시간"""
+    from key_scheduler import KeyScheduler
+    from llm_client import load_api_keys
+
+    config = load_config()
+    api_keys = load_api_keys(config)
+    # 기본 모델 + 모델별 한도가 따로 지정된 모델 (한도는 모델마다 따로 집계)
+    schedulers = [KeyScheduler.from_config(api_keys, config)]
+    for model_name in config.get("key_quota", {}).get("models", {}):
+        schedulers.append(KeyScheduler.from_config(api_keys, config, model_name))
+    for scheduler in schedulers:
+        scope = f" [{scheduler.scope}]" if scheduler.scope else ""
+        print(f"🔑 API 키 할당량{scope} (RPM {scheduler.rpm or '∞'} / TPM {scheduler.tpm or '∞'} / RPD {scheduler.rpd or '∞'})")
+        for row in scheduler.status():
+            wait = "즉시 가능" if row["wait_seconds"] <= 0 else f"{row['wait_seconds'] / 60:.1f}분 후 가능"
+            print(f"   • 키 #{row['key']} ({row['fingerprint']}): 오늘 {row['day_requests']}건, "
+                  f"RPM 여유 {row['rpm_available']}, TPM 여유 {row['tpm_available']} → {wait}")
+
+
+def print_queue_status(queue):
+    """작업 큐 상태: 상태별 작업 수, 최근 완료 작업의 대기/전체 소요 시간"""
+    counts = queue.counts()
+    print(f"📬 큐: 대기 {counts['queued']} / 실행 중 {counts['running']} / "
+          f"완료 {counts['done']} / 실패 {counts['failed']}")
+    latencies = queue.latencies()
+    if latencies:
+        waits = [item["wait"] for item in latencies]
+        totals = [item["total"] for item in latencies]
+        print(f"   ⏱️ 최근 {len(latencies)}건 대기 p50 {percentile(waits, 50):.1f}초 / p95 {percentile(waits, 95):.1f}초, "
+              f"완료까지 p50 {percentile(totals, 50):.1f}초 / p95 {percentile(totals, 95):.1f}초")
+
+
+def enqueue_jobs(queue_path: str, count: int, manual_topic: str, manual_content: str, max_attempts: int):
+    """작업 큐에 count개 작업 추가"""
+    from job_queue import JobQueue
+
+    queue = JobQueue(queue_path)
+    for _ in range(count):
+        job_id = queue.enqueue(manual_topic, manual_content, max_attempts=max_attempts)
+        mode = f"수동 주제: {manual_topic}" if manual_topic else "자동 주제"
+        print(f"➕ 작업 #{job_id} 추가 ({mode}{', 수동 본문' if manual_content else ''})")
+    print_queue_status(queue)
+
+
+def run_worker(queue_path: str = None, concurrency: int = 2, idle_exit: bool = False,
+               poll_interval: float = 5.0, retry_delay: float = 30.0, overlap_images: bool = True):
+    """
+    상주 워커: Gemini 클라이언트와 HTTP 연결을 유지한 채 작업 큐를 계속 처리
+
+    Args:
+        concurrency: 동시에 실행할 작업 수 (외부 API 동시 요청은 service_limits가 별도 제한)
+        idle_exit: 대기 작업이 없으면 종료 (CI/일회성 소진용)
+        poll_interval: 빈 큐 확인 간격 (초)
+        retry_delay: 실패 작업 재시도 지연 (시도마다 2배)
+    """
+    import backends
+    from job_queue import DEFAULT_LEASE_SECONDS, JobQueue
+
+    os.chdir(BASE_DIR)
+    queue = JobQueue(queue_path)
+    # 임대 만료 전에 여러 번 갱신되도록
+    heartbeat_interval = DEFAULT_LEASE_SECONDS / 5
+
+    def recover_stale_jobs():
+        recovered = queue.requeue_running(DEFAULT_LEASE_SECONDS)
+        if recovered["requeued"]:
+            print(f"♻️ 중단됐던 작업 {recovered['requeued']}건을 대기열로 복구")
+        if recovered["failed"]:
+            print(f"❌ 중단됐던 작업 {recovered['failed']}건은 시도 횟수를 모두 써서 최종 실패 처리")
+
+    recover_stale_jobs()
+
+    # 재시도 시 완료된 Step은 작업별 체크포인트로 건너뜀
+    runner = PipelineRunner(resume=True, overlap_images=overlap_images)
+    print(f"👷 워커 시작 (동시 작업 {concurrency}개, 큐: {queue.path})")
+    print_queue_status(queue)
+
+    stop = threading.Event()
+
+    def request_stop(signum, _frame):
+        if not stop.is_set():
+            print(f"\n🛑 종료 신호 수신: 실행 중인 작업 완료 후 종료합니다")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    running = {}
+    last_heartbeat = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            if time.monotonic() - last_heartbeat >= heartbeat_interval:
+                queue.heartbeat([row["id"] for row, *_ in running.values()])
+                # 다른 워커가 비정상 종료하며 남긴 작업도 복구
+                recover_stale_jobs()
+                last_heartbeat = time.monotonic()
+
+            while not stop.is_set() and len(running) < concurrency:
+                row = queue.claim()
+                if row is None:
+                    break
+                # 재시도용 체크포인트 디렉토리 (큐를 새로 만들어 ID가 겹쳐도 섞이지 않도록 추가 시각 포함)
+                job = PipelineJob(f"q{row['id']}",
+                                  f"{INTERMEDIATE_DIR}/queue/job_{row['id']}_{int(row['enqueued_at'])}",
+                                  manual_topic=row["manual_topic"], manual_content=row["manual_content"])
+                print(f"\n▶️ 작업 #{row['id']} 시작 (시도 {row['attempts']}/{row['max_attempts']})")
+                running[executor.submit(runner.run_job, job)] = (row, job, time.perf_counter(), datetime.now())
+
+            if not running:
+                if stop.is_set() or (idle_exit and queue.counts()["queued"] == 0):
+                    break
+                stop.wait(min(poll_interval, heartbeat_interval))
+                continue
+
+            done, _ = wait(running, timeout=min(poll_interval, heartbeat_interval), return_when=FIRST_COMPLETED)
+            for future in done:
+                row, job, started, started_at = running.pop(future)
+                runner.jobs.remove(job)
+                record = {
+                    "run_id": f"worker-{os.getpid()}-job{row['id']}-{row['attempts']}",
+                    "started_at": started_at.strftime('%Y-%m-%d %H:%M:%S'),
+                    "finished_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "wall_seconds": round(time.perf_counter() - started, 3),
+                    "mode": "worker",
+                    "count": 1,
+                    "resume": True,
+                    "overlap_images": overlap_images,
+                    "backend": backends.backend_name(),
+                    "outcome": "success",
+                    "failures": [],
+                    "jobs": runner.ledger_jobs([job])
+                }
+                try:
+                    file_path = future.result()["file_path"]
+                except Exception as e:
+                    record["outcome"] = "failed"
+                    record["failures"].append(failure_entry(e, job.job_id))
+                    delay = retry_delay * 2 ** (row["attempts"] - 1)
+                    if queue.fail(row["id"], str(e)[:500], retry_delay=delay):
+                        print(f"\n⚠️ 작업 #{row['id']} 실패, {delay:.0f}초 후 재시도: {e}")
+                    else:
+                        print(f"\n❌ 작업 #{row['id']} 최종 실패: {e}")
+                else:
+                    queue.complete(row["id"], file_path)
+                    shutil.rmtree(job.output_dir, ignore_errors=True)
+                    print(f"\n✅ 작업 #{row['id']} 완료: {file_path} ({record['wall_seconds']:.1f}초)")
+                # 작업마다 카운터/호출 기록을 꺼내고 초기화 (동시 작업이 겹치면 그 사이 호출은 먼저 끝난 작업에 포함)
+                counters, calls = runner.pipeline_metrics.drain()
+                record["counters"] = counters
+                record["llm_usage"] = runner.pipeline_metrics.usage_summary(calls)
+                append_ledger(record)
+                runner.pipeline_metrics.save_daily_usage(call_list=calls)
+                runner.client.save_state()
+                print_queue_status(queue)
+
+    print("\n👋 워커 종료")
+    print_queue_status(queue)
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="AI 블로그 자동화 파이프라인")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Step마다 별도 프로세스로 실행 (기존 방식)")
+    parser.add_argument("--resume", action="store_true",
+                        help="입력이 같은 Step의 중간 결과를 재사용 (실패 지점부터 재실행)")
+    parser.add_argument("--no-overlap", action="store_true",
+                        help="Step 2 완료 후에 이미지 생성 시작 (스트리밍 선행 생성 끄기)")
+    parser.add_argument("--count", type=int, default=1,
+                        help="한 번에 생성할 글 수 (2 이상이면 동시 실행 후 data.json 일괄 저장)")
+    parser.add_argument("--report", action="store_true",
+                        help="실행 기록(pipeline_runs.jsonl) 요약 출력 후 종료")
+    parser.add_argument("--last", type=int, default=20,
+                        help="--report에서 집계할 최근 실행 수 (기본 20)")
+    parser.add_argument("--backend", choices=["live", "fake", "all"], default="live",
+                        help="--report에서 집계할 실행의 백엔드 (기본 live, fake 벤치마크 제외)")
+
+    queue_group = parser.add_argument_group("작업 큐 / 상주 워커")
+    queue_group.add_argument("--enqueue", action="store_true",
+                             help="작업 큐에 --count개 작업 추가 후 종료 (수동 주제/본문은 --topic/--content-file 또는 "
+                                  "MANUAL_TOPIC/MANUAL_CONTENT)")
+    queue_group.add_argument("--topic", default=None, help="--enqueue 작업의 수동 주제")
+    queue_group.add_argument("--content-file", default=None, help="--enqueue 작업의 수동 본문 파일")
+    queue_group.add_argument("--max-attempts", type=int, default=3, help="작업당 최대 시도 횟수 (기본 3)")
+    queue_group.add_argument("--worker", action="store_true", help="작업 큐를 계속 처리하는 상주 워커 실행")
+    queue_group.add_argument("--concurrency", type=int, default=2, help="워커 동시 작업 수 (기본 2)")
+    queue_group.add_argument("--idle-exit", action="store_true", help="대기 작업이 없으면 워커 종료")
+    queue_group.add_argument("--poll-interval", type=float, default=5.0, help="빈 큐 확인 간격 초 (기본 5)")
+    queue_group.add_argument("--retry-delay", type=float, default=30.0,
+                             help="실패 작업 재시도 지연 초, 시도마다 2배 (기본 30)")
+    queue_group.add_argument("--queue-status", action="store_true", help="작업 큐 상태 출력 후 종료")
+    queue_group.add_argument("--queue", default=None, help="작업 큐 SQLite 경로 (기본 automation/pipeline_queue.db)")
+    parser.add_argument("--quota-status", action="store_true",
+                        help="API 키별 할당량 사용 현황(key_quota_state.json) 출력 후 종료")
+    args = parser.parse_args()
+
+    if args.report:
+        if args.last < 1:
+            parser.error("--last는 1 이상이어야 합니다")
+        print_report(args.last, args.backend)
+        return
+
+    if args.quota_status:
+        print_quota_status()
+        return
+
+    if args.queue_status:
+        from job_queue import JobQueue
+        print_queue_status(JobQueue(args.queue))
+        return
+
+    if args.enqueue:
+        if args.count < 1:
+            parser.error("--count는 1 이상이어야 합니다")
+        manual_topic = args.topic if args.topic is not None else os.getenv('MANUAL_TOPIC', '')
+        manual_content = os.getenv('MANUAL_CONTENT', '')
+        if args.content_file:
+            with open(args.content_file, 'r', encoding='utf-8') as f:
+                manual_content = f.read()
+        enqueue_jobs(args.queue, args.count, manual_topic.strip(), manual_content.strip(), args.max_attempts)
+        return
+
+    if args.worker:
+        if args.concurrency < 1:
+            parser.error("--concurrency는 1 이상이어야 합니다")
+        run_worker(args.queue, concurrency=args.concurrency, idle_exit=args.idle_exit,
+                   poll_interval=args.poll_interval, retry_delay=args.retry_delay,
+                   overlap_images=not args.no_overlap)
+        return
+
+    if args.count < 1:
+        parser.error("--count는 1 이상이어야 합니다")
+    if args.count > 1 and args.subprocess:
+        parser.error("--count는 --subprocess와 함께 사용할 수 없습니다")
+    if args.count > 1 and os.getenv('MANUAL_TOPIC', '').strip():
+        parser.error("MANUAL_TOPIC 사용 시 --count는 1이어야 합니다")
+
+    print("\n" + "="*70)
+    print("🎯 AI 블로그 자동화 파이프라인 시작")
+    print("="*70)
+
+    if args.subprocess:
+        run_subprocess_pipeline()
+    else:
+        run_inprocess_pipeline(resume=args.resume, count=args.count,
+                               overlap_images=not args.no_overlap)
+
     print("\n" + "="*70)
     print("🎉 전체 파이프라인 성공!")
     print("="*70)
@@ -75,7 +1044,7 @@ def main():
     print("   • data.json (업데이트됨)")
     print("   • contents/*.md")
     print("   • automation/generated_images/*.png")
-    
+
     print("\n다음 단계:")
     print("   git add .")
     print("   git commit -m \"🤖 자동 배포: 블로그 빌드 완료\"")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+외부 서비스 동시 요청 제한
+- 프로세스 전체에서 서비스별(gemini, pollinations 등) 동시 요청 수를 제한
+- 배치 모드처럼 여러 파이프라인 체인이 동시에 돌 때 공유 자원 보호
+- 설정: config_ai.json의 "service_limits" (없으면 DEFAULT_LIMITS)
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+DEFAULT_LIMITS = {
+    "gemini": 4,
+    "pollinations": 2,
+}
+
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_limits: Dict[str, int] = dict(DEFAULT_LIMITS)
+_lock = threading.Lock()
+
+
+def configure_limits(limits: Dict[str, int]):
+    """서비스별 최대 동시 요청 수 설정 (요청 시작 전에 호출)"""
+    with _lock:
+        for service, limit in (limits or {}).items():
+            _limits[service] = max(1, int(limit))
+            _semaphores.pop(service, None)
+
+
+def get_limit(service: str) -> int:
+    """서비스의 최대 동시 요청 수"""
+    return _limits.get(service, 1)
+
+
+def _semaphore(service: str) -> threading.BoundedSemaphore:
+    with _lock:
+        if service not in _semaphores:
+            _semaphores[service] = threading.BoundedSemaphore(_limits.get(service, 1))
+        return _semaphores[service]
+
+
+@contextmanager
+def service_slot(service: str):
+    """
+    서비스 요청 슬롯 확보 (슬롯이 없으면 대기)
+
+    사용 예:
+        with service_slot("pollinations"):
+            response = requests.get(url, timeout=60)
+    """
+    semaphore = _semaphore(service)
+    semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
@@ -4,84 +4,198 @@ Step 1: Trend & Topic Agent
 - 블루오션 키워드 발굴
 - 네거티브 필터링 (중복, 저품질 주제 제외)
 - SEO 최적화된 제목 생성
+- 한 번의 요청으로 제목 후보 여러 개를 받아 로컬 점수(길이, 형식, 기존 글과의 유사도, 도구 다양성)로 선택
 """
 
-import google.generativeai as genai
 import json
-import os
+import re
 from datetime import datetime
+from difflib import SequenceMatcher
 from pathlib import Path
 from typing import List
 
+from llm_client import LLMClient, create_client
+
+
+# 토픽 생성 고정 지시문 (호출마다 같으므로 컨텍스트 캐시 대상, 날짜/기존 제목은 generate_topic에서 뒤에 붙임)
+TOPIC_INSTRUCTIONS = """# Role Definition
+당신은 대한민국 IT/Tech 트렌드 분석가입니다.
+특히 **'김이솝', '알린', '닥또리', '소소한 AI 입문 노트'** 등 인기 테크 유튜버들이 다루는 **최신 AI 이슈**를 포착하여, 3040 직장인을 위한 실무 가이드로 재가공하는 능력이 탁월합니다.
+
+# Task
+현재 시점(아래 'Current Context'의 날짜)을 기준으로, **나노바나나, 젠스파크, 제미나이**를 포함하여 **유튜브에서 가장 화제가 되고 있는 최신 AI 툴 중 하나**를 선정하고, 유튜버들의 스타일을 벤치마킹하여 **제목 후보**를 작성하십시오.
+
+# 🔥 Hot Trends Search Scope (검색 및 확장 범위)
+**AI에게 지시: 아래 예시 국한되지 말고, 유사한 카테고리의 최신 'Rising Star' 툴을 적극적으로 포함하십시오.**
+
+**1. [이미지/영상] 나노바나나 & Beyond**
+   - *Core:* 구글 Nano Banana (캐릭터 일관성, 합성).
+   - *Expand:* **Recraft V3** (벡터 생성), **Kling/Runway** (영상), **Midjourney** (최신).
+   - *실무 포인트:* 돈 안 드는 룩북/상세페이지 제작, PPT용 고퀄리티 일러스트.
+
+**2. [검색/에이전트] 젠스파크 & Beyond**
+   - *Core:* GenSpark (AI 에이전트 검색).
+   - *Expand:* **Perplexity** (Deep Research), **OpenAI Operator**, **Arc Search**.
+   - *실무 포인트:* 시장 조사 자동화, 경쟁사 분석 리포트 3분 완성.
+
+**3. [모델/생산성] 제미나이 & Beyond**
+   - *Core:* Gemini 2.0 Flash Thinking (속도/추론).
+   - *Expand:* **DeepSeek V3/R1** (가성비 코딩/글쓰기), **Claude 3.5** (Artifacts), **NotebookLM** (오디오 요약).
+   - *실무 포인트:* 복잡한 엑셀 수식 해결, 논문 팟캐스트로 듣기, 앱 프로토타입.
+
+**4. [시각화/문서] 오피스 꿀툴 (New)**
+   - *Expand:* **Napkin AI** (텍스트 -> 다이어그램), **Gamma** (PPT 자동 생성).
+   - *실무 포인트:* "글만 썼는데 도표가 뚝딱", "기획안 넣으니 PPT 완성".
+
+# Filtering Rules
+1. 기존 제목 중복 제외: 아래 'Current Context'의 기존 제목 목록과 겹치지 않게 선정
+
+2. 선정 금지:
+   - "돈 버는 법", "주식" 등 자극적 수익성 주제
+   - "ChatGPT 가입법" 등 기초 내용
+   - 개발자 전용 (Python 설치, API 키 발급 등)
+
+# 🌟 벤치마킹 스타일 (YouTuber -> Blog)
+유튜버들의 "이거 대박입니다"라는 텐션을 **"직장인의 퇴근 시간 단축"**으로 차분하고 실용적으로 변환하십시오.
+**대상(직장인 등)을 제목 맨 앞에 쓰지 말고**, **도구명**이나 **해결책**을 강조하십시오.
+
+**1. 김이솝 & 알린 스타일 (Trend & Review)**
+   - *특징:* "나노바나나, 미드저니보다 좋은가?", "젠스파크로 구글링 끝"
+   - *전략:* 신기술의 놀라움을 업무 효율로 연결.
+   - *예시:* "Nano Banana, 똥손도 3분 만에 고정 캐릭터 만드는 법"
+
+**2. 닥또리 & 소소한 AI 노트 스타일 (Tips & Tutorial)**
+   - *특징:* "엑셀 노가다 이제 그만", "영어 공부 0원"
+   - *전략:* Pain Point를 건드리고 구체적 툴로 해결.
+   - *예시:* "논문 100장 읽기 지옥, NotebookLM으로 팟캐스트처럼 듣자"
+
+# Output Format
+- 'Current Context'에 지정된 개수만큼 **완성된 제목 후보**를 JSON 문자열 배열로만 출력하십시오.
+- 각 후보는 부연 설명, 줄바꿈, 번호 없이 **제목 1줄**이어야 합니다.
+- **다양성 필수:** 후보마다 서로 다른 도구나 앵글을 사용하고, 나노바나나, 젠스파크, 제미나이 외에도 DeepSeek, Napkin AI 등 **다양한 최신 툴을 로테이션하여 선정**하십시오.
+
+# 예시 출력 (정확히 이런 형식):
+["Nano Banana로 광고용 캐릭터 룩북, 퇴근 전 뚝딱 만드는 비결", "Napkin AI, 글만 쓰면 기획안 도표가 3분 만에 완성"]
+"""
+
+# 제목 후보 응답 형식 (JSON 문자열 배열)
+CANDIDATES_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {"type": "array", "items": {"type": "string"}}
+}
+
+DEFAULT_CANDIDATE_COUNT = 5
+
+# 제목 길이 (한글 기준): 권장 범위와 허용 범위
+IDEAL_TITLE_LENGTH = (25, 35)
+ALLOWED_TITLE_LENGTH = (15, 80)
+
+# 기존 제목과 이 이상 비슷하면 중복으로 보고 제외
+DUPLICATE_SIMILARITY = 0.6
+
+# 도구 다양성 판단용 (같은 도구를 최근 글에서 다뤘으면 감점)
+KNOWN_TOOLS = {
+    "nano banana": ["nano banana", "나노바나나", "나노 바나나"],
+    "genspark": ["genspark", "젠스파크"],
+    "gemini": ["gemini", "제미나이"],
+    "notebooklm": ["notebooklm", "노트북lm"],
+    "perplexity": ["perplexity", "퍼플렉시티"],
+    "deepseek": ["deepseek", "딥시크"],
+    "claude": ["claude", "클로드"],
+    "chatgpt": ["chatgpt", "챗gpt", "gpt"],
+    "napkin ai": ["napkin", "냅킨"],
+    "gamma": ["gamma", "감마"],
+    "recraft": ["recraft", "리크래프트"],
+    "midjourney": ["midjourney", "미드저니"],
+    "kling": ["kling", "클링"],
+    "runway": ["runway", "런웨이"],
+}
+RECENT_TOOL_WINDOW = 10
+
+
+def clean_candidate(title: str) -> str:
+    """번호, 따옴표, 마크다운 강조 등 제목 앞뒤 장식 제거"""
+    title = title.strip().split('\n')[0].strip()
+    title = re.sub(r'^(\d+[.)]|[-*•])\s*', '', title)
+    title = title.replace('**', '').strip().strip('"\'“”').strip()
+    return title
+
+
+def parse_candidates(text: str) -> List[str]:
+    """JSON 배열 응답을 후보 목록으로 (배열이 아니면 줄 단위로 분리)"""
+    try:
+        data = json.loads(text)
+        lines = data if isinstance(data, list) else [str(data)]
+    except ValueError:
+        lines = text.splitlines()
+    candidates = []
+    for line in lines:
+        title = clean_candidate(str(line))
+        if title and title not in candidates:
+            candidates.append(title)
+    return candidates
+
+
+def title_tools(title: str) -> set:
+    lowered = title.lower()
+    return {tool for tool, aliases in KNOWN_TOOLS.items() if any(alias in lowered for alias in aliases)}
+
+
+def title_similarity(title: str, history: List[str]) -> float:
+    """기존 제목(소문자)과의 최대 유사도 (0~1)"""
+    return max((SequenceMatcher(None, title.lower(), old).ratio() for old in history), default=0.0)
+
+
+def score_candidate(title: str, history: List[str], recent_tools: set) -> tuple:
+    """
+    후보 점수 (높을수록 좋음)와 제외 사유
+
+    Returns:
+        (점수, 제외 사유 또는 None) - 허용 길이 밖이거나 기존 글과 중복이면 제외
+    """
+    length = len(title)
+    if not ALLOWED_TITLE_LENGTH[0] <= length <= ALLOWED_TITLE_LENGTH[1]:
+        return 0.0, f"길이 {length}자"
+
+    similarity = title_similarity(title, history)
+    if similarity >= DUPLICATE_SIMILARITY:
+        return 0.0, f"기존 글과 {similarity * 100:.0f}% 유사"
+
+    low, high = IDEAL_TITLE_LENGTH
+    length_score = 1.0 if low <= length <= high else max(0.0, 1 - min(abs(length - low), abs(length - high)) / 20)
+    format_score = 0.0 if re.search(r'[#*\[\]<>]|^(intro|서론)', title.lower()) else 1.0
+    novelty_score = 1 - similarity
+    tools = title_tools(title)
+    if not tools:
+        tool_score = 0.5
+    elif tools & recent_tools:
+        tool_score = 0.0
+    else:
+        tool_score = 1.0
+    return length_score + format_score + 2 * novelty_score + tool_score, None
+
+
 
 class TopicAgent:
-    def __init__(self, config_path="config_ai.json"):
-        """Gemini API 초기화"""
+    def __init__(self, config_path="config_ai.json", client: LLMClient = None):
+        """
+        Gemini API 초기화
+        
+        Args:
+            client: 공유 LLM 클라이언트 (run_pipeline.py에서 공유, 없으면 직접 생성)
+        """
         # config 파일은 선택사항 (환경변수 우선)
         self.config = {}
         if Path(config_path).exists():
             with open(config_path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
         
-        # API 키 로드
-        self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
+        self.client = client or create_client(self.config)
         
-        if not self.api_keys:
+        if not self.client.api_keys:
             raise ValueError("❌ GEMINI_API_KEY가 설정되지 않았습니다.")
         
-        genai.configure(api_key=self.api_keys[0])
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
-        
-        print(f"✅ Gemini API 초기화 완료 (키: {len(self.api_keys)}개)")
-    
-    def _load_api_keys(self) -> List[str]:
-        """API 키 로드 (복수 키 지원)"""
-        keys_json = os.getenv('GEMINI_API_KEYS', '')
-        if keys_json:
-            try:
-                keys = json.loads(keys_json)
-                if isinstance(keys, list) and keys:
-                    return keys
-            except:
-                pass
-        
-        single_key = os.getenv('GEMINI_API_KEY', self.config.get('gemini_api_key', ''))
-        if single_key:
-            return [single_key]
-        
-        return []
-    
-    def _rotate_key(self):
-        """다음 API 키로 전환"""
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        new_key = self.api_keys[self.current_key_index]
-        genai.configure(api_key=new_key)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
-        print(f"🔄 API 키 #{self.current_key_index + 1}로 전환")
-    
-    def _generate_with_retry(self, prompt: str, max_retries: int = None) -> str:
-        """할당량 초과 시 자동 재시도"""
-        if max_retries is None:
-            max_retries = len(self.api_keys)
-        
-        for attempt in range(max_retries):
-            try:
-                response = self.model.generate_content(prompt)
-                return response.text
-            except Exception as e:
-                error_msg = str(e).lower()
-                if 'quota' in error_msg or 'limit' in error_msg or '429' in error_msg:
-                    print(f"⚠️ API 키 #{self.current_key_index + 1} 할당량 초과")
-                    if attempt < max_retries - 1:
-                        self._rotate_key()
-                        continue
-                    else:
-                        raise Exception("모든 API 키의 할당량이 초과되었습니다.")
-                else:
-                    raise
-        
-        raise Exception("최대 재시도 횟수 초과")
+        print(f"✅ Gemini API 초기화 완료 (키: {len(self.client.api_keys)}개)")
     
     def get_existing_titles(self) -> List[str]:
         """기존 블로그 글 제목 목록 가져오기"""
@@ -115,101 +229,91 @@ class TopicAgent:
             print(f"  ⚠️ 기존 글 확인 실패: {e}")
             return []
     
-    def generate_topic(self) -> dict:
-        """트렌드 분석 및 블루오션 주제 생성"""
+    def _request_candidates(self, topic_prompt: str) -> List[str]:
+        """제목 후보 목록 요청 (1회 호출)"""
+        text = self.client.generate(topic_prompt, generation_config=CANDIDATES_CONFIG, cache=False,
+                                    label="topic", cached_prefix=TOPIC_INSTRUCTIONS)
+        return parse_candidates(text)
+    
+    def _rank_candidates(self, candidates: List[str], history: List[str]) -> List[tuple]:
+        """후보를 점수순으로 정렬 [(제목, 점수, 제외 사유)], 사용 가능한 후보가 앞"""
+        recent_tools = set()
+        for title in history[:RECENT_TOOL_WINDOW]:
+            recent_tools |= title_tools(title)
+        
+        ranked = []
+        for title in candidates:
+            score, reason = score_candidate(title, history, recent_tools)
+            ranked.append((title, score, reason))
+        ranked.sort(key=lambda item: (item[2] is None, item[1]), reverse=True)
+        return ranked
+    
+    def generate_topic(self, extra_titles: List[str] = None) -> dict:
+        """
+        트렌드 분석 및 블루오션 주제 생성
+        
+        Args:
+            extra_titles: 아직 저장되지 않았지만 중복을 피해야 할 제목 (배치 모드의 다른 글)
+        """
         print("\n" + "="*60)
         print("🎯 Step 1: Trend & Topic Agent")
         print("   📁 automation/step1_topic_agent.py")
-        print("   ⚙️  설정 위치: 라인 128-180 (토픽 생성 프롬프트)")
+        print("   ⚙️  설정 위치: TOPIC_INSTRUCTIONS (토픽 생성 프롬프트)")
         print("="*60)
         
         existing_titles = self.get_existing_titles()
+        if extra_titles:
+            existing_titles = [t.lower() for t in extra_titles] + existing_titles
         existing_titles_text = '\n'.join(f"- {title}" for title in existing_titles[:20])
         current_date = datetime.now().strftime('%Y-%m-%d')
         
-        topic_prompt = f"""# Role Definition
-당신은 대한민국 IT/Tech 트렌드 분석가입니다.
-특히 **'김이솝', '알린', '닥또리', '소소한 AI 입문 노트'** 등 인기 테크 유튜버들이 다루는 **최신 AI 이슈**를 포착하여, 3040 직장인을 위한 실무 가이드로 재가공하는 능력이 탁월합니다.
-
-# Task
-현재 시점({current_date})을 기준으로, **나노바나나, 젠스파크, 제미나이**를 포함하여 **유튜브에서 가장 화제가 되고 있는 최신 AI 툴 중 하나**를 선정하고, 유튜버들의 스타일을 벤치마킹하여 **단 하나의 제목**을 작성하십시오.
-
-# 🔥 Hot Trends Search Scope (검색 및 확장 범위)
-**AI에게 지시: 아래 예시 국한되지 말고, 유사한 카테고리의 최신 'Rising Star' 툴을 적극적으로 포함하십시오.**
-
-**1. [이미지/영상] 나노바나나 & Beyond**
-   - *Core:* 구글 Nano Banana (캐릭터 일관성, 합성).
-   - *Expand:* **Recraft V3** (벡터 생성), **Kling/Runway** (영상), **Midjourney** (최신).
-   - *실무 포인트:* 돈 안 드는 룩북/상세페이지 제작, PPT용 고퀄리티 일러스트.
-
-**2. [검색/에이전트] 젠스파크 & Beyond**
-   - *Core:* GenSpark (AI 에이전트 검색).
-   - *Expand:* **Perplexity** (Deep Research), **OpenAI Operator**, **Arc Search**.
-   - *실무 포인트:* 시장 조사 자동화, 경쟁사 분석 리포트 3분 완성.
-
-**3. [모델/생산성] 제미나이 & Beyond**
-   - *Core:* Gemini 2.0 Flash Thinking (속도/추론).
-   - *Expand:* **DeepSeek V3/R1** (가성비 코딩/글쓰기), **Claude 3.5** (Artifacts), **NotebookLM** (오디오 요약).
-   - *실무 포인트:* 복잡한 엑셀 수식 해결, 논문 팟캐스트로 듣기, 앱 프로토타입.
-
-**4. [시각화/문서] 오피스 꿀툴 (New)**
-   - *Expand:* **Napkin AI** (텍스트 -> 다이어그램), **Gamma** (PPT 자동 생성).
-   - *실무 포인트:* "글만 썼는데 도표가 뚝딱", "기획안 넣으니 PPT 완성".
-
-# Filtering Rules
-1. 기존 제목 중복 제외:
+        candidate_count = self.config.get("generation_settings", {}).get("topic_candidates", DEFAULT_CANDIDATE_COUNT)
+        
+        # 고정 지시문은 컨텍스트 캐시(TOPIC_INSTRUCTIONS), 매번 바뀌는 날짜/기존 제목/후보 수만 전송
+        topic_prompt = f"""# Current Context
+- 현재 날짜: {current_date}
+- 작성할 제목 후보 {candidate_count}개
+- 기존 제목 (중복 제외):
 {existing_titles_text}
-
-2. 선정 금지:
-   - "돈 버는 법", "주식" 등 자극적 수익성 주제
-   - "ChatGPT 가입법" 등 기초 내용
-   - 개발자 전용 (Python 설치, API 키 발급 등)
-
-# 🌟 벤치마킹 스타일 (YouTuber -> Blog)
-유튜버들의 "이거 대박입니다"라는 텐션을 **"직장인의 퇴근 시간 단축"**으로 차분하고 실용적으로 변환하십시오.
-**대상(직장인 등)을 제목 맨 앞에 쓰지 말고**, **도구명**이나 **해결책**을 강조하십시오.
-
-**1. 김이솝 & 알린 스타일 (Trend & Review)**
-   - *특징:* "나노바나나, 미드저니보다 좋은가?", "젠스파크로 구글링 끝"
-   - *전략:* 신기술의 놀라움을 업무 효율로 연결.
-   - *예시:* "Nano Banana, 똥손도 3분 만에 고정 캐릭터 만드는 법"
-
-**2. 닥또리 & 소소한 AI 노트 스타일 (Tips & Tutorial)**
-   - *특징:* "엑셀 노가다 이제 그만", "영어 공부 0원"
-   - *전략:* Pain Point를 건드리고 구체적 툴로 해결.
-   - *예시:* "논문 100장 읽기 지옥, NotebookLM으로 팟캐스트처럼 듣자"
-
-# Output Format
-- 부연 설명, 줄바꿈, 추가 제안 없이 **완성된 제목 딱 1줄**만 출력하십시오.
-- 여러 개 제안하지 말고 **가장 좋은 제목 1개**만 선택하십시오.
-- **다양성 필수:** 나노바나나, 젠스파크, 제미나이 외에도 DeepSeek, Napkin AI 등 **다양한 최신 툴을 로테이션하여 선정**하십시오.
-
-# 예시 출력 (정확히 이런 형식):
-Nano Banana로 광고용 캐릭터 룩북, 퇴근 전 뚝딱 만드는 비결
 """
         
         try:
             print("\n📊 트렌드 분석 중...")
-            topic = self._generate_with_retry(topic_prompt)
-            topic = topic.strip()
+            candidates = self._request_candidates(topic_prompt)
+            ranked = self._rank_candidates(candidates, existing_titles)
+            
+            # 쓸 수 있는 후보가 하나도 없을 때만 한 번 더 요청
+            if not any(reason is None for _, _, reason in ranked):
+                print(f"  ⚠️ 사용 가능한 후보 없음 ({len(candidates)}개 중 0개), 재생성 중...")
+                candidates += [title for title in self._request_candidates(topic_prompt) if title not in candidates]
+                ranked = self._rank_candidates(candidates, existing_titles)
+            if not ranked:
+                raise ValueError("제목 후보가 없습니다")
             
-            # 검증: 제목이 너무 짧거나 길거나 여러 줄이면 재생성
-            has_newline = '\n' in topic
-            if len(topic) < 15 or len(topic) > 80 or has_newline:
-                print(f"  ⚠️ 제목 형식 부적절 ({len(topic)}자, 줄바꿈: {has_newline}), 재생성 중...")
-                topic = self._generate_with_retry(topic_prompt)
-                topic = topic.strip()
+            for title, score, reason in ranked:
+                mark = "✓" if reason is None else f"✗ {reason}"
+                print(f"  • 후보 ({score:.2f}, {mark}): {title}")
             
-            # 줄바꿈이 있으면 첫 번째 줄만 사용
-            if '\n' in topic:
-                topic = topic.split('\n')[0].strip()
-                print(f"  ⚠️ 여러 줄 감지됨, 첫 번째 줄만 사용: {topic}")
+            topic, _, reason = ranked[0]
+            if reason:
+                # 허용 길이만 벗어난 후보는 대신 사용, 기존 글과 중복인 후보는 발행하지 않음
+                # (길이로 제외된 후보는 유사도를 검사하지 않았으므로 여기서 다시 확인)
+                usable = [(title, reason) for title, _, reason in ranked
+                          if title_similarity(title, existing_titles) < DUPLICATE_SIMILARITY]
+                if not usable:
+                    raise ValueError(f"기존 글과 중복되지 않는 제목 후보가 없습니다 ({len(ranked)}개 모두 중복)")
+                topic, reason = usable[0]
+                print(f"  ⚠️ 조건을 만족하는 후보가 없어 가장 나은 후보 사용 ({reason})")
             
             print(f"\n✅ 주제 생성 완료:")
             print(f"   📌 {topic}")
             
             result = {
                 "title": topic,
+                "candidates": [
+                    {"title": title, "score": round(score, 3), "rejected": reason}
+                    for title, score, reason in ranked
+                ],
                 "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 "agent": "step1_topic_agent"
             }
@@ -5,81 +5,523 @@ Step 2: Writer & Art Director Agent (Final)
 - 필수 1: "Intro:" 접두사 절대 금지 (자연스러운 한글 소제목)
 - 필수 2: 썸네일(img_1) 포함 이미지 3~5장 필수 생성
 - 필수 3: 스크롤 방지 (Tip Box 사용)
+- 응답 스키마(SECTIONS_SCHEMA)로 JSON 형식 강제, 깨진 JSON은 로컬 복구(repair_json) 후 안 되면 재호출
+- 작성 모드 (config_ai.json generation_settings.writer_mode 또는 환경변수 WRITER_MODE)
+  · single (기본): 한 번의 긴 응답으로 전체 본문 작성
+  · outline: 아웃라인(소제목 + 이미지 위치)을 먼저 받고 섹션 본문을 여러 키로 병렬 작성해 이어 붙임
 """
 
-import google.generativeai as genai
 import json
 import os
+import queue
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List
+
+import pipeline_metrics
+from llm_client import LLMClient, create_client
+
+
+SECTION_TYPES = ["heading", "paragraph", "list", "tip_box", "warning_box", "image_placeholder"]
+
+# Gemini response_schema (step4가 렌더링하는 섹션 형식)
+SECTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "type": {"type": "string", "enum": SECTION_TYPES},
+                    "content": {"type": "string"},
+                    "level": {"type": "integer"},
+                    "items": {"type": "array", "items": {"type": "string"}},
+                    "id": {"type": "string"},
+                    "description": {"type": "string"},
+                    "description_ko": {"type": "string"},
+                    "position": {"type": "string"}
+                },
+                "required": ["type"]
+            }
+        },
+        "summary": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["sections", "summary", "tags"]
+}
+
+JSON_OUTPUT_CONFIG = {"response_mime_type": "application/json", "response_schema": SECTIONS_SCHEMA}
+
+# outline 모드: 아웃라인 응답 (섹션별 소제목, 다룰 내용, 이미지 설명)
+OUTLINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "outline": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "heading": {"type": "string"},
+                    "level": {"type": "integer"},
+                    "points": {"type": "string"},
+                    "image_description": {"type": "string"},
+                    "image_description_ko": {"type": "string"}
+                },
+                "required": ["heading", "points"]
+            }
+        },
+        "summary": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["outline", "summary", "tags"]
+}
+
+# outline 모드: 섹션 1개의 본문 블록
+SECTION_BODY_SCHEMA = {
+    "type": "object",
+    "properties": {"sections": SECTIONS_SCHEMA["properties"]["sections"]},
+    "required": ["sections"]
+}
+
+OUTLINE_CONFIG = {"response_mime_type": "application/json", "response_schema": OUTLINE_SCHEMA}
+SECTION_BODY_CONFIG = {"response_mime_type": "application/json", "response_schema": SECTION_BODY_SCHEMA}
+
+# 섹션 본문으로 받을 블록 종류 (소제목/이미지는 아웃라인에서 만듦)
+BODY_SECTION_TYPES = {"paragraph", "list", "tip_box", "warning_box"}
+
+WRITER_MODES = ("single", "outline")
+DEFAULT_SECTION_WORKERS = 4
+
+COMMON_RULES = """
+        ### 🚨 CRITICAL RULES (Must Follow):
+        1. **NO "Intro:" Prefix:** The first heading MUST be a natural Korean title (e.g., "업무 효율이 고민이신가요?"), **NEVER** start with "Intro:" or "서론:".
+        2. **IMAGE COUNT:** You MUST include **3 to 5 images** in total.
+        3. **THUMBNAIL (Important):** The first image (`img_1`) is the **Blog Thumbnail**. It must be the most representative and high-quality wide shot.
+        4. **SCROLL FIX:** NEVER use `code_block` (```). Use `tip_box` for prompts.
+        """
+
+# 로컬 복구로도 파싱할 수 없을 때 Writer 재호출 횟수
+MAX_WRITER_RECALLS = 1
+
+
+def strip_code_fence(text: str) -> str:
+    """```json ... ``` 펜스 제거"""
+    text = text.strip()
+    if text.startswith('```json'): text = text[7:]
+    if text.startswith('```'): text = text[3:]
+    if text.endswith('```'): text = text[:-3]
+    return text.strip()
+
+
+def repair_json(text: str) -> str:
+    """
+    흔한 JSON 손상을 로컬에서 복구
+    - JSON 앞뒤의 설명 문장, 코드 펜스 제거
+    - 닫는 괄호 앞의 trailing comma 제거
+    - 응답이 중간에 끊긴 경우 마지막으로 완성된 객체/배열까지 자르고 열린 괄호를 닫음
+    (복구 결과는 json.loads로 다시 검증해야 함)
+    """
+    text = strip_code_fence(text)
+    start = text.find('{')
+    if start < 0:
+        return text
+    text = text[start:]
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    # (out 길이, 그 시점의 열린 괄호) - 완성된 값 직후의 안전한 절단 지점
+    safe_cut = None
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            # trailing comma 제거
+            while out and out[-1] in ' \t\r\n':
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            if not stack:
+                break
+            stack.pop()
+            out.append(ch)
+            safe_cut = (len(out), list(stack))
+            if not stack:
+                break
+            continue
+        out.append(ch)
+
+    if not stack and not in_string:
+        return "".join(out)
+    if safe_cut is None:
+        return "".join(out)
+    length, open_brackets = safe_cut
+    return "".join(out[:length]) + "".join(reversed(open_brackets))
+
+
+class SectionStreamParser:
+    """
+    스트리밍 응답에서 완성된 "sections" 항목을 즉시 꺼내는 점진적 파서
+    - feed(chunk)로 받은 텍스트를 이어 붙이며 sections 배열의 객체가 닫히는 순간 콜백 호출
+    - 전체 JSON이 완성되기 전에 이미지 플레이스홀더 등을 다음 Step으로 넘기기 위한 용도
+    """
+
+    SECTIONS_KEY = re.compile(r'"sections"\s*:\s*\[')
+
+    def __init__(self, on_section):
+        self.on_section = on_section
+        self.reset()
+
+    def reset(self):
+        """새 시도(재시도) 시작 시 상태 초기화"""
+        self.buffer = ""
+        self.pos = 0
+        self.in_array = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.obj_start = None
+        self.count = 0
+
+    def feed(self, chunk: str):
+        self.buffer += chunk
+        if self.finished:
+            return
+        if not self.in_array:
+            match = self.SECTIONS_KEY.search(self.buffer)
+            if not match:
+                return
+            self.in_array = True
+            self.pos = match.end()
+
+        buf = self.buffer
+        for i in range(self.pos, len(buf)):
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                if self.depth == 0 and ch == '{':
+                    self.obj_start = i
+                self.depth += 1
+            elif ch in '}]':
+                if self.depth == 0:
+                    # sections 배열 종료
+                    self.finished = True
+                    self.pos = i + 1
+                    return
+                self.depth -= 1
+                if self.depth == 0 and ch == '}' and self.obj_start is not None:
+                    self._emit(buf[self.obj_start:i + 1])
+                    self.obj_start = None
+        self.pos = len(buf)
+
+    def _emit(self, text: str):
+        try:
+            section = json.loads(text)
+        except ValueError:
+            return
+        self.on_section(section, self.count)
+        self.count += 1
+
+
+class SectionStream:
+    """
+    완성된 sections 항목을 도착 순서대로 내보내는 제너레이터 API (WriterAgent.stream_sections)
+    - 생성은 백그라운드 스레드에서 스트리밍으로 진행, 순회하는 쪽은 섹션이 닫히는 즉시 받음
+    - 재시도로 처음부터 다시 받는 경우 이미 내보낸 섹션은 건너뜀 (최종 본문은 result 기준)
+    - 순회가 끝나면 result(전체 구조화 본문), time_to_first_section, elapsed 사용 가능
+
+    사용 예:
+        stream = agent.stream_sections(topic)
+        for section in stream:
+            ...  # 마크다운 조립, 이미지 생성 시작, 진행 표시
+        content = stream.result
+    """
+
+    def __init__(self, produce):
+        """
+        Args:
+            produce: produce(emit) - emit(section, index)로 섹션을 넘기고 최종 본문 dict를 반환하는 함수
+        """
+        self._produce_sections = produce
+        self.result = None
+        self.time_to_first_section = None
+        self.elapsed = None
+        self.section_count = 0
+        self._queue = queue.Queue()
+        self._emitted = 0
+
+    def __iter__(self):
+        started = time.perf_counter()
+        producer = threading.Thread(target=self._produce, daemon=True)
+        producer.start()
+        while True:
+            kind, payload = self._queue.get()
+            if kind == "error":
+                raise payload
+            if kind == "done":
+                self.result = payload
+                break
+            if self.time_to_first_section is None:
+                self.time_to_first_section = time.perf_counter() - started
+                print(f"   ⚡ 첫 섹션 수신: {self.time_to_first_section:.1f}초")
+            self.section_count += 1
+            yield payload
+        producer.join()
+        self.elapsed = time.perf_counter() - started
+        first = f"{self.time_to_first_section:.1f}초" if self.time_to_first_section is not None else "-"
+        print(f"   📄 섹션 {self.section_count}개 수신 (첫 섹션 {first} / 전체 {self.elapsed:.1f}초)")
+
+    def _on_section(self, section: dict, index: int):
+        if index < self._emitted:
+            return
+        self._emitted = index + 1
+        self._queue.put(("section", section))
+
+    def _produce(self):
+        try:
+            print("\n✍️ 콘텐츠 생성/정리 중...")
+            pipeline_metrics.increment("writer_articles")
+            self._queue.put(("done", self._produce_sections(self._on_section)))
+        except BaseException as e:
+            if not isinstance(e, ValueError):
+                print(f"\n❌ 실패: {e}")
+            self._queue.put(("error", e))
+
 
 class WriterAgent:
-    def __init__(self, config_path="config_ai.json"):
+    def __init__(self, config_path="config_ai.json", client: LLMClient = None):
+        # client: run_pipeline.py에서 공유하는 LLM 클라이언트 (없으면 직접 생성)
         self.config = {}
         if Path(config_path).exists():
             with open(config_path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
         
-        self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
+        self.client = client or create_client(self.config)
         
-        if not self.api_keys:
+        if not self.client.api_keys:
             raise ValueError("❌ GEMINI_API_KEY가 설정되지 않았습니다.")
         
-        genai.configure(api_key=self.api_keys[0])
-        self.model_name = "gemini-2.5-flash"
-        self.model = genai.GenerativeModel(self.model_name)
-    
-    def _load_api_keys(self) -> List[str]:
-        keys_json = os.getenv('GEMINI_API_KEYS', '')
-        if keys_json:
-            try:
-                keys = json.loads(keys_json)
-                return keys if isinstance(keys, list) else []
-            except: pass
-        single_key = os.getenv('GEMINI_API_KEY', self.config.get('gemini_api_key', ''))
-        return [single_key] if single_key else []
+        settings = self.config.get("generation_settings", {})
+        self.mode = (os.getenv('WRITER_MODE', '') or settings.get("writer_mode", "single")).strip().lower()
+        if self.mode not in WRITER_MODES:
+            raise ValueError(f"❌ writer_mode는 {', '.join(WRITER_MODES)} 중 하나여야 합니다: {self.mode}")
+        self.section_workers = max(1, settings.get("section_workers", DEFAULT_SECTION_WORKERS))
     
-    def _generate_with_retry(self, prompt: str, max_key_rotations: int = None) -> str:
-        if max_key_rotations is None: max_key_rotations = len(self.api_keys)
-        for attempt in range(max_key_rotations):
-            try:
-                print(f"   🤖 시도: {self.model_name} (Key #{self.current_key_index + 1})")
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={"response_mime_type": "application/json"}
-                )
-                return response.text
-            except Exception as e:
-                error_str = str(e)
-                print(f"   ⚠️ 오류: {error_str.split('message')[0][:80]}...")
-                if '429' in error_str or 'quota' in error_str.lower():
-                    if self.current_key_index < len(self.api_keys) - 1:
-                        self.current_key_index += 1
-                        genai.configure(api_key=self.api_keys[self.current_key_index])
-                        self.model = genai.GenerativeModel(self.model_name)
-                        time.sleep(2)
-                        continue
-                    else: raise e
-                time.sleep(5)
-                if attempt == max_key_rotations - 1: raise e
+    def _generate(self, prompt: str, stream_parser: SectionStreamParser = None,
+                  generation_config: dict = JSON_OUTPUT_CONFIG, label: str = "writer") -> str:
+        """stream_parser가 있으면 스트리밍으로 받으며 조각마다 파서에 전달"""
+        print(f"   🤖 시도: {' → '.join(self.client.models_for(label))}")
+        return self.client.generate(
+            prompt,
+            generation_config=generation_config,
+            on_chunk=stream_parser.feed if stream_parser else None,
+            on_attempt=stream_parser.reset if stream_parser else None,
+            error_retry_delay=5,
+            label=label
+        )
 
     def load_topic(self, input_path: str = "automation/intermediate_outputs/step1_topic.json") -> dict:
         with open(input_path, 'r', encoding='utf-8') as f: return json.load(f)
     
-    def generate_structured_content(self, topic: str) -> dict:
-        manual_content = os.getenv('MANUAL_CONTENT', '').strip()
+    def generate_structured_content(self, topic: str, on_section=None, manual_content: str = None) -> dict:
+        """
+        구조화된 본문(JSON) 생성
         
-        # [공통 규칙]
-        common_rules = """
-        ### 🚨 CRITICAL RULES (Must Follow):
-        1. **NO "Intro:" Prefix:** The first heading MUST be a natural Korean title (e.g., "업무 효율이 고민이신가요?"), **NEVER** start with "Intro:" or "서론:".
-        2. **IMAGE COUNT:** You MUST include **3 to 5 images** in total.
-        3. **THUMBNAIL (Important):** The first image (`img_1`) is the **Blog Thumbnail**. It must be the most representative and high-quality wide shot.
-        4. **SCROLL FIX:** NEVER use `code_block` (```). Use `tip_box` for prompts.
+        Args:
+            topic: 글 제목
+            on_section: 지정 시 섹션이 완성될 때마다 on_section(section, index) 호출
+                        (예: 이미지 생성 선행 시작)
+            manual_content: 정리할 사용자 초안 (None이면 MANUAL_CONTENT 환경변수)
         """
+        stream = self.stream_sections(topic, manual_content=manual_content)
+        for index, section in enumerate(stream):
+            if on_section:
+                on_section(section, index)
+        return stream.result
+
+    def stream_sections(self, topic: str, manual_content: str = None) -> SectionStream:
+        """완성된 섹션을 도착 순서대로 내보내는 스트림 (순회 시작 시 생성 요청)"""
+        if self.mode == "outline":
+            return SectionStream(lambda emit: self._write_by_outline(topic, manual_content, emit))
+        prompt = self.build_prompt(topic, manual_content)
+        return SectionStream(lambda emit: self._write_single(topic, prompt, emit))
+
+    def _write_single(self, topic: str, prompt: str, emit) -> dict:
+        """한 번의 응답으로 전체 본문 작성 (스트리밍 파서로 완성된 섹션을 바로 전달)"""
+        for recall in range(MAX_WRITER_RECALLS + 1):
+            response_text = self._generate(prompt, SectionStreamParser(emit))
+            pipeline_metrics.increment("writer_json_responses")
+            try:
+                return self.parse_response(topic, prompt, response_text)
+            except ValueError:
+                if recall == MAX_WRITER_RECALLS:
+                    raise
+                pipeline_metrics.increment("writer_recalls")
+                print("   🔁 JSON 복구 실패, Writer 재호출")
+
+    def _write_by_outline(self, topic: str, manual_content: str, emit) -> dict:
+        """
+        아웃라인 → 섹션 본문 병렬 작성 → sections 형식으로 이어 붙이기
+        - 섹션 순서대로 소제목 + 본문 + 이미지 플레이스홀더를 완성되는 대로 전달
+        - 앞 섹션이 끝나면 뒤 섹션을 기다리지 않고 바로 전달 (이미지 선행 생성 유지)
+        """
+        if manual_content is None:
+            manual_content = os.getenv('MANUAL_CONTENT', '')
+        manual_content = manual_content.strip()
+        
+        print("\n" + "="*60)
+        print(f"📝 Step 2: {'Editor' if manual_content else 'Creator'} Mode (아웃라인 → 섹션 병렬 작성)")
+        print("="*60)
+        
+        outline = self._request_json(self.build_outline_prompt(topic, manual_content), OUTLINE_CONFIG,
+                                     "outline", "writer_outline")
+        items = [item for item in outline["outline"] if item.get("heading")]
+        headings = [item["heading"] for item in items]
+        print(f"   🧩 아웃라인 {len(items)}개 섹션 → 본문 병렬 작성 (동시 {self.section_workers}개)")
+        
+        sections = []
+        image_count = sum(1 for item in items if item.get("image_description"))
+        image_index = 0
+        with ThreadPoolExecutor(max_workers=self.section_workers) as executor:
+            futures = [executor.submit(self._write_section, topic, manual_content, headings, item)
+                       for item in items]
+            for i, (item, future) in enumerate(zip(items, futures)):
+                block = [{"type": "heading", "level": item.get("level") or (2 if i == 0 else 3),
+                          "content": item["heading"]}]
+                block.extend(future.result())
+                if item.get("image_description"):
+                    image_index += 1
+                    if image_index == 1:
+                        position = "after_intro"
+                    elif image_index == image_count:
+                        position = "end"
+                    else:
+                        position = "middle"
+                    block.append({
+                        "type": "image_placeholder",
+                        "id": f"img_{image_index}",
+                        "description": item["image_description"],
+                        "description_ko": item.get("image_description_ko", ""),
+                        "position": position
+                    })
+                for section in block:
+                    emit(section, len(sections))
+                    sections.append(section)
+        
+        return {
+            "title": topic,
+            "sections": sections,
+            "summary": outline.get('summary', ''),
+            "tags": outline.get('tags', []),
+            "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def _write_section(self, topic: str, manual_content: str, headings: list, item: dict) -> list:
+        """아웃라인 항목 1개의 본문 블록 (소제목/이미지 제외)"""
+        prompt = self.build_section_prompt(topic, manual_content, headings, item)
+        body = self._request_json(prompt, SECTION_BODY_CONFIG, "sections", "writer_section")
+        return [section for section in body["sections"] if section.get("type") in BODY_SECTION_TYPES]
+
+    def _request_json(self, prompt: str, generation_config: dict, required_key: str, label: str) -> dict:
+        """JSON 응답 요청 (로컬 복구로도 안 되면 재호출)"""
+        for recall in range(MAX_WRITER_RECALLS + 1):
+            response_text = self._generate(prompt, generation_config=generation_config, label=label)
+            pipeline_metrics.increment("writer_json_responses")
+            try:
+                return self._load_json(prompt, response_text, generation_config, required_key, label)
+            except ValueError:
+                if recall == MAX_WRITER_RECALLS:
+                    raise
+                pipeline_metrics.increment("writer_recalls")
+                print("   🔁 JSON 복구 실패, Writer 재호출")
+
+    def build_outline_prompt(self, topic: str, manual_content: str = "") -> str:
+        """outline 모드: 아웃라인 프롬프트"""
+        draft = f"**User's Draft (organize this into the outline):**\n{manual_content}\n" if manual_content else ""
+        return f"""
+You are a professional IT Tech Editor planning a blog post.
+**Topic:** {topic}
+{draft}
+**Task:** Create only the OUTLINE of the post in **JSON format** (the body is written later, section by section).
+1. **Sections:** 4~6 sections in reading order. The first one is the introduction.
+2. **points:** For each section, 2~3 Korean sentences describing exactly what the section must cover (Why/How/Examples).
+3. **Images:** Give 3~5 sections an `image_description` (50+ words, English, wide angle, avoid close-ups) and `image_description_ko`. The first section's image is the thumbnail.
+4. Also write the post `summary` and `tags`.
+
+{COMMON_RULES}
+
+**JSON Schema Example:**
+{{
+  "outline": [
+    {{ "heading": "흥미로운 도입부 소제목 (Intro 절대 금지)", "level": 2, "points": "...", "image_description": "Best quality thumbnail shot, cinematic lighting, wide angle, 8k", "image_description_ko": "블로그 썸네일용 이미지 설명" }},
+    {{ "heading": "Section 1", "level": 3, "points": "..." }}
+  ],
+  "summary": "Summary",
+  "tags": ["Tag1"]
+}}
+"""
+
+    def build_section_prompt(self, topic: str, manual_content: str, headings: list, item: dict) -> str:
+        """outline 모드: 섹션 1개 본문 프롬프트"""
+        outline_text = "\n".join(f"- {heading}" for heading in headings)
+        draft = f"**User's Draft (use the parts relevant to this section):**\n{manual_content}\n" if manual_content else ""
+        return f"""
+You are a professional IT Tech Editor writing ONE section of a blog post in **JSON format**.
+**Topic:** {topic}
+**Full Outline:**
+{outline_text}
+
+**This Section:** {item['heading']}
+**Must Cover:** {item.get('points', '')}
+{draft}
+**Rules:**
+1. Write only the body of this section: 1~3 `paragraph` blocks (minimum 300~500 characters each, Korean, rich details).
+2. Optionally add one `tip_box`, `list` (with `items`) or `warning_box`.
+3. Do NOT repeat the heading and do NOT add images (they come from the outline).
+4. NEVER use `code_block` (```). Use `tip_box` for prompts.
+
+**JSON Schema Example:**
+{{
+  "sections": [
+    {{ "type": "paragraph", "content": "Write detailed content..." }},
+    {{ "type": "tip_box", "content": "Useful tip (No ```)" }}
+  ]
+}}
+"""
+
+    def build_prompt(self, topic: str, manual_content: str = None) -> str:
+        """Writer 프롬프트 (manual_content가 있으면 에디터 모드, 없으면 창작 모드)"""
+        if manual_content is None:
+            manual_content = os.getenv('MANUAL_CONTENT', '')
+        manual_content = manual_content.strip()
+        
+        common_rules = COMMON_RULES
         
         if manual_content:
             print("\n" + "="*60)
@@ -180,26 +622,44 @@ You are a professional IT Tech Editor.
   "tags": ["Tag1"]
 }}
 """
+        return writer_prompt
+
+    def parse_response(self, topic: str, prompt: str, response_text: str) -> dict:
+        """
+        응답 JSON을 저장 형식으로 변환
+        - 파싱 실패 시 repair_json으로 복구 시도
+        - 그래도 안 되거나 sections가 비어 있으면 캐시에서 지우고 ValueError (재호출 대상)
+        """
+        content_data = self._load_json(prompt, response_text, JSON_OUTPUT_CONFIG, "sections")
+        return {
+            "title": topic,
+            "sections": content_data.get('sections', []),
+            "summary": content_data.get('summary', ''),
+            "tags": content_data.get('tags', []),
+            "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
 
+    def _load_json(self, prompt: str, response_text: str, generation_config: dict, required_key: str,
+                   label: str = "writer") -> dict:
+        """
+        응답 JSON 파싱 (실패 시 repair_json으로 복구)
+        복구해도 안 되거나 required_key 항목이 비어 있으면 캐시에서 지우고 ValueError
+        """
         try:
-            print("\n✍️ 콘텐츠 생성/정리 중...")
-            response_text = self._generate_with_retry(writer_prompt)
-            clean_text = response_text.strip()
-            if clean_text.startswith('```json'): clean_text = clean_text[7:]
-            if clean_text.startswith('```'): clean_text = clean_text[3:]
-            if clean_text.endswith('```'): clean_text = clean_text[:-3]
-            content_data = json.loads(clean_text.strip())
-            
-            return {
-                "title": topic,
-                "sections": content_data.get('sections', []),
-                "summary": content_data.get('summary', ''),
-                "tags": content_data.get('tags', []),
-                "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-        except Exception as e:
+            clean_text = strip_code_fence(response_text)
+            try:
+                content_data = json.loads(clean_text, strict=False)
+            except ValueError:
+                content_data = json.loads(repair_json(clean_text), strict=False)
+                pipeline_metrics.increment("writer_json_repairs")
+                print(f"   🩹 깨진 JSON 로컬 복구 ({required_key} {len(content_data.get(required_key, []))}개)")
+            if not isinstance(content_data, dict) or not content_data.get(required_key):
+                raise ValueError(f"{required_key}가 비어 있습니다")
+        except ValueError as e:
+            self.client.invalidate(prompt, generation_config=generation_config, label=label)
             print(f"\n❌ 실패: {e}")
             raise
+        return content_data
 
     def save_output(self, data: dict, output_path: str = "automation/intermediate_outputs/step2_structured_content.json"):
         path = Path(output_path)
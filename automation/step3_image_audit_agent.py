@@ -4,35 +4,67 @@ Step 3: Image Generation & Vision Audit Agent (Final Integrated Version)
 - Pollinations.ai (Flux)로 고품질 이미지 생성 (영문 프롬프트 사용)
 - 한글 설명(description_ko) 보존하여 Step 4로 전달
 - Vision 검수: Free Pass (쿼터 절약)
+- 이미지 병렬 생성: 플레이스홀더를 한꺼번에 작업자(image_generation.workers)에 맡기고 원래 섹션 순서로 조립
+  (Pollinations 동시 요청 수는 service_limits로 따로 제한, 이미지별 소요 시간은 stats["image_timings"])
+- 이미지 캐시: 제공자/모델/전체 프롬프트/크기/시드가 같으면 다운로드 없이 image_cache.py에서 복사
+  (image_generation.deterministic_seed: 프롬프트에서 시드를 정해 같은 프롬프트면 같은 요청이 되도록)
 """
 
-import google.generativeai as genai
 import json
 import os
 import hashlib
-import requests
 import urllib.parse
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
 import time
 import random
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import backends
+import pipeline_metrics
+from image_cache import ImageCache, prompt_seed
+from llm_client import LLMClient, create_client
+from service_limits import get_limit, service_slot
+
+
+DEFAULT_IMAGE_WORKERS = 4
+
+# Pollinations 요청 (캐시 키에도 포함)
+IMAGE_PROVIDER = "pollinations"
+IMAGE_MODEL = "flux"
+IMAGE_WIDTH = 1280
+IMAGE_HEIGHT = 720
+QUALITY_PREFIX = "Masterpiece, award winning photography, 8k resolution, highly detailed, cinematic lighting, depth of field, f/1.8, bokeh, realistic texture, raw photo,"
+NEGATIVE_PROMPT = "blurry, distorted, low quality, cartoon, illustration, bad hands, ugly, text, watermark, grainy"
+
 
 class ImageAuditAgent:
-    def __init__(self, config_path="config_ai.json"):
-        """Gemini API 초기화"""
+    def __init__(self, config_path="config_ai.json", client: LLMClient = None,
+                 reuse_existing_images: bool = False):
+        """
+        Gemini API 초기화
+        
+        Args:
+            client: 공유 LLM 클라이언트 (run_pipeline.py에서 공유, 없으면 직접 생성)
+            reuse_existing_images: 같은 ID/설명의 이미지가 이미 있으면 재생성하지 않음 (--resume)
+        """
         self.config = {}
         if Path(config_path).exists():
             with open(config_path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
         
-        self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
+        # Vision 검수용 클라이언트 (검수 프리패스 모드여도 초기화는 유지)
+        self.client = client or create_client(self.config)
+        self.reuse_existing_images = reuse_existing_images
         
-        # Vision 모델 초기화 (검수 프리패스 모드여도 초기화는 유지)
-        if self.api_keys:
-            genai.configure(api_key=self.api_keys[0])
-            self.vision_model = genai.GenerativeModel("gemini-2.5-flash")
+        # 이미지 생성 작업: (id, description) → Future (Step 2 스트리밍 중 선행 시작 포함)
+        self._prefetched = {}
+        self._executor = None
+        image_settings = self.config.get("image_generation", {})
+        self.image_workers = max(1, image_settings.get("workers", DEFAULT_IMAGE_WORKERS))
+        self.deterministic_seed = image_settings.get("deterministic_seed", True)
+        self.image_cache = ImageCache.from_config(self.config)
         
         # 출력 디렉토리 생성
         self.output_dir = Path(__file__).parent / "generated_images"
@@ -41,23 +73,6 @@ class ImageAuditAgent:
         print(f"✅ Image Agent 초기화 완료")
         print(f"✅ 이미지 저장 경로: {self.output_dir}")
     
-    def _load_api_keys(self) -> List[str]:
-        """API 키 로드"""
-        keys_json = os.getenv('GEMINI_API_KEYS', '')
-        if keys_json:
-            try:
-                keys = json.loads(keys_json)
-                if isinstance(keys, list) and keys:
-                    return keys
-            except:
-                pass
-        
-        single_key = os.getenv('GEMINI_API_KEY', self.config.get('gemini_api_key', ''))
-        if single_key:
-            return [single_key]
-        
-        return []
-    
     def load_structured_content(self, input_path: str = "automation/intermediate_outputs/step2_structured_content.json") -> dict:
         """Step 2 출력 로드"""
         with open(input_path, 'r', encoding='utf-8') as f:
@@ -77,41 +92,80 @@ class ImageAuditAgent:
         Pollinations.ai (Flux)로 초고화질 이미지 생성
         - 타임아웃 60초로 증가 (에러 방지)
         - 화질 부스터 & enhance=false 적용 (S급 퀄리티)
+        - reuse_existing_images: 이전 실행에서 이미 생성된 파일은 그대로 사용
+        - 고정 시드면 이미지 캐시 확인 (같은 요청이 이미 생성된 적 있으면 복사만)
         """
+        file_hash = hashlib.md5(description.encode()).hexdigest()[:8]
+        image_filename = f"{image_id}_{file_hash}.png"
+        image_path = self.output_dir / image_filename
+        relative_path = f"automation/generated_images/{image_filename}"
+        
+        if self.reuse_existing_images and image_path.exists() and image_path.stat().st_size > 0:
+            print(f"      ⏩ 기존 이미지 재사용: {image_filename}")
+            return str(image_path), relative_path
+        
+        # 💎 화질 부스터 (퀄리티 강제 주입) + 프롬프트 합체
+        full_prompt = f"{QUALITY_PREFIX} {description}, {NEGATIVE_PROMPT}"
+        encoded_prompt = urllib.parse.quote(full_prompt)
+        
+        # 고정 시드면 같은 요청의 이미지를 캐시에서 복사 (무작위 시드는 매번 다른 요청이라 캐시 안 함)
+        cache_key = None
+        if self.deterministic_seed and self.image_cache is not None:
+            cache_key = ImageCache.make_key(IMAGE_PROVIDER, IMAGE_MODEL, full_prompt, IMAGE_WIDTH, IMAGE_HEIGHT,
+                                            prompt_seed(full_prompt), backends.backend_name())
+            cached_path = self.image_cache.get(cache_key)
+            if cached_path is not None:
+                pipeline_metrics.increment("image_cache_hits")
+                tmp_path = image_path.with_name(image_filename + ".tmp")
+                shutil.copyfile(cached_path, tmp_path)
+                os.replace(tmp_path, image_path)
+                print(f"      💾 이미지 캐시 적중: {image_filename}")
+                return str(image_path), relative_path
+            pipeline_metrics.increment("image_cache_misses")
+        
         for attempt in range(max_retries):
+            if attempt > 0:
+                pipeline_metrics.increment("image_retries")
             try:
-                # 1. 랜덤 시드 (다양성 확보)
-                seed = random.randint(1, 99999999)
-                
-                # 2. 💎 화질 부스터 (퀄리티 강제 주입)
-                quality_prefix = "Masterpiece, award winning photography, 8k resolution, highly detailed, cinematic lighting, depth of field, f/1.8, bokeh, realistic texture, raw photo,"
-                negative_prompt = "blurry, distorted, low quality, cartoon, illustration, bad hands, ugly, text, watermark, grainy"
-                
-                # 프롬프트 합체
-                full_prompt = f"{quality_prefix} {description}, {negative_prompt}"
-                encoded_prompt = urllib.parse.quote(full_prompt)
+                # 1. 시드 (고정 시드: 프롬프트에서 결정, 아니면 랜덤으로 다양성 확보)
+                seed = prompt_seed(full_prompt) if self.deterministic_seed else random.randint(1, 99999999)
                 
-                # 3. URL 생성 (Flux 모델 고정)
-                pollinations_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1280&height=720&model=flux&nologo=true&seed={seed}&enhance=false"
+                # 2. URL 생성 (Flux 모델 고정)
+                pollinations_url = (f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={IMAGE_WIDTH}"
+                                    f"&height={IMAGE_HEIGHT}&model={IMAGE_MODEL}&nologo=true&seed={seed}&enhance=false")
                 
                 if attempt == 0:
                     print(f"   🎨 [Flux] 고화질 생성 시도 ({attempt+1}/{max_retries})")
                 else:
                     print(f"      🔄 재시도 {attempt+1}/{max_retries}...")
                 
-                # 4. 요청 (Timeout 60초)
-                response = requests.get(pollinations_url, timeout=60)
+                # 3. 요청 (Timeout 60초)
+                pipeline_metrics.increment("image_requests")
+                with service_slot("pollinations"):
+                    response = backends.fetch_image(pollinations_url, timeout=60)
                 
                 if response.status_code == 200:
-                    # 파일 저장
-                    file_hash = hashlib.md5(description.encode()).hexdigest()[:8]
-                    image_filename = f"{image_id}_{file_hash}.png"
-                    image_path = self.output_dir / image_filename
-                    
-                    with open(image_path, 'wb') as f:
+                    pipeline_metrics.increment("image_bytes", len(response.content))
+                    # 파일 저장 (임시 파일 → rename: 중단돼도 반쪽 파일이 재사용되지 않음)
+                    tmp_path = image_path.with_name(image_filename + ".tmp")
+                    with open(tmp_path, 'wb') as f:
                         f.write(response.content)
+                    os.replace(tmp_path, image_path)
+                    if cache_key is not None:
+                        # 캐시 저장 실패는 이미 받은 이미지에 영향 없음 (재다운로드하지 않도록 여기서 처리)
+                        try:
+                            self.image_cache.put(cache_key, response.content, {
+                                "backend": backends.backend_name(),
+                                "provider": IMAGE_PROVIDER,
+                                "model": IMAGE_MODEL,
+                                "prompt": full_prompt,
+                                "width": IMAGE_WIDTH,
+                                "height": IMAGE_HEIGHT,
+                                "seed": seed
+                            })
+                        except OSError as e:
+                            print(f"      ⚠️ 이미지 캐시 저장 실패 (생성 결과는 사용): {e}")
                     
-                    relative_path = f"automation/generated_images/{image_filename}"
                     print(f"      ✅ 생성 성공: {image_filename}")
                     return str(image_path), relative_path
                 else:
@@ -128,6 +182,41 @@ class ImageAuditAgent:
         print(f"      ❌ 최종 생성 실패 (재시도 초과)")
         return None, None
     
+    def prefetch(self, section: dict, index: int = None):
+        """
+        Step 2가 스트리밍 중 넘겨준 섹션이 이미지 플레이스홀더면 즉시 생성 시작
+        (글 작성과 이미지 생성을 겹쳐서 전체 소요 시간 단축)
+        """
+        if section.get('type') != 'image_placeholder':
+            return
+        if (section.get('id'), section.get('description', '')) in self._prefetched:
+            return
+        print(f"   ⚡ 이미지 선행 생성 시작: {section.get('id')}")
+        self._submit(section)
+    
+    def _submit(self, section: dict):
+        """이미지 생성 작업 등록 (이미 등록된 플레이스홀더는 기존 작업 반환)"""
+        key = (section.get('id'), section.get('description', ''))
+        if key not in self._prefetched:
+            if self._executor is None:
+                # 작업자 수는 설정값, 실제 Pollinations 동시 요청은 service_slot이 제한
+                self._executor = ThreadPoolExecutor(max_workers=self.image_workers)
+            self._prefetched[key] = self._executor.submit(self._timed_generate, key[1], key[0])
+        return self._prefetched[key]
+    
+    def _timed_generate(self, description: str, image_id: str) -> tuple:
+        """generate_image + 소요 시간 (image_path, relative_path, 초)"""
+        started = time.perf_counter()
+        image_path, relative_path = self.generate_image(description, image_id)
+        return image_path, relative_path, time.perf_counter() - started
+    
+    def _shutdown_prefetch(self):
+        """사용되지 않은 선행 작업 정리"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._prefetched = {}
+    
     def audit_image_with_vision(self, image_path: str, original_description: str, max_key_rotations: int = None) -> str:
         """[Free Pass 모드] API 쿼터 절약을 위해 무조건 통과"""
         print(f"      ⏩ [Free Pass] 쿼터 절약을 위해 Vision 검수 생략 (PASS)")
@@ -148,9 +237,21 @@ class ImageAuditAgent:
             "generated": 0,
             "passed": 0,
             "failed": 0,
-            "removed": 0
+            "removed": 0,
+            "prefetched": 0,
+            "image_timings": []
         }
         
+        # 선행 시작되지 않은 플레이스홀더도 한꺼번에 생성 시작 (결과는 아래에서 섹션 순서대로 사용)
+        step_started = time.perf_counter()
+        placeholders = [section for section in sections if section['type'] == 'image_placeholder']
+        prefetched_keys = set(self._prefetched)
+        for section in placeholders:
+            self._submit(section)
+        if placeholders:
+            print(f"   🚀 이미지 {len(placeholders)}장 병렬 생성 "
+                  f"(작업자 {self.image_workers}개, Pollinations 동시 {get_limit('pollinations')}개)")
+        
         for i, section in enumerate(sections):
             if section['type'] == 'image_placeholder':
                 stats["total_placeholders"] += 1
@@ -164,11 +265,19 @@ class ImageAuditAgent:
                 if kor_desc:
                     print(f"   🇰🇷 Caption: {kor_desc[:40]}...")
                 
-                # 1. 이미지 생성 (영어 프롬프트 사용)
-                image_path, relative_path = self.generate_image(
-                    eng_desc,
-                    section['id']
-                )
+                # 1. 이미지 생성 결과 대기 (영어 프롬프트 사용, 같은 플레이스홀더가 반복되면 결과 공유)
+                key = (section['id'], eng_desc)
+                if key in prefetched_keys:
+                    stats["prefetched"] += 1
+                wait_started = time.perf_counter()
+                image_path, relative_path, seconds = self._submit(section).result()
+                stats["image_timings"].append({
+                    "id": section['id'],
+                    "seconds": round(seconds, 2),
+                    "waited": round(time.perf_counter() - wait_started, 2),
+                    "prefetched": key in prefetched_keys,
+                    "ok": bool(image_path)
+                })
                 
                 if image_path and relative_path:
                     stats["generated"] += 1
@@ -200,12 +309,21 @@ class ImageAuditAgent:
             else:
                 updated_sections.append(section)
         
+        self._shutdown_prefetch()
+        stats["image_wall_seconds"] = round(time.perf_counter() - step_started, 2)
+        
         result = content_data.copy()
         result['sections'] = updated_sections
         result['stats'] = stats
         
         print("\n" + "="*60)
         print(f"📊 처리 완료: 총 {stats['passed']}장 생성 및 삽입됨")
+        if stats["image_timings"]:
+            total = sum(timing["seconds"] for timing in stats["image_timings"])
+            print(f"⏱️ 이미지 생성 합계 {total:.1f}초 → 실제 대기 {stats['image_wall_seconds']:.1f}초")
+            for timing in stats["image_timings"]:
+                prefetched = ", 선행" if timing["prefetched"] else ""
+                print(f"   • {timing['id']}: {timing['seconds']:.1f}초 (대기 {timing['waited']:.1f}초{prefetched})")
         print("="*60)
         
         return result
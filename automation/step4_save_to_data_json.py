@@ -98,6 +98,8 @@ class DataSaver:
         return md, today_date, thumbnail_url
 
     def update_data_json(self, new_article):
+        """data.json 갱신 (new_article: 글 1개 또는 여러 개의 리스트)"""
+        new_articles = new_article if isinstance(new_article, list) else [new_article]
         if self.data_file.exists():
             with open(self.data_file, 'r', encoding='utf-8') as f:
                 try:
@@ -106,23 +108,69 @@ class DataSaver:
                 except: articles = []
         else: articles = []
 
-        articles = [a for a in articles if a['title'] != new_article['title']]
-        articles.insert(0, new_article)
+        new_titles = {a['title'] for a in new_articles}
+        articles = [a for a in articles if a['title'] not in new_titles]
+        articles = new_articles + articles
         articles = articles[:50]
 
         with open(self.data_file, 'w', encoding='utf-8') as f:
             json.dump({"articles": articles}, f, ensure_ascii=False, indent=2)
 
-    def run(self):
-        data = self.load_validated_content()
-        if not data: return
+    def run(self, data=None):
+        """
+        Step 3 결과를 Markdown/data.json으로 저장
+        
+        Args:
+            data: Step 3 결과 (run_pipeline.py에서 메모리로 전달, 없으면 파일에서 로드)
+        
+        Returns:
+            생성된 Markdown 파일 경로 (실패 시 None)
+        """
+        if data is None:
+            data = self.load_validated_content()
+        if not data: return None
         print("\n💾 Step 4: Markdown 변환 (Final Polish)")
         
+        file_path, article = self.write_markdown(data)
+        self.update_data_json(article)
+        print(f"✅ 저장 완료: contents/{file_path.name}")
+        return file_path
+
+    def run_batch(self, items):
+        """
+        여러 글을 한 번에 저장 (Markdown 여러 개 + data.json 1회 갱신)
+        
+        Args:
+            items: Step 3 결과 리스트
+        
+        Returns:
+            생성된 Markdown 파일 경로 리스트 (items와 같은 순서)
+        """
+        print(f"\n💾 Step 4: Markdown 변환 (배치 {len(items)}개)")
+        
+        file_paths, articles = [], []
+        for data in items:
+            file_path, article = self.write_markdown(data)
+            file_paths.append(file_path)
+            articles.append(article)
+            print(f"✅ 저장 완료: contents/{file_path.name}")
+        
+        if articles:
+            self.update_data_json(articles)
+        return file_paths
+
+    def write_markdown(self, data):
+        """Markdown 파일 작성 후 (파일 경로, data.json용 항목) 반환"""
         # Markdown 생성 및 썸네일 URL 획득
         md_content, date_str, thumbnail_url = self.create_markdown_content(data)
         
         timestamp = datetime.now().strftime('%H%M%S')
         filename = f"{date_str}-{timestamp}-ai-article.md"
+        # 같은 초에 여러 글을 저장하는 배치 모드에서 파일명 충돌 방지
+        counter = 2
+        while (self.contents_dir / filename).exists():
+            filename = f"{date_str}-{timestamp}-{counter}-ai-article.md"
+            counter += 1
         file_path = self.contents_dir / filename
 
         with open(file_path, 'w', encoding='utf-8') as f:
@@ -131,7 +179,7 @@ class DataSaver:
         # 썸네일 없으면 기본 이미지 사용
         final_image = thumbnail_url if thumbnail_url else "https://picsum.photos/800/400"
         
-        self.update_data_json({
+        article = {
             "title": data['title'],
             "summary": data.get('summary', '')[:120] + "...",
             "date": date_str,
@@ -140,8 +188,8 @@ class DataSaver:
             "link": f"/contents/{filename.replace('.md', '.html')}",
             "tags": data.get('tags', []),
             "file_path": str(filename)
-        })
-        print(f"✅ 저장 완료: contents/{filename}")
+        }
+        return file_path, article
 
 if __name__ == "__main__":
     DataSaver().run()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+가짜 백엔드 파이프라인 회귀 테스트
+- PIPELINE_BACKEND=fake로 Step 1~4 전체 실행 (네트워크/API 키 없이)
+- 임시 디렉토리에 automation 스크립트와 설정만 복사해서 실행 (실제 data.json, 캐시, 상태 파일은 건드리지 않음)
+- Step 2 섹션 스키마, Step 3 이미지 수, 오류 주입(invalid_json / quota) 시에도 실행 완료 확인
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from step2_writer_agent import SECTION_TYPES
+
+
+AUTOMATION_DIR = Path(__file__).parent
+
+
+def run_fake_pipeline(workdir: Path, **fake_env) -> subprocess.CompletedProcess:
+    """workdir에 파이프라인을 복사해 가짜 백엔드로 1편 생성"""
+    target = workdir / "automation"
+    target.mkdir(parents=True)
+    for source in AUTOMATION_DIR.glob("*.py"):
+        shutil.copy(source, target / source.name)
+    shutil.copy(AUTOMATION_DIR / "config_ai.json", target / "config_ai.json")
+
+    env = {name: value for name, value in os.environ.items()
+           if not name.startswith(("GEMINI_", "FAKE_", "MANUAL_"))}
+    env.update({
+        "PIPELINE_BACKEND": "fake",
+        "GEMINI_API_KEYS": json.dumps(["fake-key-1", "fake-key-2"]),
+        "FAKE_SEED": "7",
+    })
+    env.update(fake_env)
+    return subprocess.run([sys.executable, "automation/run_pipeline.py"], cwd=workdir, env=env,
+                          capture_output=True, text=True, timeout=300)
+
+
+def load_output(workdir: Path, name: str) -> dict:
+    with open(workdir / "automation" / "intermediate_outputs" / name, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def assert_pipeline_completed(workdir: Path, result: subprocess.CompletedProcess):
+    assert result.returncode == 0, f"❌ 파이프라인 실패:\n{result.stdout[-3000:]}\n{result.stderr[-3000:]}"
+
+    step2 = load_output(workdir, "step2_structured_content.json")
+    assert step2["title"], "❌ 제목 누락"
+    assert step2["sections"], "❌ 섹션 없음"
+    for section in step2["sections"]:
+        assert section["type"] in SECTION_TYPES, f"❌ 알 수 없는 섹션 형식: {section['type']}"
+        if section["type"] == "heading":
+            assert section.get("level") in (2, 3) and section.get("content"), f"❌ 소제목 형식 오류: {section}"
+        elif section["type"] == "list":
+            assert isinstance(section.get("items"), list) and section["items"], f"❌ 목록 형식 오류: {section}"
+        elif section["type"] == "image_placeholder":
+            assert section.get("id") and section.get("description"), f"❌ 이미지 자리 형식 오류: {section}"
+        else:
+            assert section.get("content"), f"❌ 본문 누락: {section}"
+    # 잘린 응답을 로컬 복구하면 뒷부분(summary/tags)이 비어 있을 수 있으므로 형식만 확인
+    assert isinstance(step2.get("tags", []), list) and isinstance(step2.get("summary", ""), str)
+
+    # 이미지 자리마다 이미지가 생성되어 파일로 저장됨
+    placeholders = [section for section in step2["sections"] if section["type"] == "image_placeholder"]
+    step3 = load_output(workdir, "step3_validated_content.json")
+    images = [section for section in step3["sections"] if section["type"] == "image"]
+    assert placeholders, "❌ 이미지 자리 없음"
+    assert step3["stats"]["total_placeholders"] == len(placeholders)
+    assert len(images) == len(placeholders), f"❌ 이미지 {len(images)}개 / 자리 {len(placeholders)}개"
+    for image in images:
+        assert (workdir / image["url"]).stat().st_size > 0, f"❌ 이미지 파일 없음: {image['url']}"
+
+    saved = list((workdir / "contents").rglob("*.md"))
+    assert len(saved) == 1, f"❌ 저장된 글 {len(saved)}개"
+
+
+def test_fake_pipeline(tmp_path):
+    """가짜 백엔드 기본 실행"""
+    assert_pipeline_completed(tmp_path, run_fake_pipeline(tmp_path))
+
+
+def test_fake_pipeline_invalid_json(tmp_path):
+    """깨진 JSON 응답 주입 (복구 또는 재요청 후 완료)"""
+    result = run_fake_pipeline(tmp_path, FAKE_ERROR_RATE="0.3", FAKE_ERROR_KIND="invalid_json")
+    assert_pipeline_completed(tmp_path, result)
+
+
+def test_fake_pipeline_quota_errors(tmp_path):
+    """429 할당량 오류 주입 (다른 키로 재시도 후 완료)"""
+    result = run_fake_pipeline(tmp_path, FAKE_ERROR_RATE="0.3", FAKE_ERROR_KIND="quota")
+    assert_pipeline_completed(tmp_path, result)
+    assert "할당량 초과" in result.stdout, "❌ 할당량 오류가 주입되지 않음"
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+뉴스 일괄 요약 응답 파싱 테스트 (parse_batch_summaries)
+- JSON 응답 ({"summaries": [...]} / 배열, 코드 펜스 포함)
+- JSON이 깨졌을 때 "[번호]" / "번호." / "번호:" 줄 기준 분리
+- 요청하지 않은 번호와 빈 요약은 버림
+"""
+
+import pytest
+
+# news_crawler가 import하는 수집용 라이브러리 (requirements.txt)
+for module in ("feedparser", "requests", "bs4"):
+    pytest.importorskip(module)
+
+from news_crawler import parse_batch_summaries
+
+
+def test_json_object():
+    text = '{"summaries": [{"id": 1, "summary": "첫 기사 요약"}, {"id": 2, "summary": "둘째 기사 요약"}]}'
+    assert parse_batch_summaries(text, [1, 2]) == {1: "첫 기사 요약", 2: "둘째 기사 요약"}
+
+
+def test_json_array_in_code_fence():
+    text = '```json\n[{"id": "3", "summary": " 요약 "}]\n```'
+    assert parse_batch_summaries(text, [3]) == {3: "요약"}
+
+
+def test_line_marker_fallback():
+    text = "[1] 첫 기사 요약\n이어지는 문장\n2. 둘째 기사 요약\n3: 셋째 기사 요약"
+    assert parse_batch_summaries(text, [1, 2, 3]) == {
+        1: "첫 기사 요약 이어지는 문장",
+        2: "둘째 기사 요약",
+        3: "셋째 기사 요약"
+    }
+
+
+def test_drops_unrequested_and_empty_summaries():
+    text = '{"summaries": [{"id": 1, "summary": "요약"}, {"id": 9, "summary": "요청 안 함"}, {"id": 2, "summary": ""}, {"id": "x"}]}'
+    assert parse_batch_summaries(text, [1, 2]) == {1: "요약"}
+    assert parse_batch_summaries("[1] 요약\n[7] 요청 안 함", [1]) == {1: "요약"}
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Step 2 JSON 복구 테스트
+- repair_json: 코드 펜스/설명 문장 제거, trailing comma, 잘린 응답 절단, 문자열 안의 따옴표·괄호
+- 복구할 수 없는 응답은 parse_response가 ValueError (재호출 대상)
+"""
+
+import json
+
+import pytest
+
+from llm_client import LLMClient
+from step2_writer_agent import WriterAgent, repair_json
+
+
+def repaired(text: str):
+    return json.loads(repair_json(text))
+
+
+def test_code_fence_and_surrounding_text():
+    assert repaired('```json\n{"a": 1}\n```') == {"a": 1}
+    assert repaired('응답입니다:\n{"a": 1}\n이상입니다.') == {"a": 1}
+
+
+def test_trailing_commas():
+    assert repaired('{"a": [1, 2,], "b": {"c": 3,},}') == {"a": [1, 2], "b": {"c": 3}}
+
+
+def test_truncated_reply_cut_to_last_complete_section():
+    text = '{"sections": [{"type": "paragraph", "content": "첫 문단"}, {"type": "paragraph", "content": "둘'
+    assert repaired(text) == {"sections": [{"type": "paragraph", "content": "첫 문단"}]}
+
+
+def test_escaped_quotes_and_brackets_inside_strings():
+    text = '{"a": "그는 \\"안녕 {}[]\\"이라고 했다", "b": 2}'
+    assert repaired(text) == {"a": '그는 "안녕 {}[]"이라고 했다', "b": 2}
+
+
+@pytest.mark.parametrize("text", ['{"a": "}"', '{"sections": [', '설명만 있고 JSON이 없음'])
+def test_unrepairable_reply_stays_invalid(text):
+    with pytest.raises(ValueError):
+        json.loads(repair_json(text))
+
+
+def make_agent() -> WriterAgent:
+    agent = WriterAgent.__new__(WriterAgent)
+    agent.client = LLMClient(["test-key"])
+    return agent
+
+
+@pytest.mark.parametrize("text", ['{"a": "}"', '{"sections": [', '{"sections": []}'])
+def test_parse_response_falls_through_to_recall(text):
+    with pytest.raises(ValueError):
+        make_agent().parse_response("제목", "prompt", text)
+
+
+def test_parse_response_uses_repaired_sections():
+    text = '```json\n{"sections": [{"type": "heading", "level": 2, "content": "소제목"},], "summary": "요약"'
+    result = make_agent().parse_response("제목", "prompt", text)
+    assert result["title"] == "제목"
+    assert result["sections"] == [{"type": "heading", "level": 2, "content": "소제목"}]